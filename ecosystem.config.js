@@ -68,6 +68,31 @@ module.exports = {
       watch: false,
       kill_timeout: 10000,
       listen_timeout: 5000,
+    },
+    
+    {
+      name: 'akparti-embedding-service',
+      script: '/opt/akparti-genclik/embedding_service.py',
+      interpreter: '/opt/akparti-genclik/venv/bin/python',
+      args: '--host 127.0.0.1 --port 8765',
+      instances: 1,
+      exec_mode: 'fork',
+      cwd: '/opt/akparti-genclik',
+      
+      // Monitoring
+      max_memory_restart: '2G',
+      min_uptime: '30s', // Model yükleme süresi
+      max_restarts: 5,
+      
+      // Logs
+      log_file: '/var/log/akparti-genclik/embedding-service-combined.log',
+      out_file: '/var/log/akparti-genclik/embedding-service-out.log',
+      error_file: '/var/log/akparti-genclik/embedding-service-error.log',
+      log_date_format: 'YYYY-MM-DD HH:mm:ss Z',
+      
+      // Auto-restart options
+      watch: false,
+      kill_timeout: 10000,
     }
   ],
 
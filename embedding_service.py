@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+🛰️ Buffalo-L Yerleşik Embedding Servisi
+FaceAnalysis modelini bir kez yükler ve yüz embedding isteklerini yerel HTTP
+üzerinden sunar. Aynı anda gelen istekler küçük bir zaman penceresinde
+toplanır; tespit resim başına, ArcFace tanıma tek toplu çağrıyla yapılır.
+
+Kullanım:
+    python embedding_service.py --port 8765
+    curl --data-binary @yuz.jpg http://127.0.0.1:8765/extract
+
+    # Tek seferlik çıkarım (süreç başına model yükleme; servis yoksa sunucunun yedeği)
+    python embedding_service.py --once yuz.jpg
+"""
+import argparse
+import contextlib
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from face_pipeline import BatchedFaceAnalyzer, create_face_app, decode_image
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class EmbeddingService:
+    """İstekleri toplayıp toplu embedding çıkaran servis çekirdeği"""
+
+    def __init__(self, face_app, max_batch=16, max_wait=0.005):
+        self.analyzer = BatchedFaceAnalyzer(face_app, batch_size=max_batch)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._batch_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, data):
+        """Resim içeriğini kuyruğa ekle; sonuç sözlüğü için Future döndür"""
+        future = Future()
+        self._requests.put((data, future))
+        return future
+
+    def extract(self, data, timeout=30):
+        return self.submit(data).result(timeout=timeout)
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        """Toplanan istekler: resim başına tespit, tek çağrıda tanıma"""
+        crops = []
+        owners = []
+        for data, future in batch:
+            try:
+                rgb = decode_image(data)
+                if rgb is None:
+                    future.set_result({"success": False, "error": "Resim okunamadı"})
+                    continue
+                faces = self.analyzer.detect(rgb)
+                if not faces:
+                    future.set_result({"success": False, "error": "Yüz bulunamadı"})
+                    continue
+                # İlk yüzün embedding'ini al (en yüksek tespit skoru)
+                face = faces[0]
+                crops.append(self.analyzer.align(rgb, face))
+                owners.append((future, face))
+            except Exception as e:
+                future.set_result({"success": False, "error": str(e)})
+
+        if not crops:
+            return
+
+        try:
+            feats = self.analyzer.embed(crops)
+        except Exception as e:
+            for future, _ in owners:
+                future.set_result({"success": False, "error": str(e)})
+            return
+
+        for (future, face), feat in zip(owners, feats):
+            face.embedding = feat.flatten()
+            embedding = face.normed_embedding.astype('float32').tolist()  # 512D embedding
+            future.set_result({
+                "success": True,
+                "embedding": embedding,
+                "embedding_size": len(embedding),
+                "confidence": float(face.det_score) if face.det_score is not None else 1.0
+            })
+
+
+class EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    """POST /extract (ham resim gövdesi) ve GET /health uç noktaları"""
+    service = None
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {"status": "ok", "model": "buffalo_l"})
+        else:
+            self._send_json(404, {"success": False, "error": "Bulunamadı"})
+
+    def do_POST(self):
+        if self.path != '/extract':
+            self._send_json(404, {"success": False, "error": "Bulunamadı"})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_json(400, {"success": False, "error": "Yüz resmi eksik"})
+            return
+
+        try:
+            result = self.service.extract(self.rfile.read(length))
+        except Exception as e:
+            self._send_json(500, {"success": False, "error": str(e)})
+            return
+        self._send_json(200 if result.get("success") else 400, result)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # İstek başına erişim logu yazma
+        pass
+
+
+def extract_once(image_path):
+    """Süreç başına model yükleyerek tek resim işle; sonuç servisle aynı (RGB çözme, normalize embedding)"""
+    try:
+        service = EmbeddingService(create_face_app(), max_batch=1, max_wait=0)
+        with open(image_path, 'rb') as f:
+            return service.extract(f.read())
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffalo-L yerleşik embedding servisi")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-batch', type=int, default=16, help="Tek tanıma çağrısındaki en fazla istek")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="İstek toplama penceresi (ms)")
+    parser.add_argument('--once', metavar='IMAGE', help="Tek resim işle, JSON yazdır ve çık")
+    args = parser.parse_args()
+
+    if args.once:
+        # insightface model yüklerken stdout'a yazar; sunucu stdout'u tek satır JSON olarak okur
+        with contextlib.redirect_stdout(sys.stderr):
+            result = extract_once(args.once)
+        print(json.dumps(result))
+        return 0
+
+    face_app = create_face_app(log=print)
+    EmbeddingRequestHandler.service = EmbeddingService(
+        face_app, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0
+    )
+    server = ThreadingHTTPServer((args.host, args.port), EmbeddingRequestHandler)
+    print(f"🛰️ Embedding servisi hazır: http://{args.host}:{args.port}/extract")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+🧭 Buffalo-L Yaklaşık En Yakın Komşu (ANN) İndeksi
+Saf NumPy IVF-Flat indeksi: embedding'ler küresel k-means ile nlist kümeye
+ayrılır, sorguda sadece en yakın nprobe kümenin üyeleri tam skorlanır.
+Sorgu maliyeti ~ nlist (merkez taraması) + nprobe * N / nlist (aday yüzler).
+Küme sayısı ~4*sqrt(N), nprobe en fazla DEFAULT_MAX_NPROBE (sabit) seçilir:
+~16 bin yüzün üstünde maliyet ~12*sqrt(N) ile büyür (160 bin yüzde adaylar
+N'nin ~%2'si). Sabit nprobe'da recall N büyüdükçe yavaşça düşer; eğitimde
+ölçülen recall model_info.json'a yazılır, gerekirse sorguda nprobe artırılır
+(FaceMatcher.search / face_matcher.py --nprobe).
+"""
+import os
+
+import numpy as np
+
+ANN_FILE = "face_ann_ivf.npz"
+ANN_TYPE = "ivf_flat"
+MIN_ANN_FACES = 1000  # Bunun altında tam arama zaten yeterince hızlı
+DEFAULT_MAX_NPROBE = 32  # Sorgu başına en fazla taranan küme (aday sayısı ~sqrt(N) ile büyüsün diye sabit)
+
+
+def default_nlist(count):
+    """Varsayılan küme sayısı (~4*sqrt(N))"""
+    return int(max(1, min(count, round(4 * np.sqrt(count)))))
+
+
+def default_nprobe(nlist):
+    """Varsayılan sorgu başına taranan küme sayısı (nlist/16, 8..DEFAULT_MAX_NPROBE)"""
+    return int(max(1, min(nlist, DEFAULT_MAX_NPROBE, max(8, nlist // 16))))
+
+
+def _normalized(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _assign(matrix, centroids, block=65536):
+    """Her satırı en yakın (en yüksek cosine) merkeze ata"""
+    labels = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), block):
+        chunk = _normalized(matrix[start:start + block])
+        labels[start:start + block] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(matrix, nlist, iterations=15, sample_size=100000, seed=0):
+    """Normalize vektörler üzerinde k-means (merkezler birim norm)"""
+    rng = np.random.default_rng(seed)
+    if len(matrix) > sample_size:
+        sample = _normalized(matrix[np.sort(rng.choice(len(matrix), sample_size, replace=False))])
+    else:
+        sample = _normalized(matrix)
+
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        # Boş kalan kümeleri rastgele örneklerle yeniden başlat
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = _normalized(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Ters listeli (inverted file) ANN indeksi"""
+
+    def __init__(self, centroids, list_offsets, list_ids, count, nprobe=None):
+        self.centroids = centroids        # (nlist, D) birim norm
+        self.list_offsets = list_offsets  # (nlist + 1,) list_ids içindeki başlangıçlar
+        self.list_ids = list_ids          # (N,) kümelere göre sıralı satır numaraları
+        self.count = count
+        self.nprobe = nprobe or default_nprobe(len(centroids))
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings, nlist=None, nprobe=None, seed=0):
+        """Embedding matrisinden indeks oluştur"""
+        count = len(embeddings)
+        nlist = nlist or default_nlist(count)
+        centroids = spherical_kmeans(embeddings, nlist, seed=seed)
+        labels = _assign(embeddings, centroids)
+        order = np.argsort(labels, kind='stable').astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(labels, minlength=nlist))
+        return cls(centroids, offsets, order, count, nprobe=nprobe)
+
+    def candidates(self, probe, nprobe=None):
+        """Tek (normalize) probe için taranacak satır numaraları"""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        scores = self.centroids @ probe
+        if nprobe < self.nlist:
+            lists = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        else:
+            lists = np.arange(self.nlist)
+        return np.concatenate([self.list_ids[self.list_offsets[l]:self.list_offsets[l + 1]] for l in lists])
+
+    def save(self, model_dir):
+        np.savez(os.path.join(model_dir, ANN_FILE), centroids=self.centroids, list_offsets=self.list_offsets,
+                 list_ids=self.list_ids, count=np.int64(self.count), nprobe=np.int64(self.nprobe))
+        return ANN_FILE
+
+
+def load_ann_index(model_dir, expected_count=None):
+    """Model klasöründeki ANN indeksini yükle; yoksa ya da güncel değilse None"""
+    path = os.path.join(model_dir, ANN_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        index = IVFIndex(data['centroids'], data['list_offsets'], data['list_ids'],
+                         int(data['count']), nprobe=int(data['nprobe']))
+    if expected_count is not None and index.count != expected_count:
+        return None
+    return index
+
+
+def evaluate_recall(embeddings, index, k=10, queries=200, noise=0.03, nprobe=None, seed=0):
+    """Kayıtlı yüzlerin gürültülü kopyalarıyla tam aramaya karşı recall@k ölç"""
+    rng = np.random.default_rng(seed)
+    matrix = _normalized(embeddings)
+    rows = rng.choice(len(matrix), min(queries, len(matrix)), replace=False)
+    probes = _normalized(matrix[rows] + rng.normal(0, noise, (len(rows), matrix.shape[1])).astype(np.float32))
+
+    k = min(k, len(matrix))
+    hits = 0
+    for probe in probes:
+        exact = np.argpartition(-(matrix @ probe), k - 1)[:k]
+        candidates = index.candidates(probe, nprobe=nprobe)
+        if len(candidates) > k:
+            approx = candidates[np.argpartition(-(matrix[candidates] @ probe), k - 1)[:k]]
+        else:
+            approx = candidates
+        hits += len(np.intersect1d(exact, approx))
+    return hits / float(k * len(probes))
+
+
+def build_model_ann_index(model_dir, embeddings, nlist=None, nprobe=None, k=10):
+    """Eğitim sonunda indeks oluştur, kaydet; model_info için özet döndür"""
+    index = IVFIndex.build(embeddings, nlist=nlist, nprobe=nprobe)
+    index.save(model_dir)
+    return {
+        "type": ANN_TYPE,
+        "file": ANN_FILE,
+        "nlist": index.nlist,
+        "nprobe": index.nprobe,
+        f"recall_at_{k}": round(evaluate_recall(embeddings, index, k=k), 4)
+    }
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+📦 Buffalo-L Toplu Eşleştirme
+Kamp sonrası binlerce katılımcı fotoğraflarını aynı saat içinde ister; sunucu
+her TC oturumu için her modeli yeniden okuyup tüm yüzleri tek tek tarar.
+Bu iş çok sayıda kullanıcının probe embedding'lerini ve bir model kümesini
+alır; her modeli bir kez yükler ve tüm probe'ları bloklar halinde matris
+çarpımıyla skorlar (maliyet kullanıcı × model değil, model başına bir geçiş).
+Skor bloğu --block-mb ile sınırlıdır; model matrisi model başına bir kez
+bellekte tutulur. Parçalı modellerde parçalar sırayla taranır; satır
+numaraları parçalar arasında genel numaraya çevrilir.
+
+Probe dosyası: {"kullanıcı": embedding ya da [embedding, ...]} (JSON). Bir
+kullanıcının birden fazla referans yüzü varsa yüz başına en yüksek benzerlik
+alınır. Çıktı klasörüne kullanıcı başına <kullanıcı>.json sonuç manifesti ve
+batch_summary.json özeti yazılır.
+
+Kullanım:
+    python face_batch_match.py probes.json --output-dir batch_results --threshold 0.3
+    python face_batch_match.py probes.json --models kamp_2025 il_kongresi --top-k 500
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from face_matcher import FaceMatcher, ShardedFaceMatcher, normalize_rows
+from face_store import MODELS_DIR, has_face_database, write_json_atomic
+
+BATCH_VERSION = 1
+SUMMARY_FILE = "batch_summary.json"
+DEFAULT_THRESHOLD = 0.3     # Sunucudaki eşleştirme eşiği
+DEFAULT_PROBE_BLOCK = 1024  # Skor bloğundaki probe sayısı
+DEFAULT_BLOCK_MB = 64       # Skor bloğu için bellek sınırı (probe bloğu × yüz bloğu × 4 bayt)
+
+
+def _ignore(*args, **kwargs):
+    pass
+
+
+def load_probes(path):
+    """Probe dosyasını oku: (kullanıcı kimlikleri, (P, D) matris, satır -> kullanıcı sırası)"""
+    if path == '-':
+        data = json.load(sys.stdin)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("Probe dosyası {kullanıcı: embedding} sözlüğü olmalı")
+
+    users, blocks, owners = [], [], []
+    for user, embeddings in data.items():
+        matrix = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if matrix.size == 0:
+            continue
+        owners.append(np.full(len(matrix), len(users), dtype=np.int64))
+        users.append(str(user))
+        blocks.append(matrix)
+    if not users:
+        return users, np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64)
+    return users, normalize_rows(np.concatenate(blocks)), np.concatenate(owners)
+
+
+def available_models(models_dir=MODELS_DIR):
+    """models/ altında yüz veritabanı olan model adları"""
+    if not os.path.isdir(models_dir):
+        return []
+    return sorted(name for name in os.listdir(models_dir)
+                  if not name.startswith('.') and has_face_database(os.path.join(models_dir, name)))
+
+
+def user_file_names(users):
+    """Kullanıcı kimliklerinden güvenli, çakışmayan manifest dosya adları"""
+    names, used = {}, set()
+    for user in users:
+        base = re.sub(r'[^A-Za-z0-9_.-]', '_', user).lstrip('.') or '_'
+        name, suffix = base, 1
+        while name.lower() in used:  # Büyük/küçük harf duyarsız dosya sistemleri için
+            suffix += 1
+            name = f"{base}-{suffix}"
+        used.add(name.lower())
+        names[user] = name + '.json'
+    return names
+
+
+def threshold_hits(matrix, probes, threshold, probe_block=DEFAULT_PROBE_BLOCK, block_mb=DEFAULT_BLOCK_MB):
+    """Tüm probe'ları tüm yüzlerle bloklar halinde skorla; probe başına [(satırlar, skorlar), ...] parçaları
+
+    matrix bir EmbeddingMatrix'tir (int8 modeller nicemlenmiş haliyle skorlanır).
+    Skor bloğu en fazla probe_block × face_block float32 olur; face_block block_mb'den hesaplanır.
+    """
+    probe_block = max(1, probe_block)
+    face_block = max(1, (block_mb << 20) // (4 * probe_block))
+    hits = [[] for _ in range(len(probes))]
+    for probe_start in range(0, len(probes), probe_block):
+        block = probes[probe_start:probe_start + probe_block]
+        for face_start in range(0, len(matrix), face_block):
+            scores = matrix.dot(block, face_start, face_start + face_block)
+            probe_rows, face_rows = np.nonzero(scores >= threshold)
+            if not len(probe_rows):
+                continue
+            # np.nonzero satır sırasıyla döner: probe başına parçalara böl
+            bounds = np.searchsorted(probe_rows, np.arange(len(block) + 1))
+            for probe in np.flatnonzero(np.diff(bounds)):
+                part = slice(bounds[probe], bounds[probe + 1])
+                hits[probe_start + probe].append((face_rows[part] + face_start, scores[probe, face_rows[part]]))
+    return hits
+
+
+def user_matches(parts, top_k=None):
+    """Bir kullanıcının tüm probe parçalarını birleştir: yüz başına en yüksek skor, azalan sırada"""
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    rows = np.concatenate([part_rows for part_rows, _ in parts])
+    scores = np.concatenate([part_scores for _, part_scores in parts])
+    order = np.argsort(-scores, kind='stable')
+    rows, scores = rows[order], scores[order]
+    _, first = np.unique(rows, return_index=True)  # Sıralı dizide ilk geçiş = en yüksek skor
+    keep = np.sort(first)
+    if top_k is not None:
+        keep = keep[:top_k]
+    return rows[keep], scores[keep]
+
+
+def run_batch_match(users, probes, owners, model_names, output_dir, threshold=DEFAULT_THRESHOLD, top_k=None,
+                    probe_block=DEFAULT_PROBE_BLOCK, block_mb=DEFAULT_BLOCK_MB, models_dir=MODELS_DIR, log=None):
+    """Her modeli bir kez yükle, tüm kullanıcıları eşleştir ve kullanıcı başına manifest yaz; özeti döndür"""
+    log = log or _ignore
+    os.makedirs(output_dir, exist_ok=True)
+    results = {user: {} for user in users}
+    model_stats = {}
+    started_at = time.perf_counter()
+
+    for model_name in model_names:
+        model_dir = os.path.join(models_dir, model_name)
+        if not has_face_database(model_dir):
+            log(f"⚠️ {model_name}: yüz veritabanı bulunamadı, atlanıyor")
+            continue
+        model_started = time.perf_counter()
+        # Toplu iş tam tarama yapar; ANN indeksi ve kimlik kümeleri yüklenmez
+        matcher = FaceMatcher.from_model(model_dir, ann_index=None, clusters=None)
+        if len(matcher) and matcher.dim != probes.shape[1]:
+            log(f"⚠️ {model_name}: embedding boyutu eşleşmiyor ({probes.shape[1]} vs "
+                f"{matcher.dim}), atlanıyor")
+            continue
+        load_seconds = time.perf_counter() - model_started
+
+        user_parts = [[] for _ in users]
+        shard_parts = matcher.parts() if isinstance(matcher, ShardedFaceMatcher) else [(matcher, 0)]
+        for part, row_offset in shard_parts:
+            hits = threshold_hits(part.matrix, probes, threshold, probe_block=probe_block, block_mb=block_mb)
+            for probe, parts in enumerate(hits):
+                user_parts[owners[probe]].extend((rows + row_offset, scores) for rows, scores in parts)
+
+        matched_users = match_count = 0
+        for user, parts in zip(users, user_parts):
+            rows, scores = user_matches(parts, top_k)
+            if len(rows):
+                matched_users += 1
+                match_count += len(rows)
+            results[user][model_name] = {
+                'faces': len(matcher),
+                'matches': [matcher.describe_match(row, score) for row, score in zip(rows, scores)]
+            }
+
+        elapsed = time.perf_counter() - model_started
+        model_stats[model_name] = {
+            'faces': len(matcher),
+            'matched_users': matched_users,
+            'matches': match_count,
+            'load_seconds': round(load_seconds, 3),
+            'seconds': round(elapsed, 3)
+        }
+        log(f"✅ {model_name}: {len(matcher)} yüz × {len(probes)} probe, {matched_users} kullanıcı eşleşti, "
+            f"{match_count} eşleşme ({elapsed:.1f} sn)")
+        if isinstance(matcher, ShardedFaceMatcher):
+            matcher.close()
+        del matcher, user_parts
+
+    created_at = datetime.now().isoformat()
+    file_names = user_file_names(users)
+    for user in users:
+        write_json_atomic(os.path.join(output_dir, file_names[user]), {
+            'version': BATCH_VERSION,
+            'user': user,
+            'created_at': created_at,
+            'threshold': threshold,
+            'top_k': top_k,
+            'models': results[user]
+        }, ensure_ascii=False)
+
+    summary = {
+        'version': BATCH_VERSION,
+        'created_at': created_at,
+        'users': len(users),
+        'probes': len(probes),
+        'threshold': threshold,
+        'top_k': top_k,
+        'models': model_stats,
+        'elapsed': round(time.perf_counter() - started_at, 3),
+        'files': file_names
+    }
+    write_json_atomic(os.path.join(output_dir, SUMMARY_FILE), summary, indent=2, ensure_ascii=False)
+    log(f"📄 {len(users)} kullanıcı manifesti yazıldı: {output_dir}/ ({summary['elapsed']:.1f} sn)")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffalo-L çok kullanıcılı, çok modelli toplu eşleştirme")
+    parser.add_argument('probes',
+                        help="Probe JSON dosyası: {kullanıcı: embedding ya da embedding listesi} ('-' = stdin)")
+    parser.add_argument('--models', nargs='+', default=None,
+                        help="Eşleştirilecek model adları (varsayılan: models/ altındaki tüm modeller)")
+    parser.add_argument('--output-dir', default='batch_results', help="Kullanıcı manifestlerinin yazılacağı klasör")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Benzerlik eşiği")
+    parser.add_argument('--top-k', type=int, default=None, help="Kullanıcı ve model başına en fazla sonuç")
+    parser.add_argument('--probe-block', type=int, default=DEFAULT_PROBE_BLOCK, help="Skor bloğundaki probe sayısı")
+    parser.add_argument('--block-mb', type=int, default=DEFAULT_BLOCK_MB, help="Skor bloğu bellek sınırı (MB)")
+    args = parser.parse_args()
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    users, probes, owners = load_probes(args.probes)
+    if not users:
+        log("❌ Probe dosyasında embedding bulunamadı")
+        return 1
+    model_names = args.models or available_models()
+    if not model_names:
+        log(f"❌ {MODELS_DIR}/ altında model bulunamadı")
+        return 1
+
+    log(f"📦 Toplu eşleştirme: {len(users)} kullanıcı ({len(probes)} probe), {len(model_names)} model")
+    run_batch_match(users, probes, owners, model_names, args.output_dir, threshold=args.threshold, top_k=args.top_k,
+                    probe_block=args.probe_block, block_mb=args.block_mb, log=log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
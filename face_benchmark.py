@@ -0,0 +1,990 @@
+#!/usr/bin/env python3
+"""
+📈 Buffalo-L Benchmark Aracı
+pipeline: Seri döngü ile paralel pipeline'ın resim/sn hızını karşılaştırır.
+          --recognition-batch verilirse toplu ArcFace modu da ölçülür ve
+          embedding'ler yüz başına tanıma sonuçlarıyla karşılaştırılır.
+service : Çalışan embedding servisine yük testi uygular (p50/p99, istek/sn) ve
+          istek başına süreç başlatan eski yaklaşımla karşılaştırır.
+ann     : Sentetik kimlik kümeleriyle farklı model boyutlarında tam arama ve
+          IVF indeksinin sorgu gecikmesini ve recall@k değerini ölçer.
+decode  : Tam çözünürlüklü çözme ile küçültülmüş çözmenin (--reduced-decode)
+          resim başına süresini ve bellek tepe değerini ölçer; embedding'leri
+          tam çözünürlük sonuçlarıyla yüz yüze (bbox IoU) karşılaştırır.
+suite   : Tekrarlanabilir sentetik fotoğraf korpusu (farklı çözünürlük ve yüz
+          sayıları) üretip her boyut için uçtan uca eğitim hızını, aşama
+          maliyetlerini, depolama formatı (float32/float16/int8/json) başına
+          yazma/yükleme/tarama sürelerini ve model boyutuna göre eşleştirme
+          gecikmesini ölçer; sonuçları JSON'a yazar. --baseline ile önceki
+          sonuç dosyasına göre gerilemeleri listeler. --stub ile model ağırlığı olmadan (çevrimdışı, CPU) çalışır.
+processes: Çok süreçli eğitimin (--processes) süreç sayısına göre
+          ölçeklenmesini ölçer: her süreç sayısı için uçtan uca resim/sn,
+          tek sürece göre hızlanma ve verim (hızlanma / süreç).
+
+Kullanım:
+    python face_benchmark.py pipeline /yol/fotograflar --limit 500 --decode-workers 1,2,4,8
+    python face_benchmark.py pipeline /yol/fotograflar --recognition-batch 32
+    python face_benchmark.py service /yol/yuzler --requests 200 --concurrency 8
+    python face_benchmark.py ann --sizes 10000,100000,300000
+    python face_benchmark.py decode /yol/dslr_fotograflar --max-side 1280
+    python face_benchmark.py suite --stub --sizes 1000,10000 --output sonuclar.json
+    python face_benchmark.py suite --stub --baseline onceki_sonuclar.json
+"""
+import argparse
+import functools
+import importlib.metadata
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from face_ann import MIN_ANN_FACES, IVFIndex, build_model_ann_index, evaluate_recall
+from face_clusters import DEFAULT_QUERY_THRESHOLD, MIN_CLUSTER_FACES, build_model_clusters
+from face_matcher import FaceMatcher, normalize_rows
+from face_pipeline import (
+    DEFAULT_DETECT_MAX_SIDE, DEFAULT_RECOGNITION_BATCH, TrainingPipeline, create_face_app, decode_for_detection,
+    decode_image, list_image_files
+)
+from face_profile import format_summary
+from face_staging import STAGING_DIR
+from face_store import (
+    MODELS_DIR, load_embedding_store, load_face_database, save_json_database, write_json_atomic
+)
+from face_training import TrainingJob
+
+SUITE_VERSION = 1
+CORPUS_VERSION = 1
+CORPUS_META = "corpus.json"
+CORPUS_PART_SIZE = 1000  # Alt klasör başına resim
+# (genişlik, yükseklik) ve seçilme olasılıkları: web/telefon boyutlarından DSLR'a
+CORPUS_RESOLUTIONS = ((640, 480), (1024, 768), (1920, 1080), (3000, 2000), (4000, 3000))
+CORPUS_RESOLUTION_WEIGHTS = (0.25, 0.3, 0.25, 0.12, 0.08)
+CORPUS_FACE_COUNT_WEIGHTS = (0.1, 0.45, 0.25, 0.12, 0.08)  # 0..4 yüz
+CORPUS_FACES_PER_IDENTITY = 20
+STUB_SKIN_RGB = (230, 200, 180)  # Sentetik yüz rengi; stub dedektör bu rengi arar
+STORAGE_FORMATS = ('float32', 'float16', 'int8', 'json')
+SCAN_PROBES = 64  # Depo formatı başına toplu tam tarama ölçümündeki probe sayısı
+
+# Gerileme karşılaştırmasındaki ölçümler: (yol, büyük değer daha iyi mi)
+REGRESSION_METRICS = (
+    (('training', 'images_per_sec'), True),
+    (('training', 'faces_per_sec'), True),
+    (('storage', 'float32', 'write_seconds'), False),
+    (('storage', 'float32', 'load_seconds'), False),
+    (('storage', 'float16', 'write_seconds'), False),
+    (('storage', 'float16', 'load_seconds'), False),
+    (('storage', 'int8', 'write_seconds'), False),
+    (('storage', 'int8', 'load_seconds'), False),
+    (('storage', 'float32', 'scan_ms'), False),
+    (('storage', 'int8', 'scan_ms'), False),
+    (('storage', 'json', 'write_seconds'), False),
+    (('storage', 'json', 'load_seconds'), False),
+    (('matching', 'exact', 'p50_ms'), False),
+    (('matching', 'ann', 'p50_ms'), False),
+    (('matching', 'clusters', 'p50_ms'), False)
+)
+
+
+def run_pipeline(face_app, files, decode_workers, inference_workers, recognition_batch_size=0, detect_max_side=0):
+    """Pipeline'ı çalıştır; (süre, {dosya||face_N: embedding}) döndür"""
+    pipeline = TrainingPipeline(face_app, decode_workers=decode_workers, inference_workers=inference_workers,
+                                recognition_batch_size=recognition_batch_size, detect_max_side=detect_max_side)
+    started_at = time.perf_counter()
+    embeddings = {}
+    for result in pipeline.process(files):
+        for face_idx, face in enumerate(result.faces or []):
+            embeddings[f"{result.file_path}||face_{face_idx}"] = face.normed_embedding.astype('float32')
+    return time.perf_counter() - started_at, embeddings
+
+
+def max_embedding_diff(reference, candidate):
+    """İki sonuç kümesi arasındaki en büyük mutlak embedding farkı"""
+    if reference.keys() != candidate.keys():
+        return float('inf')
+    return max((float(np.abs(reference[key] - candidate[key]).max()) for key in reference), default=0.0)
+
+
+def parse_worker_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def latency_summary(latencies, elapsed):
+    """Gecikme listesinden p50/p99 (ms) ve istek/sn özeti"""
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return (f"p50 {np.percentile(latencies_ms, 50):8.1f} ms  p99 {np.percentile(latencies_ms, 99):8.1f} ms  "
+            f"{len(latencies) / elapsed:7.2f} istek/sn")
+
+
+def post_image(url, data):
+    """Servise ham resim gönder; başarılı mı döndür"""
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/octet-stream'})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status == 200
+    except urllib.error.HTTPError:
+        return False
+
+
+def load_test_service(url, payloads, total_requests, concurrency):
+    """Eşzamanlı istemcilerle servise yük uygula; (gecikmeler, süre, başarılı) döndür"""
+    latencies = []
+    successes = [0]
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client():
+        while True:
+            with lock:
+                request_id = next(counter, None)
+            if request_id is None:
+                return
+            started_at = time.perf_counter()
+            ok = post_image(url, payloads[request_id % len(payloads)])
+            with lock:
+                latencies.append(time.perf_counter() - started_at)
+                successes[0] += int(ok)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started_at, successes[0]
+
+
+def benchmark_spawn(files, total_requests):
+    """İstek başına yeni Python süreci (model her seferinde yüklenir)"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'embedding_service.py')
+    latencies = []
+    started_at = time.perf_counter()
+    for request_id in range(total_requests):
+        request_started = time.perf_counter()
+        subprocess.run([sys.executable, script, '--once', files[request_id % len(files)]],
+                       capture_output=True, timeout=120)
+        latencies.append(time.perf_counter() - request_started)
+    return latencies, time.perf_counter() - started_at
+
+
+def run_service_benchmark(args):
+    files = list_image_files(args.folder, recursive=True)
+    if not files:
+        print("❌ Klasörde resim bulunamadı")
+        return 1
+
+    payloads = []
+    for file_path in files[:args.requests]:
+        with open(file_path, 'rb') as f:
+            payloads.append(f.read())
+
+    print(f"📁 {len(payloads)} farklı resim, {args.requests} istek, {args.concurrency} eşzamanlı istemci")
+    # Isınma
+    post_image(args.url, payloads[0])
+    latencies, elapsed, successes = load_test_service(args.url, payloads, args.requests, args.concurrency)
+    print(f"servis        : {latency_summary(latencies, elapsed)}  ({successes}/{args.requests} başarılı)")
+
+    if args.spawn_requests:
+        latencies, elapsed = benchmark_spawn(files, args.spawn_requests)
+        print(f"süreç/istek   : {latency_summary(latencies, elapsed)}  ({args.spawn_requests} istek, seri)")
+    return 0
+
+
+def synthetic_embeddings(count, dim=512, faces_per_identity=8, spread=0.35, seed=0):
+    """Kimlik merkezleri etrafında gürültülü sentetik embedding'ler"""
+    rng = np.random.default_rng(seed)
+    identities = rng.standard_normal((max(1, count // faces_per_identity), dim)).astype(np.float32)
+    identities /= np.linalg.norm(identities, axis=1, keepdims=True)
+    owners = rng.integers(0, len(identities), count)
+    noise = rng.standard_normal((count, dim)).astype(np.float32) * (spread / np.sqrt(dim))
+    return identities[owners] + noise
+
+
+def mean_query_latency(matcher, probes, top_k, exact):
+    started_at = time.perf_counter()
+    for probe in probes:
+        matcher.search(probe, top_k=top_k, exact=exact)
+    return (time.perf_counter() - started_at) / len(probes)
+
+
+def run_ann_benchmark(args):
+    for size in args.sizes:
+        embeddings = synthetic_embeddings(size)
+        started_at = time.perf_counter()
+        index = IVFIndex.build(embeddings)
+        build_time = time.perf_counter() - started_at
+
+        keys = [str(row) for row in range(size)]
+        matcher = FaceMatcher(keys, keys, embeddings, ann_index=index)
+        probes = matcher.embeddings[np.random.default_rng(1).choice(size, args.queries, replace=False)]
+        exact_ms = mean_query_latency(matcher, probes, args.top_k, exact=True) * 1000.0
+        ann_ms = mean_query_latency(matcher, probes, args.top_k, exact=False) * 1000.0
+        recall = evaluate_recall(embeddings, index, k=args.top_k, queries=args.queries)
+        candidates = np.mean([len(index.candidates(probe)) for probe in probes])
+        print(f"N={size:<8} tam {exact_ms:8.2f} ms  ANN {ann_ms:8.2f} ms  (x{exact_ms / ann_ms:.1f})  "
+              f"recall@{args.top_k} {recall:.3f}  nlist {index.nlist} nprobe {index.nprobe}  "
+              f"aday {candidates:.0f} (%{candidates * 100.0 / size:.1f})  kurulum {build_time:.1f} sn")
+    return 0
+
+
+def measure_decode(datas, decode):
+    """Resim başına ortalama çözme süresi (ms) ve ortalama bellek tepe değeri (MB)"""
+    elapsed = 0.0
+    peaks = []
+    for data in datas:
+        tracemalloc.start()
+        started_at = time.perf_counter()
+        decode(data)
+        elapsed += time.perf_counter() - started_at
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed * 1000.0 / len(datas), float(np.mean(peaks)) / (1 << 20)
+
+
+def detect_faces(face_app, files, detect_max_side):
+    """Seri pipeline ile {dosya: [(bbox, normalize embedding)]}"""
+    pipeline = TrainingPipeline(face_app, decode_workers=0, detect_max_side=detect_max_side)
+    faces = {}
+    for result in pipeline.process(files):
+        faces[result.file_path] = [(face.bbox, face.normed_embedding) for face in result.faces or []]
+    return faces
+
+
+def bbox_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare_faces(reference, candidate, min_iou=0.5):
+    """Tam çözünürlük yüzleriyle eşleşen yüzlerin cosine benzerlikleri; (benzerlikler, kayıp, fazla)"""
+    similarities = []
+    missed = extra = 0
+    for file_path, reference_faces in reference.items():
+        remaining = list(candidate.get(file_path, []))
+        for bbox, embedding in reference_faces:
+            ious = [bbox_iou(bbox, other[0]) for other in remaining]
+            if not ious or max(ious) < min_iou:
+                missed += 1
+                continue
+            _, other_embedding = remaining.pop(int(np.argmax(ious)))
+            similarities.append(float(np.dot(embedding, other_embedding)))
+        extra += len(remaining)
+    return similarities, missed, extra
+
+
+def run_decode_benchmark(args):
+    files = list_image_files(args.folder, recursive=True)[:args.limit]
+    if not files:
+        print("❌ Klasörde resim bulunamadı")
+        return 1
+
+    datas = []
+    for file_path in files:
+        with open(file_path, 'rb') as f:
+            datas.append(f.read())
+    print(f"📁 {len(files)} resim, uzun kenar hedefi {args.max_side} px")
+
+    full_ms, full_mb = measure_decode(datas, decode_image)
+    reduced_ms, reduced_mb = measure_decode(datas, lambda data: decode_for_detection(data, args.max_side))
+    print(f"tam çözme       : {full_ms:7.1f} ms/resim  tepe {full_mb:7.1f} MB")
+    print(f"küçültülmüş     : {reduced_ms:7.1f} ms/resim  tepe {reduced_mb:7.1f} MB  "
+          f"(x{full_ms / max(reduced_ms, 1e-9):.2f} hız, %{100.0 * (1 - reduced_mb / max(full_mb, 1e-9)):.0f} bellek)")
+
+    if args.skip_embeddings:
+        return 0
+
+    face_app = create_face_app(log=print)
+    detect_faces(face_app, files[:1], 0)  # Isınma
+    started_at = time.perf_counter()
+    reference = detect_faces(face_app, files, 0)
+    full_time = time.perf_counter() - started_at
+    started_at = time.perf_counter()
+    candidate = detect_faces(face_app, files, args.max_side)
+    reduced_time = time.perf_counter() - started_at
+
+    similarities, missed, extra = compare_faces(reference, candidate)
+    total = sum(len(faces) for faces in reference.values())
+    print(f"uçtan uca       : tam {len(files) / full_time:6.2f} resim/sn, küçültülmüş {len(files) / reduced_time:6.2f} "
+          f"resim/sn (x{full_time / reduced_time:.2f})")
+    if similarities:
+        print(f"embedding       : {len(similarities)}/{total} yüz eşleşti, cosine ort. {np.mean(similarities):.4f} "
+              f"min {np.min(similarities):.4f}, <0.95: {sum(s < 0.95 for s in similarities)}")
+    print(f"tespit farkı    : {missed} kayıp, {extra} fazla yüz")
+    return 0
+
+
+def run_pipeline_benchmark(args):
+    files = list_image_files(args.folder, recursive=True)[:args.limit]
+    if not files:
+        print("❌ Klasörde resim bulunamadı")
+        return 1
+
+    face_app = create_face_app(log=print)
+    # Isınma: ilk çağrıdaki ONNX oturum hazırlığını ölçüme katma
+    run_pipeline(face_app, files[:2], 0, 1)
+
+    print(f"📁 {len(files)} resim, {os.cpu_count()} çekirdek")
+    serial_time, serial_embeddings = run_pipeline(face_app, files, 0, 1)
+    serial_rate = len(files) / serial_time
+    print(f"seri        : {serial_rate:7.2f} resim/sn  ({len(serial_embeddings)} yüz, {serial_time:.1f} sn)")
+
+    for workers in sorted(set(args.decode_workers)):
+        elapsed, embeddings = run_pipeline(face_app, files, workers, args.inference_workers)
+        rate = len(files) / elapsed
+        print(f"pipeline d={workers:<2} i={args.inference_workers}: {rate:7.2f} resim/sn  "
+              f"({len(embeddings)} yüz, {elapsed:.1f} sn, x{rate / serial_rate:.2f})")
+
+    if args.recognition_batch:
+        workers = max(args.decode_workers)
+        elapsed, embeddings = run_pipeline(face_app, files, workers, args.inference_workers,
+                                           recognition_batch_size=args.recognition_batch)
+        rate = len(files) / elapsed
+        print(f"toplu b={args.recognition_batch:<3} d={workers:<2}: {rate:7.2f} resim/sn  "
+              f"({len(embeddings)} yüz, {elapsed:.1f} sn, x{rate / serial_rate:.2f}, "
+              f"maks. fark {max_embedding_diff(serial_embeddings, embeddings):.2e})")
+    return 0
+
+class StubDetector:
+    """Sentetik yüzleri renginden bulan dedektör (model dosyası gerektirmez)"""
+
+    input_size = (640, 640)
+    det_thresh = 0.5
+
+    def detect(self, img, max_num=0, metric='default'):
+        height, width = img.shape[:2]
+        scale = min(1.0, self.input_size[0] / float(max(height, width)))
+        if scale < 1.0:
+            img = cv2.resize(img, (max(1, int(width * scale)), max(1, int(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+        mask = np.abs(img.astype(np.int16) - np.array(STUB_SKIN_RGB, dtype=np.int16)).sum(axis=2) < 60
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8))
+
+        bboxes, kpss = [], []
+        for x, y, w, h, area in stats[1:]:
+            if area < 20:
+                continue
+            x, y, w, h = x / scale, y / scale, w / scale, h / scale
+            bboxes.append([x, y, x + w, y + h, 0.9])
+            kpss.append([[x + 0.3 * w, y + 0.4 * h], [x + 0.7 * w, y + 0.4 * h], [x + 0.5 * w, y + 0.55 * h],
+                         [x + 0.35 * w, y + 0.75 * h], [x + 0.65 * w, y + 0.75 * h]])
+        if max_num:
+            bboxes, kpss = bboxes[:max_num], kpss[:max_num]
+        return np.array(bboxes, dtype=np.float32).reshape(-1, 5), np.array(kpss, dtype=np.float32).reshape(-1, 5, 2)
+
+
+class StubRecognizer:
+    """Hizalanmış kırpıntıyı sabit rastgele izdüşümle 512D'ye gömen tanıyıcı"""
+
+    input_size = (112, 112)
+    input_shape = ['None', 3, 112, 112]
+
+    def __init__(self, seed=0, dim=512):
+        self.projection = np.random.default_rng(seed).standard_normal((16 * 16 * 3, dim)).astype(np.float32)
+
+    def get_feat(self, imgs):
+        if not isinstance(imgs, list):
+            imgs = [imgs]
+        pooled = np.stack([
+            cv2.resize(img, (16, 16), interpolation=cv2.INTER_AREA).astype(np.float32).ravel() / 255.0 - 0.5
+            for img in imgs
+        ])
+        return pooled @ self.projection
+
+    def get(self, img, face):
+        from insightface.utils import face_align
+        crop = face_align.norm_crop(img, landmark=face.kps, image_size=self.input_size[0])
+        face.embedding = self.get_feat(crop).flatten()
+        return face.embedding
+
+
+class StubFaceApp:
+    """FaceAnalysis yerine geçen stub (--stub): ağırlık dosyası ve ağ gerektirmez
+
+    Süreler gerçek modeli temsil etmez; pipeline, depolama ve eşleştirme
+    maliyetlerini model çıkarımından bağımsız ölçmek için kullanılır.
+    """
+
+    model_dir = 'stub'
+
+    def __init__(self, seed=0):
+        self.det_model = StubDetector()
+        self.models = {'detection': self.det_model, 'recognition': StubRecognizer(seed)}
+
+    def get(self, img, max_num=0):
+        from insightface.app.common import Face
+        bboxes, kpss = self.det_model.detect(img, max_num=max_num)
+        faces = []
+        for bbox, kps in zip(bboxes, kpss):
+            face = Face(bbox=bbox[:4], kps=kps, det_score=bbox[4])
+            self.models['recognition'].get(img, face)
+            faces.append(face)
+        return faces
+
+
+def create_stub_face_app(intra_op_threads=0, seed=0):
+    """Çok süreçli eğitimde işçi süreçlerin stub modeli (--stub --processes)"""
+    return StubFaceApp(seed=seed)
+
+
+def synthetic_image(seed, index, identity_count):
+    """Tekrarlanabilir sentetik fotoğraf; (BGR resim, yüz sayısı) döndürür
+
+    Resim içeriği sadece (seed, index) ile belirlenir; kimlikler göz/ağız
+    rengi ve oranlarıyla ayrışır.
+    """
+    rng = np.random.default_rng([seed, index])
+    width, height = CORPUS_RESOLUTIONS[rng.choice(len(CORPUS_RESOLUTIONS), p=CORPUS_RESOLUTION_WEIGHTS)]
+    if rng.random() < 0.3:
+        width, height = height, width  # Dikey fotoğraf
+
+    # Arka plan: düşük frekanslı renk alanı + blok doku (yüz renginden uzak, koyu tonlar)
+    background = rng.integers(0, 140, (6, 8, 3), dtype=np.uint8)
+    image = cv2.resize(background, (width, height), interpolation=cv2.INTER_CUBIC)
+    texture = rng.integers(0, 40, (max(1, height // 8), max(1, width // 8), 3), dtype=np.uint8)
+    image = cv2.add(image, cv2.resize(texture, (width, height), interpolation=cv2.INTER_NEAREST))
+
+    face_count = int(rng.choice(len(CORPUS_FACE_COUNT_WEIGHTS), p=CORPUS_FACE_COUNT_WEIGHTS))
+    cell = width // max(face_count, 1)
+    skin = tuple(int(v) for v in STUB_SKIN_RGB[::-1])
+    for slot in range(face_count):
+        face_w = int(min(cell, height * 0.6) * rng.uniform(0.35, 0.6))
+        face_h = int(face_w * 1.3)
+        cx = slot * cell + cell // 2 + int(rng.integers(-cell // 8, cell // 8 + 1))
+        cy = int(rng.integers(face_h // 2 + 1, height - face_h // 2))
+
+        identity = np.random.default_rng([seed, int(rng.integers(identity_count)), identity_count])
+        eye_color = tuple(int(v) for v in identity.integers(0, 120, 3))
+        mouth_color = tuple(int(v) for v in identity.integers(0, 120, 3))
+        eye_dx = int(face_w * identity.uniform(0.15, 0.25))
+        eye_r = max(2, int(face_w * identity.uniform(0.05, 0.09)))
+        mouth_w = max(2, int(face_w * identity.uniform(0.1, 0.22)))
+
+        cv2.ellipse(image, (cx, cy), (face_w // 2, face_h // 2), 0, 0, 360, skin, -1)
+        for eye_x in (cx - eye_dx, cx + eye_dx):
+            cv2.circle(image, (eye_x, cy - face_h // 8), eye_r, eye_color, -1)
+        cv2.ellipse(image, (cx, cy + face_h // 4), (mouth_w, max(2, face_h // 20)), 0, 0, 360, mouth_color, -1)
+    return image, face_count
+
+
+def generate_corpus(corpus_root, count, seed=0, log=print):
+    """Sentetik korpusu üret ya da aynı ayarlarla üretilmişse yeniden kullan; (klasör, meta)"""
+    folder = os.path.join(corpus_root, f"synthetic_{count}_s{seed}")
+    meta_path = os.path.join(folder, CORPUS_META)
+    meta = {'version': CORPUS_VERSION, 'count': count, 'seed': seed}
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+        if all(existing.get(key) == value for key, value in meta.items()):
+            return folder, existing
+
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+    log(f"🎨 Sentetik korpus oluşturuluyor: {count} resim ({folder})")
+    identity_count = max(1, count // CORPUS_FACES_PER_IDENTITY)
+
+    def write(index):
+        image, face_count = synthetic_image(seed, index, identity_count)
+        part = os.path.join(folder, f"part_{index // CORPUS_PART_SIZE:03d}")
+        os.makedirs(part, exist_ok=True)
+        cv2.imwrite(os.path.join(part, f"img_{index:06d}.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        return face_count, image.shape[0] * image.shape[1]
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        written = list(executor.map(write, range(count)))
+
+    # Meta en son yazılır: yarıda kalan üretim bir sonraki çalıştırmada baştan yapılır
+    meta.update(
+        faces=sum(face_count for face_count, _ in written),
+        megapixels=round(sum(pixels for _, pixels in written) / 1e6, 1),
+        identities=identity_count,
+        generate_seconds=round(time.perf_counter() - started_at, 2)
+    )
+    write_json_atomic(meta_path, meta)
+    return folder, meta
+
+
+def timed(function, *args, **kwargs):
+    """(sonuç, süre sn)"""
+    started_at = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started_at
+
+
+def directory_bytes(folder):
+    return sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+
+
+def benchmark_training(face_app, folder, model_name, args, threads_per_process=None):
+    """TrainingJob ile uçtan uca eğitim; (ara depo, ölçümler) döndürür"""
+    # Önceki (yarım) benchmark koşusundan devam etmesin
+    staging_dir = os.path.join(STAGING_DIR, model_name)
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+
+    face_app_factory = functools.partial(create_stub_face_app, seed=args.seed) if args.stub else None
+    job = TrainingJob(
+        folder, model_name, decode_workers=args.decode_workers, inference_workers=args.inference_workers,
+        recognition_batch_size=args.recognition_batch, detect_max_side=args.max_side, use_cache=False,
+        face_app=face_app, processes=args.processes, threads_per_process=threads_per_process,
+        face_app_factory=face_app_factory
+    )
+    (staged, training_info), elapsed = timed(job.run)
+    profile = training_info['profile']
+    return staged, {
+        'elapsed': round(elapsed, 3),
+        'images': profile['images'],
+        'faces': training_info['stats']['total_faces'],
+        'failed_files': training_info['stats']['failed_files'],
+        'images_per_sec': round(profile['images'] / elapsed, 3),
+        'faces_per_sec': round(training_info['stats']['total_faces'] / elapsed, 3),
+        'profile': profile
+    }
+
+
+def benchmark_storage(staged, model_name):
+    """Depolama formatı başına yazma/yükleme/tarama süresi, disk boyutu ve float32'ye göre hata
+
+    (ölçümler, float32 model klasörü) döndürür.
+    """
+    results = {}
+    reference = None
+    reference_scan = None
+    reference_dir = os.path.join(MODELS_DIR, f"{model_name}_float32")
+    for storage_format in STORAGE_FORMATS:
+        model_dir = os.path.join(MODELS_DIR, f"{model_name}_{storage_format}")
+        os.makedirs(model_dir)
+        if storage_format == 'json':
+            # Eski sunucular için dışa aktarım: binary depodan satır satır yazılır
+            _, write_time = timed(save_json_database, model_dir, load_embedding_store(reference_dir))
+            database, load_time = timed(load_face_database, model_dir)
+            embeddings = np.stack([record['embedding'] for record in database.values()])
+        else:
+            _, write_time = timed(staged.finalize, model_dir, dtype=storage_format)
+            store, load_time = timed(load_embedding_store, model_dir, mmap=False)
+            embeddings = store.float_embeddings()
+        embeddings = normalize_rows(embeddings)
+        if reference is None:
+            reference = embeddings
+        matcher, matcher_time = timed(FaceMatcher.from_model, model_dir)
+        probes = reference[:SCAN_PROBES]
+        matcher.similarities(probes)  # Isınma
+        _, scan_time = timed(matcher.similarities, probes)
+        if reference_scan is None:
+            reference_scan = scan_time
+
+        results[storage_format] = {
+            'write_seconds': round(write_time, 4),
+            'load_seconds': round(load_time, 4),
+            'matcher_load_seconds': round(matcher_time, 4),
+            'scan_ms': round(scan_time * 1000.0, 4),
+            'scan_speedup': round(reference_scan / scan_time, 2) if scan_time > 0 else None,
+            'integer_scoring': matcher.matrix.integer_scoring,
+            'matrix_bytes': matcher.matrix.nbytes,
+            'bytes': directory_bytes(model_dir),
+            'max_abs_error': float(np.abs(embeddings - reference).max()) if len(reference) else 0.0
+        }
+    return results, reference_dir
+
+
+def latency_stats(latencies):
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        'mean_ms': round(float(latencies_ms.mean()), 4),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 4),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 4)
+    }
+
+
+def query_latencies(matcher, probes, top_k, exact, threshold=None):
+    matcher.search(probes[0], threshold=threshold, top_k=top_k, exact=exact)  # Isınma
+    latencies = []
+    for probe in probes:
+        _, elapsed = timed(matcher.search, probe, threshold=threshold, top_k=top_k, exact=exact)
+        latencies.append(elapsed)
+    return latencies
+
+
+def benchmark_matching(model_dir, queries, top_k, seed=0):
+    """Eğitilen model üzerinde tam arama (tek ve toplu sorgu), ANN ve kimlik kümesi sorgu gecikmesi"""
+    matcher = FaceMatcher.from_model(model_dir)
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((queries, matcher.embeddings.shape[1])).astype(np.float32) * 0.02
+    probes = matcher.embeddings[rng.integers(0, len(matcher), queries)] + noise
+
+    _, batch_time = timed(matcher.search, probes, top_k=top_k, exact=True)
+    results = {
+        'faces': len(matcher),
+        'queries': queries,
+        'top_k': top_k,
+        'exact': latency_stats(query_latencies(matcher, probes, top_k, exact=True)),
+        'exact_batch_qps': round(queries / max(batch_time, 1e-9), 1),
+        'ann': None,
+        'clusters': None
+    }
+
+    if len(matcher) >= MIN_ANN_FACES:
+        ann_info, build_time = timed(build_model_ann_index, model_dir, matcher.embeddings, k=top_k)
+        matcher = FaceMatcher.from_model(model_dir)
+        results['ann'] = dict(latency_stats(query_latencies(matcher, probes, top_k, exact=False)),
+                              build_seconds=round(build_time, 3), nlist=ann_info['nlist'],
+                              nprobe=ann_info['nprobe'], recall=ann_info[f'recall_at_{top_k}'])
+
+    if len(matcher) >= MIN_CLUSTER_FACES:
+        # Kimlik kümeleri eşikli sorgularda kullanılır; tam arama da aynı eşikle ölçülür
+        cluster_info, build_time = timed(build_model_clusters, model_dir, matcher.embeddings)
+        matcher = FaceMatcher.from_model(model_dir)
+        exact_threshold = latency_stats(query_latencies(matcher, probes, None, True, DEFAULT_QUERY_THRESHOLD))
+        cluster_latency = latency_stats(query_latencies(matcher, probes, None, False, DEFAULT_QUERY_THRESHOLD))
+        results['clusters'] = dict(cluster_latency, exact_p50_ms=exact_threshold['p50_ms'],
+                                   build_seconds=round(build_time, 3),
+                                   clusters=cluster_info['clusters'], singletons=cluster_info['singletons'],
+                                   recall=cluster_info['recall'], scanned_share=cluster_info['scanned_share'])
+    return results
+
+
+def environment_info():
+    """Sonuçların hangi sürüm/ortamda alındığı (gerileme karşılaştırması için)"""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__
+    }
+    for package in ('onnxruntime', 'insightface'):
+        try:
+            info[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            info[package] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        info['git_commit'] = commit.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info['git_commit'] = None
+    return info
+
+
+def _metric(entry, path):
+    for key in path:
+        if not isinstance(entry, dict):
+            return None
+        entry = entry.get(key)
+    return entry
+
+
+def find_regressions(results, baseline, tolerance):
+    """Önceki sonuç dosyasına göre tolerance oranından fazla kötüleşen ölçümler"""
+    previous = {entry['corpus']['name']: entry for entry in baseline.get('results', [])}
+    regressions = []
+    for entry in results:
+        base = previous.get(entry['corpus']['name'])
+        if base is None:
+            continue
+        for path, higher_is_better in REGRESSION_METRICS:
+            current, before = _metric(entry, path), _metric(base, path)
+            if not current or not before:
+                continue
+            change = current / before - 1.0
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({
+                    'corpus': entry['corpus']['name'],
+                    'metric': '.'.join(path),
+                    'baseline': before,
+                    'current': current,
+                    'change': round(change, 4)
+                })
+    return regressions
+
+
+def print_suite_entry(entry):
+    training, storage, matching = entry['training'], entry['storage'], entry['matching']
+    print(f"eğitim        : {training['images_per_sec']:8.2f} resim/sn  {training['faces_per_sec']:8.2f} yüz/sn  "
+          f"({training['faces']} yüz, {training['elapsed']:.1f} sn)")
+    print(f"profil        : {format_summary(training['profile'])}")
+    for storage_format, values in storage.items():
+        print(f"depo {storage_format:<9}: yazma {values['write_seconds']:8.3f} sn  "
+              f"yükleme {values['load_seconds']:8.3f} sn  eşleştirici {values['matcher_load_seconds']:8.3f} sn  "
+              f"tarama {values['scan_ms']:8.2f} ms (x{values.get('scan_speedup') or 0:.2f})  "
+              f"matris {values['matrix_bytes'] / (1 << 20):7.1f} MB  {values['bytes'] / (1 << 20):8.1f} MB  "
+              f"maks. hata {values['max_abs_error']:.1e}")
+    exact = matching['exact']
+    print(f"eşleştirme    : N={matching['faces']}  tam p50 {exact['p50_ms']:.2f} ms  p99 {exact['p99_ms']:.2f} ms  "
+          f"toplu {matching['exact_batch_qps']:.0f} sorgu/sn")
+    if matching['ann']:
+        ann = matching['ann']
+        print(f"ANN           : p50 {ann['p50_ms']:.2f} ms  p99 {ann['p99_ms']:.2f} ms  recall {ann['recall']:.3f}  "
+              f"kurulum {ann['build_seconds']:.1f} sn")
+    if matching.get('clusters'):
+        clusters = matching['clusters']
+        print(f"kümeler       : p50 {clusters['p50_ms']:.2f} ms (eşikli tam {clusters['exact_p50_ms']:.2f} ms)  "
+              f"{clusters['clusters']} küme  recall {clusters['recall']:.3f}  "
+              f"taranan %{clusters['scanned_share'] * 100:.2f}  kurulum {clusters['build_seconds']:.1f} sn")
+
+
+def run_suite_benchmark(args):
+    output_path = os.path.abspath(args.output)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    # Korpuslar: verilen klasör ya da boyut başına sentetik korpus
+    if args.folder:
+        folder = os.path.abspath(args.folder)
+        corpora = [(os.path.basename(folder.rstrip(os.sep)), folder, {'count': len(list_image_files(folder))})]
+    else:
+        corpus_root = os.path.abspath(args.corpus_dir)
+        corpora = []
+        for size in args.sizes:
+            folder, meta = generate_corpus(corpus_root, size, seed=args.seed)
+            corpora.append((os.path.basename(folder), folder, meta))
+
+    face_app = StubFaceApp(seed=args.seed) if args.stub else create_face_app(log=print)
+
+    # Modeller ve ara depo geçici çalışma klasörüne yazılır (models/ göreli yol)
+    work_dir = os.path.abspath(args.work_dir) if args.work_dir else tempfile.mkdtemp(prefix='face_benchmark_')
+    os.makedirs(work_dir, exist_ok=True)
+    previous_cwd = os.getcwd()
+    os.chdir(work_dir)
+    results = []
+    try:
+        for name, folder, meta in corpora:
+            files = list_image_files(folder)
+            print(f"📁 {name}: {len(files)} resim, {meta.get('faces', '?')} çizilmiş yüz, {os.cpu_count()} çekirdek")
+            # Isınma: ilk çağrıdaki ONNX oturum hazırlığını ölçüme katma
+            run_pipeline(face_app, files[:2], 0, 1)
+
+            model_name = f"benchmark_{name}"
+            staged, training = benchmark_training(face_app, folder, model_name, args)
+            try:
+                storage, model_dir = benchmark_storage(staged, model_name)
+            finally:
+                staged.discard()
+            matching = benchmark_matching(model_dir, args.queries, args.top_k, seed=args.seed)
+            for storage_format in STORAGE_FORMATS:
+                shutil.rmtree(os.path.join(MODELS_DIR, f"{model_name}_{storage_format}"))
+
+            entry = {'corpus': dict(meta, name=name), 'training': training, 'storage': storage, 'matching': matching}
+            print_suite_entry(entry)
+            results.append(entry)
+    finally:
+        os.chdir(previous_cwd)
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'suite_version': SUITE_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'options': {
+            'stub': args.stub,
+            'seed': args.seed,
+            'decode_workers': args.decode_workers,
+            'inference_workers': args.inference_workers,
+            'processes': args.processes,
+            'recognition_batch': args.recognition_batch,
+            'max_side': args.max_side,
+            'queries': args.queries,
+            'top_k': args.top_k
+        },
+        'results': results
+    }
+
+    exit_code = 0
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        report['baseline'] = {'file': os.path.abspath(args.baseline), 'environment': baseline.get('environment'),
+                              'tolerance': args.tolerance}
+        report['regressions'] = regressions
+        for regression in regressions:
+            print(f"⚠️ Gerileme ({regression['corpus']}): {regression['metric']} {regression['baseline']} → "
+                  f"{regression['current']} (%{regression['change'] * 100:+.1f})")
+        if not regressions:
+            print(f"✅ Önceki sonuçlara göre %{args.tolerance * 100:.0f}'dan fazla gerileme yok")
+        elif args.fail_on_regression:
+            exit_code = 1
+
+    write_json_atomic(output_path, report, ensure_ascii=False, indent=2)
+    print(f"💾 Sonuçlar yazıldı: {output_path}")
+    return exit_code
+
+
+def run_processes_benchmark(args):
+    """Süreç sayısı başına uçtan uca eğitim hızı; tek sürece göre hızlanma ve verim"""
+    if args.folder:
+        folder = os.path.abspath(args.folder)
+    else:
+        folder, _ = generate_corpus(os.path.abspath(args.corpus_dir), args.synthetic, seed=args.seed)
+    files = list_image_files(folder)
+    if not files:
+        print("❌ Klasörde resim bulunamadı")
+        return 1
+
+    face_app = StubFaceApp(seed=args.seed) if args.stub else create_face_app(log=print)
+    # Isınma: ilk çağrıdaki ONNX oturum hazırlığını ölçüme katma
+    run_pipeline(face_app, files[:2], 0, 1)
+
+    cpu_count = os.cpu_count() or 1
+    print(f"📁 {len(files)} resim, {cpu_count} çekirdek")
+    work_dir = tempfile.mkdtemp(prefix='face_benchmark_')
+    previous_cwd = os.getcwd()
+    os.chdir(work_dir)
+    results = []
+    single_rate = None  # Tek süreçli (p=1) hız; hızlanma buna göre
+    try:
+        for processes in [0] + sorted(set(args.processes)):
+            run_args = argparse.Namespace(**dict(vars(args), processes=processes))
+            staged, training = benchmark_training(face_app, folder, f"benchmark_processes_{processes}", run_args,
+                                                  threads_per_process=args.threads_per_process)
+            staged.discard()
+            threads = (args.threads_per_process or max(1, cpu_count // processes)) if processes else None
+            entry = {
+                'processes': processes,
+                'threads_per_process': threads,
+                'images_per_sec': training['images_per_sec'],
+                'faces': training['faces'],
+                'elapsed': training['elapsed']
+            }
+            if processes == 1:
+                single_rate = entry['images_per_sec']
+            if processes and single_rate:
+                entry['speedup'] = round(entry['images_per_sec'] / single_rate, 3)
+                entry['efficiency'] = round(entry['speedup'] / processes, 3)
+            results.append(entry)
+
+            label, scaling = f"süreç p={processes:<2} t={threads}", ""
+            if not processes:
+                label = "tek süreç (thread)"
+            elif 'speedup' in entry:
+                scaling = f"  x{entry['speedup']:.2f}  verim %{entry['efficiency'] * 100:.0f}"
+            print(f"{label:<18}: {entry['images_per_sec']:7.2f} resim/sn  ({entry['faces']} yüz, "
+                  f"{entry['elapsed']:.1f} sn){scaling}")
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if max(args.processes) > cpu_count:
+        print(f"⚠️ {cpu_count} çekirdekten fazla süreç: bu süreç sayılarında ölçeklenme beklenmez")
+    if args.output:
+        report = {'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment_info(),
+                  'images': len(files), 'stub': args.stub, 'results': results}
+        write_json_atomic(os.path.abspath(args.output), report, ensure_ascii=False, indent=2)
+        print(f"💾 Sonuçlar yazıldı: {os.path.abspath(args.output)}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffalo-L benchmark aracı")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pipeline_parser = subparsers.add_parser('pipeline', help="Eğitim pipeline'ı resim/sn karşılaştırması")
+    pipeline_parser.add_argument('folder', help="Resim klasörü")
+    pipeline_parser.add_argument('--limit', type=int, default=200, help="Kullanılacak en fazla resim sayısı")
+    pipeline_parser.add_argument('--decode-workers', type=parse_worker_list, default=[1, 2, 4, os.cpu_count() or 4],
+                                 help="Denenecek çözme işçisi sayıları (virgülle ayrılmış)")
+    pipeline_parser.add_argument('--inference-workers', type=int, default=1, help="Çıkarım işçisi sayısı")
+    pipeline_parser.add_argument('--recognition-batch', type=int, default=0,
+                                 help="Toplu ArcFace batch boyutu (0 = sadece yüz başına tanıma)")
+
+    service_parser = subparsers.add_parser('service', help="Embedding servisi yük testi")
+    service_parser.add_argument('folder', help="Yüz resimleri klasörü")
+    service_parser.add_argument('--url', default='http://127.0.0.1:8765/extract', help="Servis adresi")
+    service_parser.add_argument('--requests', type=int, default=200, help="Toplam istek sayısı")
+    service_parser.add_argument('--concurrency', type=int, default=8, help="Eşzamanlı istemci sayısı")
+    service_parser.add_argument('--spawn-requests', type=int, default=5,
+                                help="Süreç/istek yaklaşımıyla ölçülecek istek sayısı (0 = atla)")
+
+    ann_parser = subparsers.add_parser('ann', help="ANN indeksi gecikme ve recall karşılaştırması")
+    ann_parser.add_argument('--sizes', type=parse_worker_list, default=[10000, 50000, 200000],
+                            help="Denenecek model boyutları (virgülle ayrılmış yüz sayıları)")
+    ann_parser.add_argument('--queries', type=int, default=100, help="Boyut başına sorgu sayısı")
+    ann_parser.add_argument('--top-k', type=int, default=10, help="Sorgu başına sonuç sayısı")
+
+    decode_parser = subparsers.add_parser('decode', help="Küçültülmüş çözme hız/bellek ve embedding doğruluğu")
+    decode_parser.add_argument('folder', help="Resim klasörü (tercihen yüksek çözünürlüklü fotoğraflar)")
+    decode_parser.add_argument('--limit', type=int, default=50, help="Kullanılacak en fazla resim sayısı")
+    decode_parser.add_argument('--max-side', type=int, default=DEFAULT_DETECT_MAX_SIDE,
+                               help="Tespit görüntüsünün uzun kenarı")
+    decode_parser.add_argument('--skip-embeddings', action='store_true',
+                               help="Sadece çözme süresi/belleğini ölç (model yüklenmez)")
+
+    suite_parser = subparsers.add_parser('suite', help="Sentetik korpusla eğitim/depolama/eşleştirme ölçüm paketi")
+    suite_parser.add_argument('--sizes', type=parse_worker_list, default=[1000, 10000, 100000],
+                              help="Sentetik korpus boyutları (virgülle ayrılmış resim sayıları)")
+    suite_parser.add_argument('--folder', help="Sentetik korpus yerine bu klasördeki resimleri kullan")
+    suite_parser.add_argument('--corpus-dir', default='benchmark_corpus',
+                              help="Sentetik korpusların üretildiği/yeniden kullanıldığı klasör")
+    suite_parser.add_argument('--seed', type=int, default=0, help="Korpus ve stub modeller için tohum")
+    suite_parser.add_argument('--stub', action='store_true',
+                              help="Model ağırlığı olmadan stub dedektör/tanıyıcı kullan (çevrimdışı, CPU)")
+    suite_parser.add_argument('--decode-workers', type=int, default=None, help="Çözme işçisi sayısı")
+    suite_parser.add_argument('--inference-workers', type=int, default=1, help="Çıkarım işçisi sayısı")
+    suite_parser.add_argument('--processes', type=int, default=0,
+                              help="Çok süreçli eğitim: işçi süreç sayısı (0 = tek süreçli pipeline)")
+    suite_parser.add_argument('--recognition-batch', type=int, default=DEFAULT_RECOGNITION_BATCH,
+                              help="Toplu ArcFace batch boyutu (0 = yüz başına tanıma)")
+    suite_parser.add_argument('--max-side', type=int, default=0,
+                              help="Küçültülmüş çözme için tespit görüntüsünün uzun kenarı (0 = kapalı)")
+    suite_parser.add_argument('--queries', type=int, default=200, help="Eşleştirme ölçümündeki sorgu sayısı")
+    suite_parser.add_argument('--top-k', type=int, default=10, help="Sorgu başına sonuç sayısı")
+    suite_parser.add_argument('--output', default='benchmark_results.json', help="Sonuç JSON dosyası")
+    suite_parser.add_argument('--baseline', help="Karşılaştırılacak önceki sonuç JSON dosyası")
+    suite_parser.add_argument('--tolerance', type=float, default=0.1,
+                              help="Gerileme sayılacak en küçük kötüleşme oranı (0.1 = %%10)")
+    suite_parser.add_argument('--fail-on-regression', action='store_true',
+                              help="Gerileme bulunursa 1 çıkış koduyla bitir")
+    suite_parser.add_argument('--work-dir', help="Model/ara depo çalışma klasörü (varsayılan: geçici, silinir)")
+
+    processes_parser = subparsers.add_parser('processes', help="Çok süreçli eğitimin süreç sayısına göre ölçeklenmesi")
+    processes_parser.add_argument('folder', nargs='?', help="Resim klasörü (verilmezse sentetik korpus)")
+    processes_parser.add_argument('--synthetic', type=int, default=1000, help="Sentetik korpus boyutu (resim)")
+    processes_parser.add_argument('--corpus-dir', default='benchmark_corpus',
+                                  help="Sentetik korpusun üretildiği/yeniden kullanıldığı klasör")
+    processes_parser.add_argument('--seed', type=int, default=0, help="Korpus ve stub modeller için tohum")
+    processes_parser.add_argument('--stub', action='store_true',
+                                  help="Model ağırlığı olmadan stub dedektör/tanıyıcı kullan (çevrimdışı, CPU)")
+    processes_parser.add_argument('--processes', type=parse_worker_list,
+                                  default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                                  help="Denenecek süreç sayıları (virgülle ayrılmış)")
+    processes_parser.add_argument('--threads-per-process', type=int, default=None,
+                                  help="Süreç başına ONNX Runtime thread sayısı (varsayılan: çekirdek / süreç)")
+    processes_parser.add_argument('--decode-workers', type=int, default=None, help="Çözme işçisi sayısı")
+    processes_parser.add_argument('--inference-workers', type=int, default=1, help="Çıkarım işçisi sayısı")
+    processes_parser.add_argument('--recognition-batch', type=int, default=DEFAULT_RECOGNITION_BATCH,
+                                  help="Toplu ArcFace batch boyutu (0 = yüz başına tanıma)")
+    processes_parser.add_argument('--max-side', type=int, default=0,
+                                  help="Küçültülmüş çözme için tespit görüntüsünün uzun kenarı (0 = kapalı)")
+    processes_parser.add_argument('--output', help="Sonuç JSON dosyası")
+
+    args = parser.parse_args()
+    if args.command == 'processes':
+        return run_processes_benchmark(args)
+    if args.command == 'service':
+        return run_service_benchmark(args)
+    if args.command == 'ann':
+        return run_ann_benchmark(args)
+    if args.command == 'decode':
+        return run_decode_benchmark(args)
+    if args.command == 'suite':
+        return run_suite_benchmark(args)
+    return run_pipeline_benchmark(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+♻️ Buffalo-L Embedding Önbelleği
+Modeller arasında paylaşılan, resim içerik özetine (SHA-1) göre anahtarlanmış
+kalıcı yüz önbelleği. Aynı fotoğraf başka bir modele tekrar girdiğinde çözme ve
+çıkarım atlanır; sadece önbellekten okunur.
+
+Anahtar = içerik özeti + ad alanı (model paketi, tespit boyutu/eşiği, kalite
+filtresi eşikleri, format sürümü); ayarlar değişirse eski kayıtlar kullanılmaz. Depo SQLite dosyasıdır,
+toplam boyut sınırı aşıldığında en uzun süre kullanılmayan kayıtlar silinir.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+CACHE_DIR = "embedding_cache"
+CACHE_FILE = "embeddings.sqlite"
+CACHE_VERSION = 1
+DEFAULT_CACHE_SIZE_MB = 2048
+
+# Satır düzeni: bbox(4) + kps(10) + det_score(1) + embedding(D)
+_BBOX = slice(0, 4)
+_KPS = slice(4, 14)
+_SCORE = 14
+_EMBEDDING = 15
+
+
+def cache_namespace(face_app, detect_max_side=0, quality=None):
+    """Önbellek ad alanı: model paketi ve tespit ayarları (küçültülmüş çözme ve kalite filtresi dahil)"""
+    model_pack = os.path.basename(str(getattr(face_app, 'model_dir', '') or '')) or 'buffalo_l'
+    det_model = getattr(face_app, 'det_model', None)
+    det_size = getattr(det_model, 'input_size', None) or getattr(face_app, 'det_size', None)
+    det_size = 'x'.join(str(v) for v in det_size) if det_size else 'default'
+    det_thresh = getattr(det_model, 'det_thresh', None)
+    namespace = f"v{CACHE_VERSION}|{model_pack}|det{det_size}|th{det_thresh}"
+    if detect_max_side:
+        namespace += f"|reduced{detect_max_side}"
+    if quality is not None:
+        namespace += f"|{quality.namespace}"
+    return namespace
+
+
+def pack_faces(faces):
+    """Face listesini (bbox, kps, skor, ham embedding) float32 blob'a çevir"""
+    if not faces:
+        return b''
+    rows = []
+    for face in faces:
+        embedding = np.asarray(face.embedding, dtype=np.float32).ravel()
+        row = np.full(_EMBEDDING + len(embedding), np.nan, dtype=np.float32)
+        row[_BBOX] = face.bbox
+        if face.kps is not None:
+            row[_KPS] = np.asarray(face.kps, dtype=np.float32).ravel()
+        row[_SCORE] = face.det_score if face.det_score is not None else np.nan
+        row[_EMBEDDING:] = embedding
+        rows.append(row)
+    return np.stack(rows).astype('<f4').tobytes()
+
+
+def unpack_faces(blob, dim=512):
+    """pack_faces çıktısından insightface Face listesi oluştur"""
+    from insightface.app.common import Face
+
+    matrix = np.frombuffer(blob, dtype='<f4').reshape(-1, _EMBEDDING + dim)
+    faces = []
+    for row in matrix:
+        kps = None if np.isnan(row[_KPS]).all() else row[_KPS].reshape(5, 2).copy()
+        score = None if np.isnan(row[_SCORE]) else np.float32(row[_SCORE])
+        faces.append(Face(bbox=row[_BBOX].copy(), kps=kps, det_score=score, embedding=row[_EMBEDDING:].copy()))
+    return faces
+
+
+class EmbeddingCache:
+    """SQLite tabanlı, boyut sınırlı LRU yüz önbelleği (thread-safe)
+
+    readonly=True sadece okur (çok süreçli eğitimin işçi süreçleri): get
+    last_used güncellemez, put/commit etkisizdir; kullanım kaydı ana süreçte
+    record_lookup ile tutulur.
+    """
+
+    def __init__(self, namespace, cache_dir=CACHE_DIR, max_bytes=DEFAULT_CACHE_SIZE_MB << 20,
+                 commit_every=64, dim=512, readonly=False):
+        self.namespace = namespace
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.commit_every = commit_every
+        self.dim = dim
+        self.readonly = readonly
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        path = os.path.join(cache_dir, CACHE_FILE)
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30, check_same_thread=False)
+            self._total_bytes = 0
+            return
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS faces ("
+            "namespace TEXT NOT NULL, sha1 TEXT NOT NULL, data BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (namespace, sha1))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS faces_last_used ON faces (last_used)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM faces").fetchone()[0]
+
+    @classmethod
+    def for_face_app(cls, face_app, detect_max_side=0, quality=None, **kwargs):
+        return cls(cache_namespace(face_app, detect_max_side, quality), **kwargs)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def get(self, sha1):
+        """Önbellekteki Face listesi (yüzsüz resimde boş liste); yoksa None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM faces WHERE namespace = ? AND sha1 = ?", (self.namespace, sha1)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if not self.readonly:
+                self._touch(sha1)
+        return unpack_faces(row[0], self.dim)
+
+    def record_lookup(self, sha1, hit):
+        """Başka süreçte yapılmış bir sorgunun sonucunu işle (isabet: last_used güncellenir)"""
+        with self._lock:
+            if not hit:
+                self.misses += 1
+                return
+            self.hits += 1
+            self._touch(sha1)
+
+    def put(self, sha1, faces):
+        """Resmin tespit/embedding sonucunu kaydet"""
+        if self.readonly:
+            return
+        blob = pack_faces(faces)
+        size = len(blob) + len(sha1) + len(self.namespace)
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM faces WHERE namespace = ? AND sha1 = ?", (self.namespace, sha1)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO faces (namespace, sha1, data, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, sha1, blob, size, time.time())
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._after_write()
+
+    def commit(self):
+        """Bekleyen yazmaları kaydet ve gerekirse boyut sınırına kadar boşalt"""
+        if self.readonly:
+            return
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        with self._lock:
+            if not self.readonly:
+                self._commit()
+            self._conn.close()
+
+    def _touch(self, sha1):
+        self._conn.execute(
+            "UPDATE faces SET last_used = ? WHERE namespace = ? AND sha1 = ?", (time.time(), self.namespace, sha1)
+        )
+        self._after_write()
+
+    def _after_write(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self._commit()
+
+    def _commit(self):
+        if self._total_bytes > self.max_bytes:
+            self._evict(int(self.max_bytes * 0.9))
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def _evict(self, target_bytes):
+        """En uzun süre kullanılmayan kayıtları (tüm ad alanlarında) sil"""
+        cursor = self._conn.execute("SELECT namespace, sha1, size FROM faces ORDER BY last_used")
+        doomed = []
+        for namespace, sha1, size in cursor:
+            if self._total_bytes <= target_bytes:
+                break
+            doomed.append((namespace, sha1))
+            self._total_bytes -= size
+        cursor.close()
+        self._conn.executemany("DELETE FROM faces WHERE namespace = ? AND sha1 = ?", doomed)
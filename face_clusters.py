@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+🧩 Buffalo-L Kimlik Kümeleri
+face_database her yüz geçişini ayrı bir kayıt olarak tutar; 3.000 fotoğrafta
+görünen bir kişi 3.000 ayrı karşılaştırma demektir. Eğitim sonrası isteğe bağlı
+bu aşama embedding'leri kişi kümelerine ayırır ve küme başına bir merkez +
+üye listesi saklar. Eşleştirme önce merkezleri skorlar, sadece eşiği geçen
+kümelerin üyelerini tam skorlar.
+
+Kümeleme saf NumPy ile artımlı merkez kümelemesidir: yüzler bloklar halinde
+mevcut merkezlerle karşılaştırılır, similarity eşiğini geçen en yakın kümeye
+katılır; kalanlar blok içinde yeni kümeler açar. Ardından eşiği geçen merkezler
+birleştirilir (aglomeratif adım) ve birkaç k-means turuyla üyeler en yakın
+merkeze yeniden atanır. Maliyet yüz sayısı × küme sayısıyla büyür. Yanlış
+birleşen kümeler sadece hızı etkiler: açılan kümelerin üyeleri her zaman tek
+tek skorlanır.
+
+Sorguda bir küme merkez benzerliği (eşik - margin) değerini geçerse açılır.
+Merkez üyelerin ortalaması olduğundan aynı kişinin probe'u merkeze genellikle
+tek tek yüzlerden daha benzerdir; margin küme kenarındaki yüzler için paydır.
+Eğitimde gürültülü sorgularla tam aramaya göre recall ölçülür (model_info).
+
+Dosyalar: face_clusters.bin (K x D float32 merkezler) ve face_clusters.json
+(üye listeleri, depo satır numaraları; face_index.json sırasıyla).
+"""
+import json
+import os
+
+import numpy as np
+
+from face_store import write_json_atomic
+
+CLUSTERS_FILE = "face_clusters.json"
+CENTROIDS_FILE = "face_clusters.bin"
+CLUSTERS_VERSION = 1
+DEFAULT_CLUSTER_SIMILARITY = 0.4  # Yüzün kümeye katılması için merkeze en düşük cosine benzerliği
+DEFAULT_CLUSTER_MARGIN = 0.1      # Sorguda küme açma eşiği: eşleştirme eşiği - margin
+DEFAULT_QUERY_THRESHOLD = 0.3     # Recall ölçümünde kullanılan eşleştirme eşiği (sunucu varsayılanı)
+MIN_PROBE_CLUSTERS = 8            # Eşiksiz (top-k) sorguda açılan en az küme sayısı
+MIN_CLUSTER_FACES = 100           # Bunun altında tam arama zaten yeterince hızlı
+
+
+def _normalized(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _compact(labels):
+    """Boş kümeleri at, etiketleri 0..K-1 aralığına sıkıştır"""
+    _, compacted = np.unique(labels, return_inverse=True)
+    return compacted.astype(np.int64)
+
+
+def _sums(matrix, labels, clusters):
+    sums = np.zeros((clusters, matrix.shape[1]), dtype=np.float32)
+    np.add.at(sums, labels, matrix)
+    return sums
+
+
+def _best_centroids(matrix, centroids, block=4096):
+    """Her satır için (en yakın merkez, benzerlik)"""
+    best = np.empty(len(matrix), dtype=np.int64)
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), block):
+        chunk = matrix[start:start + block] @ centroids.T
+        best[start:start + block] = np.argmax(chunk, axis=1)
+        scores[start:start + block] = chunk[np.arange(len(chunk)), best[start:start + block]]
+    return best, scores
+
+
+def _refine(matrix, labels, similarity, block=4096):
+    """Bir k-means turu: yüzü kendi kümesinden (kendisi hariç merkez) daha benzer bir kümeye taşı
+
+    Kendi kümesiyle karşılaştırmada yüzün kendi katkısı çıkarılır; yoksa tek
+    üyeli kümeler (benzerlik 1) hiç taşınmaz.
+    """
+    sums = _sums(matrix, labels, int(labels.max()) + 1)
+    norms = np.linalg.norm(sums, axis=1)
+    centroids = _normalized(sums)
+    moved = labels.copy()
+    for start in range(0, len(matrix), block):
+        scores = matrix[start:start + block] @ centroids.T
+        rows = np.arange(len(scores))
+        own = labels[start:start + block]
+        own_dot = scores[rows, own] * norms[own]  # toplam·yüz
+        rest_norm = np.sqrt(np.maximum(norms[own] ** 2 - 2 * own_dot + 1.0, 0.0))
+        own_score = np.where(rest_norm > 1e-3, (own_dot - 1.0) / np.maximum(rest_norm, 1e-3), -np.inf)
+        scores[rows, own] = -np.inf
+        best = np.argmax(scores, axis=1)
+        best_score = scores[rows, best]
+        move = (best_score >= similarity) & (best_score > own_score)
+        moved[start:start + block] = np.where(move, best, own)
+    return _compact(moved)
+
+
+def _merge_centroids(centroids, similarity, block=4096):
+    """Birbirine eşik kadar benzeyen merkezleri birleştir: eski küme -> yeni küme"""
+    parent = np.arange(len(centroids))
+
+    def root(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for start in range(0, len(centroids), block):
+        scores = centroids[start:start + block] @ centroids.T
+        rows, columns = np.nonzero(scores >= similarity)
+        for row, column in zip((rows + start).tolist(), columns.tolist()):
+            if row < column:
+                a, b = root(row), root(column)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+    return _compact(np.array([root(node) for node in range(len(centroids))]))
+
+
+def cluster_embeddings(embeddings, similarity=DEFAULT_CLUSTER_SIMILARITY, iterations=2, block=1024):
+    """Embedding satırlarını kişi kümelerine ayır; (N,) küme etiketi döndür"""
+    matrix = _normalized(embeddings)
+    count = len(matrix)
+    labels = np.empty(count, dtype=np.int64)
+    if count == 0:
+        return labels
+
+    sums = np.zeros((min(count, block), matrix.shape[1]), dtype=np.float32)
+    centroids = sums[:0]
+    clusters = 0
+    for start in range(0, count, block):
+        chunk = matrix[start:start + block]
+        chunk_labels = np.full(len(chunk), -1, dtype=np.int64)
+        if clusters:
+            best, scores = _best_centroids(chunk, centroids)
+            joined = scores >= similarity
+            chunk_labels[joined] = best[joined]
+
+        # Blok içi lider kümeleme: kalan ilk yüz yeni küme açar, ona yeterince benzeyen kalanlar katılır
+        pending = np.flatnonzero(chunk_labels < 0)
+        if len(pending):
+            local = chunk[pending] @ chunk[pending].T
+            free = np.ones(len(pending), dtype=bool)
+            for position in range(len(pending)):
+                if not free[position]:
+                    continue
+                members = free & (local[position] >= similarity)
+                chunk_labels[pending[members]] = clusters
+                free &= ~members
+                clusters += 1
+
+        if clusters > len(sums):
+            sums = np.concatenate([sums, np.zeros((max(clusters, 2 * len(sums)) - len(sums), sums.shape[1]),
+                                                  dtype=np.float32)])
+        np.add.at(sums, chunk_labels, chunk)
+        labels[start:start + len(chunk)] = chunk_labels
+        centroids = _normalized(sums[:clusters])
+
+    # Aglomeratif adım: aynı kişinin farklı bloklarda açılmış kümelerini birleştir
+    labels = _merge_centroids(centroids, similarity)[labels]
+    for _ in range(iterations):
+        labels = _refine(matrix, labels, similarity)
+    return labels
+
+
+class FaceClusters:
+    """Küme merkezleri ve üye listeleri (depo satır numaraları)"""
+
+    def __init__(self, centroids, members, count, similarity=DEFAULT_CLUSTER_SIMILARITY,
+                 margin=DEFAULT_CLUSTER_MARGIN):
+        self.centroids = centroids  # (K, D) birim norm
+        self.members = members      # K adet int64 satır dizisi
+        self.count = count
+        self.similarity = similarity
+        self.margin = margin
+        self.sizes = np.array([len(rows) for rows in members], dtype=np.int64)
+        self.labels = np.empty(count, dtype=np.int64)  # satır -> küme
+        for cluster, rows in enumerate(members):
+            self.labels[rows] = cluster
+
+    def __len__(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings, similarity=DEFAULT_CLUSTER_SIMILARITY, margin=DEFAULT_CLUSTER_MARGIN):
+        """Embedding matrisinden kümeleri oluştur"""
+        labels = cluster_embeddings(embeddings, similarity=similarity)
+        clusters = int(labels.max()) + 1 if len(labels) else 0
+        order = np.argsort(labels, kind='stable')
+        offsets = np.zeros(clusters + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(labels, minlength=clusters))
+        members = [order[offsets[cluster]:offsets[cluster + 1]] for cluster in range(clusters)]
+        centroids = _normalized(_sums(_normalized(embeddings), labels, clusters))
+        return cls(centroids, members, len(labels), similarity=similarity, margin=margin)
+
+    def candidates(self, probe, threshold=None, top_k=None):
+        """Tek (normalize) probe için açılan kümelerin satır numaraları
+
+        threshold verilirse merkez benzerliği (eşik - margin) olan kümeler açılır;
+        sadece top_k verilirse en yakın kümeler en az top_k yüz toplanana kadar
+        (en az MIN_PROBE_CLUSTERS küme) açılır.
+        """
+        scores = self.centroids @ probe
+        if threshold is not None:
+            selected = np.flatnonzero(scores >= threshold - self.margin)
+        else:
+            order = np.argsort(-scores, kind='stable')
+            enough = np.searchsorted(np.cumsum(self.sizes[order]), top_k or 0) + 1
+            selected = order[:max(enough, MIN_PROBE_CLUSTERS)]
+        if not len(selected):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.members[cluster] for cluster in selected])
+
+    def save(self, model_dir):
+        """Merkezleri ve üye listelerini yaz; dosya adlarını döndür"""
+        temp_path = os.path.join(model_dir, CENTROIDS_FILE + ".tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(self.centroids, dtype='<f4').tobytes())
+        os.replace(temp_path, os.path.join(model_dir, CENTROIDS_FILE))
+        write_json_atomic(os.path.join(model_dir, CLUSTERS_FILE), {
+            "version": CLUSTERS_VERSION,
+            "count": self.count,
+            "clusters": len(self),
+            "dim": int(self.centroids.shape[1]) if len(self) else 0,
+            "similarity": self.similarity,
+            "margin": self.margin,
+            "members": [rows.tolist() for rows in self.members]
+        })
+        return [CLUSTERS_FILE, CENTROIDS_FILE]
+
+
+def remove_face_clusters(model_dir):
+    """Eski küme dosyalarını sil (yeni depoyla uyuşmazlar)"""
+    for name in (CLUSTERS_FILE, CENTROIDS_FILE):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def load_face_clusters(model_dir, expected_count=None):
+    """Model klasöründeki kümeleri yükle; yoksa ya da güncel değilse None"""
+    index_path = os.path.join(model_dir, CLUSTERS_FILE)
+    centroids_path = os.path.join(model_dir, CENTROIDS_FILE)
+    if not os.path.exists(index_path) or not os.path.exists(centroids_path):
+        return None
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != CLUSTERS_VERSION:
+        return None
+    if expected_count is not None and index['count'] != expected_count:
+        return None
+
+    centroids = np.fromfile(centroids_path, dtype='<f4')
+    if centroids.size != index['clusters'] * index['dim']:
+        return None
+    members = [np.asarray(rows, dtype=np.int64) for rows in index['members']]
+    return FaceClusters(centroids.reshape(index['clusters'], index['dim']), members, index['count'],
+                        similarity=index['similarity'], margin=index['margin'])
+
+
+def evaluate_cluster_recall(embeddings, clusters, threshold=DEFAULT_QUERY_THRESHOLD, queries=200, noise=0.03,
+                            seed=0):
+    """Kayıtlı yüzlerin gürültülü kopyalarıyla eşik sorgusunda tam aramaya karşı (recall, taranan yüz oranı)"""
+    rng = np.random.default_rng(seed)
+    matrix = _normalized(embeddings)
+    rows = rng.choice(len(matrix), min(queries, len(matrix)), replace=False)
+    probes = _normalized(matrix[rows] + rng.normal(0, noise, (len(rows), matrix.shape[1])).astype(np.float32))
+
+    expected = found = scanned = 0
+    for probe in probes:
+        exact = np.flatnonzero(matrix @ probe >= threshold)
+        candidates = clusters.candidates(probe, threshold=threshold)
+        expected += len(exact)
+        found += len(np.intersect1d(exact, candidates))
+        scanned += len(candidates)
+    recall = found / float(expected) if expected else 1.0
+    return recall, scanned / float(len(matrix) * len(probes))
+
+
+def build_model_clusters(model_dir, embeddings, similarity=DEFAULT_CLUSTER_SIMILARITY, margin=DEFAULT_CLUSTER_MARGIN,
+                         threshold=DEFAULT_QUERY_THRESHOLD):
+    """Eğitim sonunda kümeleri oluştur, kaydet; model_info için özet döndür"""
+    clusters = FaceClusters.build(embeddings, similarity=similarity, margin=margin)
+    files = clusters.save(model_dir)
+    recall, scanned = evaluate_cluster_recall(embeddings, clusters, threshold=threshold)
+    return {
+        "files": files,
+        "clusters": len(clusters),
+        "singletons": int((clusters.sizes == 1).sum()),
+        "largest": int(clusters.sizes.max()) if len(clusters) else 0,
+        "similarity": similarity,
+        "margin": margin,
+        "query_threshold": threshold,
+        "recall": round(recall, 4),
+        "scanned_share": round(scanned, 4)
+    }
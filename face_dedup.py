@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+🔁 Buffalo-L Yinelenen Fotoğraf Ayıklama
+Kamp fotoğraf arşivlerinde aynı resmin yeniden dışa aktarılmış/küçültülmüş
+kopyaları ve seri çekimler çoktur. Eğitim bunları ayrı ayrı gömerse veritabanı
+büyür, eşleştirme yavaşlar.
+
+- DuplicateFilter: resimler çıkarımdan önce içerik özeti (birebir kopya) ve
+  isteğe bağlı parmak izi (neredeyse aynı resim) ile yüz vektörü üretmiş asıl
+  resimlerle karşılaştırılır; kopya resim gömülmez, manifestte asıl resmin takma
+  adı (duplicate_of) olur. Asıl resim tarama sırasında ilk gelen resimdir; asıl
+  resim okunamaz ya da yüzsüzse kopyası kendi başına işlenir. Parmak izi 64 bit
+  fark özeti (dHash) ve 8x8 gri küçük resimdir: dHash sadece parlaklık yönlerine
+  bakar, aynı kompozisyonda farklı renk/ışıktaki resimleri küçük resim ayırır.
+  Hamming uzaklığı araması bant indeksiyle yapılır (max_distance+1 banttan
+  en az biri birebir eşleşir), resim sayısıyla doğrusal büyümez. Farklı
+  fotoğrafları birleştirebildiği için neredeyse aynı resim araması varsayılan
+  olarak kapalıdır; birebir kopya ayıklama varsayılan olarak açıktır.
+- FaceGroupDeduplicator: aynı klasördeki ardışık dosyalarda neredeyse aynı
+  yüz embedding'leri (seri çekim) tek vektörde birleştirilir; birleşen yüzün
+  dosyası tutulan yüzün takma adı olur (face_aliases).
+
+Takma adlar models/<ad>/face_aliases.json dosyasına {yüz_anahtarı: [fotoğraflar]}
+olarak yazılır; eşleştirici bir yüz eşleştiğinde takma ad fotoğraflarını da
+döndürür, böylece eşleşme kapsamı korunur.
+"""
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+HASH_BITS = 64
+DEFAULT_MAX_DISTANCE = 3         # Yeniden sıkıştırma/küçültme 0-2 bit fark üretir; seri çekimler daha uzak
+MAX_DISTANCE_LIMIT = 10          # Daha gevşek eşik farklı fotoğrafları birleştirir (ve bantlar çok küçülür)
+DEFAULT_MAX_THUMB_DIFF = 6.0     # 8x8 gri küçük resimde en büyük ortalama mutlak fark (0-255)
+MIN_THUMB_CONTRAST = 2.0         # Daha düz küçük resimde (gürültü, karanlık kare) dHash bitleri rastgeledir
+DEFAULT_FACE_SIMILARITY = 0.95   # Yüz birleştirme cosine eşiği (farklı kişiler ~0.5 altında kalır)
+DEFAULT_FACE_WINDOW = 8          # Yüzlerin karşılaştırıldığı önceki dosya sayısı (aynı klasörde)
+
+
+def image_fingerprint(gray):
+    """(64 bit fark özeti, 8x8 gri küçük resim baytları)"""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    thumb = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big'), thumb.tobytes()
+
+
+def fingerprint_from_bytes(data):
+    """Ham dosyadan parmak izi; okunamazsa ya da küçük resim düzse None (sadece birebir kopya aranır)
+
+    Her zaman 1/8 ölçekli gri çözmeden hesaplanır (JPEG'de DCT aşamasında
+    küçültülür, tam çözmenin ~%10'u). Tam çözülmüş resimden hesaplamak önbellekten
+    gelen (çözülmemiş) resimlerle birkaç bit fark üretir ve eşiği bozar.
+    """
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None or gray.size == 0:
+        return None
+    fingerprint = image_fingerprint(gray)
+    if np.frombuffer(fingerprint[1], dtype=np.uint8).std() < MIN_THUMB_CONTRAST:
+        return None
+    return fingerprint
+
+
+def format_fingerprint(fingerprint):
+    """Manifest için onaltılık metin: 16 hane dHash + 128 hane küçük resim"""
+    hash_value, thumb = fingerprint
+    return f"{hash_value:016x}{thumb.hex()}"
+
+
+def parse_fingerprint(text):
+    try:
+        return int(text[:16], 16), bytes.fromhex(text[16:])
+    except (TypeError, ValueError):
+        return None
+
+
+class DuplicateFilter:
+    """Birebir ve (max_distance verilirse) neredeyse aynı resimleri bulan thread-safe kayıt
+
+    Sadece yüz vektörü üreten asıl resimler kaydedilir (register, dosya sırasıyla);
+    kopya resim her zaman kayıtlı bir asıl resme bağlanır (zincir oluşmaz). Birden
+    fazla asıl resim eşleşirse en önce kaydedilen seçilir, sonuç thread zamanlamasına
+    bağlı değildir. max_distance=None ise sadece içerik özeti karşılaştırılır.
+    """
+
+    def __init__(self, max_distance=None, max_thumb_diff=DEFAULT_MAX_THUMB_DIFF):
+        self.max_distance = None if max_distance is None else min(max(0, max_distance), MAX_DISTANCE_LIMIT)
+        self.max_thumb_diff = max_thumb_diff
+        self._bands = []  # (kaydırma, maske)
+        if self.max_distance is not None:
+            bands = self.max_distance + 1
+            width, extra = divmod(HASH_BITS, bands)
+            shift = 0
+            for band in range(bands):
+                bits = width + (1 if band < extra else 0)
+                self._bands.append((shift, (1 << bits) - 1))
+                shift += bits
+        self._buckets = [{} for _ in self._bands]  # bant değeri -> [(sıra, özet, küçük resim, yol)]
+        self._originals = set()
+        self._contents = {}  # içerik özeti -> yol
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._originals)
+
+    @property
+    def near_duplicates(self):
+        """Parmak izi (dHash) karşılaştırması açık mı"""
+        return self.max_distance is not None
+
+    def find(self, content_hash, fingerprint=None):
+        """Aynı içerikte ya da neredeyse aynı kayıtlı asıl resim; yoksa None"""
+        with self._lock:
+            original = self._contents.get(content_hash) if content_hash else None
+            if original is None and fingerprint is not None and self._bands:
+                original = self._earliest(*fingerprint)
+            return original
+
+    def register(self, file_path, fingerprint, content_hash=None):
+        """Yüz vektörü üreten resmi asıl resim olarak kaydet"""
+        with self._lock:
+            if file_path in self._originals:
+                return
+            order = len(self._originals)
+            self._originals.add(file_path)
+            if content_hash:
+                self._contents.setdefault(content_hash, file_path)
+            if fingerprint is not None and self._bands:
+                value, thumb = fingerprint
+                for bucket, (shift, mask) in zip(self._buckets, self._bands):
+                    bucket.setdefault((value >> shift) & mask, []).append((order, value, thumb, file_path))
+
+    def _earliest(self, value, thumb):
+        best = None
+        pixels = np.frombuffer(thumb, dtype=np.uint8).astype(np.int16)
+        for bucket, (shift, mask) in zip(self._buckets, self._bands):
+            for order, candidate, candidate_thumb, candidate_path in bucket.get((value >> shift) & mask, ()):
+                if (best is not None and order >= best[0]) or (value ^ candidate).bit_count() > self.max_distance:
+                    continue
+                candidate_pixels = np.frombuffer(candidate_thumb, dtype=np.uint8).astype(np.int16)
+                if len(candidate_pixels) == len(pixels) and \
+                        np.abs(candidate_pixels - pixels).mean() <= self.max_thumb_diff:
+                    best = (order, candidate_path)
+        return best[1] if best is not None else None
+
+
+class FaceGroupDeduplicator:
+    """Aynı klasördeki son window dosyanın tutulan yüzleriyle neredeyse aynı yüzleri bul
+
+    Klasör değişince pencere sıfırlanır. Birleşen yüzler pencereye eklenmez;
+    her kümeyi ilk tutulan yüz temsil eder.
+    """
+
+    def __init__(self, similarity=DEFAULT_FACE_SIMILARITY, window=DEFAULT_FACE_WINDOW):
+        self.similarity = similarity
+        self._files = deque(maxlen=max(1, window))  # [(anahtarlar, (k, D) normalize matris)]
+        self._group = None
+
+    def match(self, group, embeddings):
+        """Her yüz için birleşeceği tutulan yüz anahtarı ya da None (normalize embedding listesi)"""
+        if group != self._group:
+            self._group = group
+            self._files.clear()
+        matches = [None] * len(embeddings)
+        if not self._files or not embeddings:
+            return matches
+
+        keys = [key for file_keys, _ in self._files for key in file_keys]
+        kept = np.concatenate([matrix for _, matrix in self._files])
+        scores = np.asarray(embeddings, dtype=np.float32) @ kept.T
+        used = set()
+        # En benzer çiftten başla; bir tutulan yüze dosya başına en fazla bir yüz bağlanır
+        for flat in np.argsort(-scores, axis=None):
+            face, column = divmod(int(flat), len(keys))
+            if scores[face, column] < self.similarity:
+                break
+            if matches[face] is None and column not in used:
+                matches[face] = keys[column]
+                used.add(column)
+        return matches
+
+    def add(self, keys, embeddings):
+        """Dosyanın tutulan yüzlerini pencereye ekle"""
+        if not keys:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(keys), -1)
+        self._files.append((list(keys), matrix))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+📝 Buffalo-L Eğitim Günlüğü Tamponu
+Worker thread'inden gelen günlük satırlarını ve ilerleme bilgisini thread-safe
+biriktirir; arayüz bunları bir zamanlayıcıyla toplu halde çeker. Böylece her
+resim için ayrı sinyal, metin ekleme ve yeniden çizim yapılmaz; worker arayüzü
+beklemez.
+
+Bekleyen satırlar halka tampondadır (en fazla history satır): arayüz geride
+kalırsa en eski satırlar atlanır ve sayısı bildirilir. İlerleme için sadece en
+son (mesaj, yüzde) tutulur. İstenirse tüm günlük ayrıca logs/ altına yazılır.
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+LOG_DIR = "logs"
+DEFAULT_LOG_HISTORY = 5000       # Arayüzde ve bekleyen tamponda tutulan en fazla satır
+DEFAULT_FLUSH_INTERVAL_MS = 200  # Arayüzün tamponu boşaltma aralığı
+
+
+def log_file_path(model_name, log_dir=LOG_DIR):
+    """logs/<model_adı>_<tarih_saat>.log"""
+    return os.path.join(log_dir, f"{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+
+
+class LogBuffer:
+    """Thread-safe günlük/ilerleme tamponu (yazan: worker, okuyan: arayüz zamanlayıcısı)"""
+
+    def __init__(self, history=DEFAULT_LOG_HISTORY):
+        self._lock = threading.Lock()
+        self._pending = deque(maxlen=history)
+        self._dropped = 0
+        self._progress = None
+        self._file = None
+        self.file_path = None
+
+    def open_file(self, path):
+        """Bundan sonraki tüm satırları ayrıca dosyaya yaz"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        log_file = open(path, 'a', encoding='utf-8')
+        with self._lock:
+            self._close_file()
+            self._file = log_file
+            self.file_path = path
+
+    def close_file(self):
+        with self._lock:
+            self._close_file()
+
+    def log(self, message):
+        """Günlük satırı ekle (herhangi bir thread'den)"""
+        now = datetime.now()
+        line = f"[{now.strftime('%H:%M:%S')}] {message}"
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(line)
+            if self._file is not None:
+                self._file.write(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
+
+    def progress(self, message, percent):
+        """İlerlemeyi güncelle; arayüz sadece en sonuncusunu gösterir"""
+        with self._lock:
+            self._progress = (message, percent)
+
+    def drain(self):
+        """Bekleyenleri al: (satırlar, atlanan satır sayısı, son ilerleme ya da None)"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+            progress, self._progress = self._progress, None
+            if self._file is not None:
+                self._file.flush()
+        return lines, dropped, progress
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.file_path = None
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+🔎 Buffalo-L Vektörel Yüz Eşleştirici
+Eğitilmiş bir modelin embedding'lerini tek bir normalize NumPy matrisine yükler;
+eşik ve top-k sorgularını tek matris çarpımı + argpartition ile yanıtlar.
+Benzerlik, sunucudaki calculateCosineSimilarity ile aynı cosine tanımıdır
+(sıfır vektörün benzerliği 0); float32 hesaplama farkı ~1e-6 mertebesindedir.
+Model klasöründe ANN indeksi (face_ann_ivf.npz) varsa sorgular sadece en yakın
+kümelerde skorlanır; --exact ile tam aramaya dönülebilir.
+Kimlik kümeleri (face_clusters.json) varsa eşikli sorgularda önce küme
+merkezleri skorlanır, sadece eşiği geçen kişilerin yüzleri açılır; eşleşmeler
+'cluster' alanında kişi kümesini taşır.
+int8 depolarda skorlar doğrudan nicemlenmiş satırlar üzerinde hesaplanır
+(bkz. face_quant); matrisin float32 kopyası tutulmaz.
+Yinelenen fotoğraflar (face_aliases.json) vektör olarak saklanmaz; eşleşen
+yüzün takma ad fotoğrafları sonuçta 'aliases' alanında döner.
+Parçalı modellerde (face_shards.json) her parça ayrı bir FaceMatcher olarak
+iş parçacıklarında paralel yüklenir ve sorgulanır; parça sonuçları birleştirilip
+yeniden sıralanır (NumPy matris çarpımı GIL'i bıraktığı için taramalar
+çekirdeklere dağılır). Eşleşmeler 'shard' alanında parça adını taşır.
+
+Kullanım:
+    python face_matcher.py models/akparti_genclik_2025 probes.json --threshold 0.3 --top-k 50
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from face_ann import load_ann_index
+from face_clusters import load_face_clusters
+from face_quant import EmbeddingMatrix
+from face_store import (
+    INDEX_FILE, SHARDS_FILE, load_embedding_store, load_face_aliases, load_face_database, load_shard_manifest
+)
+
+
+def normalize_rows(matrix):
+    """Satırları L2 normuna böl (sıfır satırlar sıfır kalır)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class FaceMatcher:
+    """Bir modelin tüm yüzleri üzerinde vektörel cosine eşleştirme"""
+
+    def __init__(self, keys, paths, embeddings, probe_block=256, ann_index=None, aliases=None, clusters=None,
+                 scale=None):
+        self.keys = list(keys)
+        self.paths = list(paths)
+        self.aliases = aliases or {}  # yüz anahtarı -> aynı yüzü içeren diğer fotoğraflar
+        self.matrix = EmbeddingMatrix(embeddings, scale)  # normalize float32 ya da int8 (scale ile)
+        self.probe_block = probe_block
+        self.ann_index = ann_index  # IVFIndex ya da None (tam arama)
+        self.clusters = clusters  # FaceClusters ya da None
+
+    @classmethod
+    def from_model(cls, model_dir, **kwargs):
+        """models/<ad>/ klasöründen yükle (binary depo, yoksa face_database.json)
+
+        Parçalı modellerde ShardedFaceMatcher döner (aynı sorgu arayüzü).
+        """
+        if os.path.exists(os.path.join(model_dir, SHARDS_FILE)) and not os.path.exists(
+                os.path.join(model_dir, INDEX_FILE)):
+            return ShardedFaceMatcher.from_model(model_dir, **kwargs)
+        kwargs.setdefault('aliases', load_face_aliases(model_dir))
+        if os.path.exists(os.path.join(model_dir, INDEX_FILE)):
+            store = load_embedding_store(model_dir)
+            kwargs.setdefault('ann_index', load_ann_index(model_dir, expected_count=len(store)))
+            kwargs.setdefault('clusters', load_face_clusters(model_dir, expected_count=len(store)))
+            kwargs.setdefault('scale', store.scale)
+            return cls(store.keys, store.paths, store.embeddings, **kwargs)
+
+        face_database = load_face_database(model_dir)
+        keys = list(face_database.keys())
+        dim = len(face_database[keys[0]]['embedding']) if keys else 512
+        embeddings = np.empty((len(keys), dim), dtype=np.float32)
+        for row, key in enumerate(keys):
+            embeddings[row] = face_database[key]['embedding']
+        return cls(keys, [face_database[key].get('path', '') for key in keys], embeddings, **kwargs)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def dim(self):
+        return self.matrix.dim
+
+    @property
+    def embeddings(self):
+        """(N, D) normalize float32 matris (int8 depoda çözülmüş kopya)"""
+        return self.matrix.to_float32()
+
+    def similarities(self, probes):
+        """(P, N) cosine benzerlik matrisi"""
+        probes = self._prepare_probes(probes)
+        return self.matrix.dot(probes)
+
+    def search(self, probes, threshold=None, top_k=None, exact=False, nprobe=None):
+        """Her probe için eşleşme listesi döndür (benzerliğe göre azalan)
+
+        threshold: sadece benzerliği >= eşik olanlar
+        top_k    : en benzer k sonuç (threshold ile birlikte kullanılabilir)
+        exact    : ANN indeksi/kimlik kümeleri olsa da tüm yüzleri tara
+        nprobe   : ANN sorgusunda taranacak küme sayısı (varsayılan: indeksteki)
+        Kimlik kümeleri eşikli sorgularda (ANN indeksi yoksa her sorguda) kullanılır.
+        Tek bir probe (1-D) verilse de sonuç probe başına liste olarak döner.
+        """
+        probes = self._prepare_probes(probes)
+        if self.clusters is not None and not exact and (threshold is not None or self.ann_index is None):
+            return [self._search_rows(probe, self.clusters.candidates(probe, threshold=threshold, top_k=top_k),
+                                      threshold, top_k) for probe in probes]
+        if self.ann_index is not None and not exact:
+            return [self._search_rows(probe, self.ann_index.candidates(probe, nprobe=nprobe), threshold, top_k)
+                    for probe in probes]
+
+        results = []
+        for start in range(0, len(probes), self.probe_block):
+            scores = self.matrix.dot(probes[start:start + self.probe_block])
+            for row in scores:
+                results.append(self._select(row, threshold, top_k))
+        return results
+
+    def _search_rows(self, probe, rows, threshold, top_k):
+        """Sadece aday satırları (ANN listeleri ya da açılan kimlik kümeleri) skorla"""
+        scores = self.matrix.row_dot(probe, rows)
+        return [self.describe_match(rows[position], scores[position])
+                for position in self._selected_positions(scores, threshold, top_k)]
+
+    def _prepare_probes(self, probes):
+        probes = np.atleast_2d(np.asarray(probes, dtype=np.float32))
+        if probes.shape[1] != self.matrix.dim:
+            raise ValueError(
+                f"Embedding boyutları eşleşmiyor: {probes.shape[1]} vs {self.matrix.dim}"
+            )
+        return normalize_rows(probes)
+
+    def _select(self, scores, threshold, top_k):
+        """Tek probe'un skor satırından eşleşmeleri seç"""
+        return [self.describe_match(index, scores[index])
+                for index in self._selected_positions(scores, threshold, top_k)]
+
+    def _selected_positions(self, scores, threshold, top_k):
+        """Eşik/top-k sonrası skor pozisyonları (azalan benzerlik)"""
+        if top_k is not None and top_k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if top_k is not None and top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        if threshold is not None:
+            candidates = candidates[scores[candidates] >= threshold]
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def describe_match(self, index, score):
+        """Satır için eşleşme sözlüğü: anahtar, fotoğraf, benzerlik (+ takma adlar, kişi kümesi)"""
+        match = {'key': self.keys[index], 'path': self.paths[index], 'similarity': float(score)}
+        aliases = self.aliases.get(self.keys[index])
+        if aliases:
+            match['aliases'] = aliases
+        if self.clusters is not None:
+            match['cluster'] = int(self.clusters.labels[index])
+        return match
+
+
+class ShardedFaceMatcher:
+    """Parçalı model: parça başına bir FaceMatcher; yükleme ve sorgular iş parçacıklarında paralel"""
+
+    def __init__(self, model_dir, workers=None, **kwargs):
+        """kwargs her parçanın FaceMatcher'ına geçer (ann_index=None, clusters=None gibi)"""
+        self.model_dir = model_dir
+        self.matcher_options = kwargs
+        self._reload_aliases = 'aliases' not in kwargs
+        self.names, self.fingerprints, self.matchers = [], [], []
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self.refresh()
+
+    @classmethod
+    def from_model(cls, model_dir, **kwargs):
+        """face_shards.json'daki parçaları paralel yükle"""
+        return cls(model_dir, **kwargs)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def dim(self):
+        return next((matcher.dim for matcher in self.matchers if len(matcher)), 512)
+
+    def refresh(self):
+        """Parça listesini (yeniden) oku; sadece özeti değişen/yeni parçaları yükle, silinenleri bırak
+
+        Yüklenen parça adlarını döndürür.
+        """
+        manifest = load_shard_manifest(self.model_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"Parça listesi bulunamadı: {os.path.join(self.model_dir, SHARDS_FILE)}")
+        current = {name: (matcher, fingerprint)
+                   for name, matcher, fingerprint in zip(self.names, self.matchers, self.fingerprints)}
+        changed = [shard for shard in manifest['shards']
+                   if shard['name'] not in current or current[shard['name']][1] != shard.get('fingerprint')]
+        if changed and self._reload_aliases:
+            # Takma adlar model düzeyinde tutulur; değişen parçalarla birlikte tüm parçalarda yenilenir
+            self.matcher_options['aliases'] = load_face_aliases(self.model_dir)
+            for matcher, _ in current.values():
+                matcher.aliases = self.matcher_options['aliases']
+        loaded = dict(zip((shard['name'] for shard in changed), self._map(self._load_shard, changed)))
+
+        self.names = [shard['name'] for shard in manifest['shards']]
+        self.fingerprints = [shard.get('fingerprint') for shard in manifest['shards']]
+        self.matchers = [loaded[name] if name in loaded else current[name][0] for name in self.names]
+        self.offsets = np.cumsum([0] + [len(matcher) for matcher in self.matchers]).astype(np.int64)
+        return list(loaded)
+
+    def similarities(self, probes):
+        """(P, N) cosine benzerlik matrisi (parça sırasıyla birleştirilmiş)"""
+        parts = list(self._map(lambda matcher: matcher.similarities(probes), self.matchers))
+        return np.concatenate(parts, axis=1) if parts else np.empty((len(np.atleast_2d(probes)), 0), np.float32)
+
+    def search(self, probes, threshold=None, top_k=None, exact=False, nprobe=None):
+        """Her parçayı paralel sorgula; probe başına sonuçları birleştirip yeniden sırala"""
+        probes = np.atleast_2d(np.asarray(probes, dtype=np.float32))
+        shard_results = list(self._map(
+            lambda matcher: matcher.search(probes, threshold=threshold, top_k=top_k, exact=exact, nprobe=nprobe),
+            self.matchers
+        ))
+        results = []
+        for position in range(len(probes)):
+            matches = []
+            for name, per_probe in zip(self.names, shard_results):
+                for match in per_probe[position]:
+                    match['shard'] = name
+                    matches.append(match)
+            matches.sort(key=lambda match: match['similarity'], reverse=True)
+            results.append(matches[:top_k] if top_k is not None else matches)
+        return results
+
+    def parts(self):
+        """(parça eşleştiricisi, genel satır başlangıcı) çiftleri; toplu iş parçaları tek tek tarar"""
+        return list(zip(self.matchers, self.offsets[:-1].tolist()))
+
+    def describe_match(self, index, score):
+        """Genel satır numarası için eşleşme sözlüğü (parça adıyla)"""
+        position = int(np.searchsorted(self.offsets, index, side='right')) - 1
+        match = self.matchers[position].describe_match(int(index - self.offsets[position]), score)
+        match['shard'] = self.names[position]
+        return match
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _load_shard(self, shard):
+        return FaceMatcher.from_model(os.path.join(self.model_dir, shard['dir']), **self.matcher_options)
+
+    def _map(self, function, items):
+        if self._executor is None:
+            return map(function, items)
+        return self._executor.map(function, items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffalo-L vektörel yüz eşleştirme")
+    parser.add_argument('model_dir', help="models/<model_adı> klasörü")
+    parser.add_argument('probes', help="Probe embedding JSON dosyası (tek liste ya da liste listesi, '-' = stdin)")
+    parser.add_argument('--threshold', type=float, default=None, help="Benzerlik eşiği")
+    parser.add_argument('--top-k', type=int, default=None, help="Probe başına en fazla sonuç")
+    parser.add_argument('--exact', action='store_true', help="ANN indeksi/kimlik kümeleri olsa da tam arama yap")
+    parser.add_argument('--nprobe', type=int, default=None, help="ANN sorgusunda taranacak küme sayısı")
+    args = parser.parse_args()
+
+    if args.probes == '-':
+        probes = json.load(sys.stdin)
+    else:
+        with open(args.probes, 'r', encoding='utf-8') as f:
+            probes = json.load(f)
+
+    matcher = FaceMatcher.from_model(args.model_dir)
+    results = matcher.search(probes, threshold=args.threshold, top_k=args.top_k, exact=args.exact, nprobe=args.nprobe)
+    json.dump(results, sys.stdout, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
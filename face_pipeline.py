@@ -0,0 +1,850 @@
+#!/usr/bin/env python3
+"""
+⚙️ Buffalo-L Eğitim Pipeline'ı
+Dosya okuma/çözme (decode) ve yüz tespiti aşamalarını paralel çalıştırır.
+Qt bağımlılığı yoktur; GUI ve yardımcı araçlar tarafından ortak kullanılır.
+"""
+import hashlib
+import os
+import queue
+import threading
+
+import numpy as np
+import cv2
+
+from face_dedup import fingerprint_from_bytes
+from face_profile import NO_PROFILE
+
+IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg', '.bmp', '.tiff')
+
+# Toplu ArcFace tanıma için varsayılan batch boyutu (0 = yüz başına ayrı çağrı)
+DEFAULT_RECOGNITION_BATCH = 32
+
+# Küçültülmüş çözme açıkken tespit görüntüsünün uzun kenarı (tespit 640x640'ta çalışır)
+DEFAULT_DETECT_MAX_SIDE = 1280
+
+# Hizalama kaynağında en küçük yüzün en az genişliği (ArcFace girişi 112x112)
+MIN_ALIGN_FACE = 112
+
+# JPEG DCT ölçekli çözme bayrakları (çarpan -> bayrak)
+REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+# Eğitimde kullanılan buffalo_l modelleri; landmark ve yaş/cinsiyet modelleri yüklenmez
+FACE_APP_MODULES = ('detection', 'recognition')
+
+# Kuyruklarda iş bitti işareti
+_STOP = object()
+
+# Süreç boyunca paylaşılan FaceAnalysis oturumları (det_size -> oturum)
+_face_apps = {}
+_face_apps_lock = threading.Lock()
+
+
+def default_decode_workers():
+    """Varsayılan çözme işçisi sayısı (bir çekirdek çıkarım için bırakılır)"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def create_face_app(log=None, det_size=(640, 640), intra_op_threads=0):
+    """Buffalo-L FaceAnalysis oturumunu oluştur (GPU yoksa CPU'ya düşer)
+
+    Sadece tespit ve tanıma modelleri hazırlanır (FACE_APP_MODULES).
+    intra_op_threads > 0 ise ONNX Runtime oturumları bu kadar thread kullanır
+    (çok süreçli eğitimde süreç başına çekirdek payı); sess_options'ı model
+    oturumlarına iletmeyen insightface sürümlerinde oturumlar yeniden kurulur.
+    """
+    log = log or (lambda message: None)
+    import onnxruntime
+    from insightface.app import FaceAnalysis
+
+    session_kwargs = {'allowed_modules': list(FACE_APP_MODULES)}
+    if intra_op_threads > 0:
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = intra_op_threads
+        session_options.inter_op_num_threads = 1
+        session_kwargs['sess_options'] = session_options
+
+    # GPU/CPU kontrolü: ONNX Runtime'ın CUDA sağlayıcısı var mı (torch yüklemeden)
+    ctx_id = 0 if 'CUDAExecutionProvider' in onnxruntime.get_available_providers() else -1
+    device_type = "GPU (CUDA)" if ctx_id >= 0 else "CPU"
+
+    log(f"💻 Cihaz türü: {device_type}")
+    providers = ['CUDAExecutionProvider', 'CPUExecutionProvider'] if ctx_id >= 0 else ['CPUExecutionProvider']
+
+    try:
+        # Buffalo-S Lite ONNX model - client-side sistemle uyumlu
+        face_app = FaceAnalysis(name='buffalo_l', providers=providers, **session_kwargs)
+        face_app.prepare(ctx_id=ctx_id, det_size=det_size)
+        log("✅ Buffalo-L model başarıyla yüklendi (512D embeddings)")
+    except Exception:
+        if ctx_id < 0:
+            raise
+        log("⚠️ GPU başlatılamadı, CPU'ya geçiliyor...")
+        face_app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'], **session_kwargs)
+        face_app.prepare(ctx_id=-1, det_size=det_size)
+
+    if 'sess_options' in session_kwargs:
+        rebuilt = apply_session_options(face_app, session_kwargs['sess_options'])
+        if rebuilt:
+            log(f"🧵 {rebuilt} ONNX oturumu {intra_op_threads} thread ile yeniden kuruldu")
+    return face_app
+
+
+def apply_session_options(face_app, session_options):
+    """Thread ayarı farklı olan model oturumlarını session_options ile yeniden kur; kurulan sayısını döndür
+
+    insightface 0.7.3'te model_zoo.get_model FaceAnalysis'e verilen sess_options'ı
+    yok sayar; oturum aynı model dosyası ve sağlayıcılarla yeniden oluşturulur.
+    """
+    import onnxruntime
+
+    rebuilt = 0
+    for model in face_app.models.values():
+        session = getattr(model, 'session', None)
+        if session is None:
+            continue
+        current = session.get_session_options()
+        if (current.intra_op_num_threads == session_options.intra_op_num_threads
+                and current.inter_op_num_threads == session_options.inter_op_num_threads):
+            continue
+        model.session = onnxruntime.InferenceSession(model.model_file, sess_options=session_options,
+                                                     providers=session.get_providers())
+        rebuilt += 1
+    return rebuilt
+
+
+def get_face_app(log=None, det_size=(640, 640)):
+    """Süreç boyunca paylaşılan FaceAnalysis oturumu; ilk çağrıda yüklenir
+
+    Art arda eğitimler aynı oturumu kullanır. Başka bir thread yüklerken
+    (preload_face_app) çağrılırsa yükleme bitene kadar bekler.
+    """
+    key = tuple(det_size)
+    with _face_apps_lock:
+        face_app = _face_apps.get(key)
+        if face_app is None:
+            face_app = create_face_app(log=log, det_size=det_size)
+            _face_apps[key] = face_app
+        elif log is not None:
+            log("♻️ Buffalo-L model bellekte hazır, yeniden yüklenmedi")
+    return face_app
+
+
+def preload_face_app(log=None, det_size=(640, 640)):
+    """Modeli arka plan thread'inde yükle (örn. kullanıcı klasör seçerken); thread'i döndürür"""
+    log = log or (lambda message: None)
+
+    def load():
+        try:
+            get_face_app(log=log, det_size=det_size)
+        except Exception as e:
+            # Eğitim başlarken yeniden denenir ve hata orada raporlanır
+            log(f"⚠️ Model arka planda yüklenemedi: {str(e)}")
+
+    thread = threading.Thread(target=load, name="face-app-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def iter_image_files(folder_path, recursive=True):
+    """Klasördeki resim dosyalarını os.scandir ile tararken tek tek üret
+
+    Sıra os.walk (yukarıdan aşağı) ile aynıdır; okunamayan klasörler os.walk'taki
+    gibi sessizce atlanır, sembolik bağlantılı klasörlere girilmez.
+    """
+    pending = [folder_path]
+    while pending:
+        directory = pending.pop()
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                subdirectories.append(entry.path)
+                        elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        pending.extend(reversed(subdirectories))
+
+
+def list_image_files(folder_path, recursive=True):
+    """Klasördeki tüm resim dosyalarını listele"""
+    return list(iter_image_files(folder_path, recursive))
+
+
+class FileScanner:
+    """Pipeline'a tarama bitmeden dosya besleyen akış
+
+    Pipeline bunu dosya listesi gibi tüketir; count o ana kadar bulunan resim
+    sayısıdır (ilerleme için), done tarama bitince True olur. Tek sefer tüketilir.
+    """
+
+    def __init__(self, folder_path, recursive=True):
+        self.folder_path = folder_path
+        self.recursive = recursive
+        self.count = 0
+        self.done = False
+
+    def __iter__(self):
+        for file_path in iter_image_files(self.folder_path, self.recursive):
+            self.count += 1
+            yield file_path
+        self.done = True
+
+
+def content_hash(data):
+    """Dosya içeriğinin SHA-1 özeti (manifest ve önbellek anahtarı)"""
+    return hashlib.sha1(data).hexdigest()
+
+
+def file_content_hash(file_path, chunk_size=1 << 20):
+    """Dosyayı parça parça okuyarak içerik özetini hesapla"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def decode_image(data, profiler=NO_PROFILE):
+    """Ham dosya içeriğini çöz ve RGB'ye çevir (okunamazsa None)"""
+    with profiler.stage('decode'):
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+
+    # BGR'den RGB'ye çevir
+    with profiler.stage('color'):
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def jpeg_size(data):
+    """JPEG başlığından (genişlik, yükseklik) oku; JPEG değilse ya da bulunamazsa None"""
+    if data[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1  # Dolgu baytı
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            pos += 2  # Uzunluksuz işaretler
+            continue
+        # SOF0..SOF15 (DHT/JPG/DAC hariç): yükseklik ve genişlik burada
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if pos + 9 > len(data):
+                return None
+            height = int.from_bytes(data[pos + 5:pos + 7], 'big')
+            width = int.from_bytes(data[pos + 7:pos + 9], 'big')
+            return width, height
+        pos += 2 + int.from_bytes(data[pos + 2:pos + 4], 'big')
+    return None
+
+
+class ReducedImage:
+    """Tespit için küçültülmüş resim; hizalama gerektiğinde yüksek çözünürlükten yapılır
+
+    rgb: tespit görüntüsü, scale: tespit koordinatlarını orijinale çeviren çarpan.
+    JPEG'de ham dosya (data) saklanır ve küçük yüzler için resim daha yüksek
+    çözünürlükte yeniden çözülür; diğer formatlarda tam BGR resim (full_bgr) saklanır.
+    """
+    __slots__ = ('rgb', 'scale', 'data', 'full_bgr')
+
+    def __init__(self, rgb, scale, data=None, full_bgr=None):
+        self.rgb = rgb
+        self.scale = scale
+        self.data = data
+        self.full_bgr = full_bgr
+
+    def to_original(self, faces):
+        """Tespit sonuçlarının bbox/kps koordinatlarını orijinal çözünürlüğe çevir"""
+        for face in faces:
+            face.bbox = face.bbox * self.scale
+            if face.kps is not None:
+                face.kps = face.kps * self.scale
+
+    def alignment_source(self, faces, profiler=NO_PROFILE):
+        """En küçük yüz en az MIN_ALIGN_FACE piksel olacak en düşük çözünürlük
+
+        (resim, ölçek, bgr_mi) döndürür; ölçek orijinal koordinatları resme çevirir.
+        """
+        smallest = min(float(face.bbox[2] - face.bbox[0]) for face in faces)
+        if smallest / self.scale >= MIN_ALIGN_FACE:
+            return self.rgb, self.scale, False
+        if self.full_bgr is not None:
+            return self.full_bgr, 1.0, True
+
+        factor = 1
+        for candidate in (4, 2):
+            if candidate < self.scale and smallest / candidate >= MIN_ALIGN_FACE:
+                factor = candidate
+                break
+        with profiler.stage('decode'):
+            bgr = cv2.imdecode(np.frombuffer(self.data, np.uint8), REDUCED_DECODE_FLAGS.get(factor, cv2.IMREAD_COLOR))
+        if bgr is None:
+            return self.rgb, self.scale, False
+        return bgr, float(factor), True
+
+
+def decode_for_detection(data, max_side=DEFAULT_DETECT_MAX_SIDE, profiler=NO_PROFILE):
+    """Tespit için küçültülmüş çözme (okunamazsa None)
+
+    JPEG'ler IMREAD_REDUCED_* ile doğrudan küçük çözülür (DCT ölçekleme, tam
+    boyutlu piksel tamponu oluşmaz); diğer formatlar çözüldükten hemen sonra
+    küçültülür. Resim zaten küçükse decode_image ile aynı tam RGB döner.
+    """
+    size = jpeg_size(data)
+    if size is not None:
+        factor = next((f for f in (8, 4, 2) if max(size) / f >= max_side), 1)
+        if factor == 1:
+            return decode_image(data, profiler)
+        with profiler.stage('decode'):
+            bgr = cv2.imdecode(np.frombuffer(data, np.uint8), REDUCED_DECODE_FLAGS[factor])
+        if bgr is None:
+            return None
+        with profiler.stage('color'):
+            return ReducedImage(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB), float(factor), data=data)
+
+    with profiler.stage('decode'):
+        bgr = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if bgr is None:
+        return None
+    with profiler.stage('color'):
+        height, width = bgr.shape[:2]
+        if max(height, width) <= max_side:
+            return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        ratio = max_side / float(max(height, width))
+        small = cv2.resize(bgr, (max(1, round(width * ratio)), max(1, round(height * ratio))),
+                           interpolation=cv2.INTER_AREA)
+        return ReducedImage(cv2.cvtColor(small, cv2.COLOR_BGR2RGB), width / float(small.shape[1]), full_bgr=bgr)
+
+
+def load_image(file_path):
+    """Resmi oku, çöz ve RGB'ye çevir (okunamazsa None)"""
+    with open(file_path, 'rb') as f:
+        return decode_image(f.read())
+
+
+class PipelineControl:
+    """Eğitimi dışarıdan (GUI/CLI) iptal etme ve duraklatma anahtarı (thread-safe)
+
+    Kontroller resimler arasında yapılır; çalışan çıkarım yarıda kesilmez.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # Duraklatılmış işçiler uyansın ve çıksın
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def wait_resumed(self, timeout=None):
+        """Devam ettirilene (ya da iptal edilene) kadar bekle; devam ediyorsa True"""
+        return self._running.wait(timeout)
+
+
+class ImageResult:
+    """Tek bir resmin pipeline sonucu"""
+    __slots__ = ('index', 'file_path', 'status', 'faces', 'error', 'content_hash', 'cached', 'image_hash',
+                 'duplicate_of', 'rejected')
+
+    OK = 'ok'
+    UNREADABLE = 'unreadable'
+    FAILED = 'failed'
+    DUPLICATE = 'duplicate'  # Birebir/neredeyse aynı resim zaten işlendi; gömülmedi
+
+    def __init__(self, index, file_path, status, faces=None, error=None, content_hash=None, cached=False,
+                 image_hash=None, duplicate_of=None, rejected=None):
+        self.index = index
+        self.file_path = file_path
+        self.status = status
+        self.faces = faces
+        self.error = error
+        self.content_hash = content_hash
+        self.cached = cached  # Sonuç embedding önbelleğinden geldi
+        self.image_hash = image_hash  # Parmak izi (dHash, küçük resim); yineleme kontrolü açıksa
+        self.duplicate_of = duplicate_of  # DUPLICATE: asıl resmin yolu
+        self.rejected = rejected  # Kalite filtresinin elediği yüzler {neden: sayı}; filtre kapalıysa/önbellekteyse None
+
+
+def resolve_duplicate(dedup, result):
+    """Dosya sırasıyla gelen sonucu yineleme kaydına göre kesinleştir
+
+    Kayıtlı bir asıl resimle eşleşen sonuç DUPLICATE olur (en önce kaydedilen asıl resim);
+    eşleşmeyen ve yüz vektörü üreten resim asıl resim olarak kaydedilir. Okunamayan,
+    yüzsüz ya da tüm yüzleri elenen resim kaydedilmez, kopyaları kendi başına işlenir.
+    """
+    if result.status not in (ImageResult.OK, ImageResult.DUPLICATE):
+        return result
+    original = dedup.find(result.content_hash, result.image_hash)
+    if original is not None and original != result.file_path:
+        result.status, result.faces, result.duplicate_of = ImageResult.DUPLICATE, None, original
+    elif result.status == ImageResult.OK and result.faces:
+        dedup.register(result.file_path, result.image_hash, result.content_hash)
+    return result
+
+
+class BatchedFaceAnalyzer:
+    """Tespit ve tanıma adımlarını ayıran FaceAnalysis sarmalayıcısı
+
+    Önce sadece tespit (bbox + kps) yapılır, hizalanmış 112x112 yüz kırpıntıları
+    birçok resimden toplanıp tek bir ONNX tanıma çağrısıyla gömülür.
+    quality (FaceQualityFilter) verilirse yüzler hizalamadan önce (güven, boyut,
+    poz) ve sonra (bulanıklık) elenir; elenen yüzler tanımaya gitmez.
+    """
+
+    def __init__(self, face_app, batch_size=DEFAULT_RECOGNITION_BATCH, profiler=NO_PROFILE, quality=None):
+        from insightface.app.common import Face
+        from insightface.utils import face_align
+
+        self.profiler = profiler
+        self.quality = quality
+        self._face_cls = Face
+        self._norm_crop = face_align.norm_crop
+        self.det_model = face_app.det_model
+        self.rec_model = face_app.models['recognition']
+
+        # Sabit batch=1 girişli modellerde toplu çağrı yapılamaz
+        batch_dim = self.rec_model.input_shape[0]
+        if isinstance(batch_dim, int) and batch_dim > 0:
+            batch_size = min(batch_size, batch_dim)
+        self.batch_size = max(1, batch_size)
+
+    def detect(self, img):
+        """Sadece yüz tespiti; embedding'siz Face listesi döndürür"""
+        with self.profiler.stage('detection'):
+            bboxes, kpss = self.det_model.detect(img, max_num=0, metric='default')
+        faces = []
+        for i in range(bboxes.shape[0]):
+            kps = kpss[i] if kpss is not None else None
+            faces.append(self._face_cls(bbox=bboxes[i, 0:4], kps=kps, det_score=bboxes[i, 4]))
+        return faces
+
+    def align(self, img, face):
+        """Tanıma modeli için hizalanmış yüz kırpıntısı"""
+        return self._norm_crop(img, landmark=face.kps, image_size=self.rec_model.input_size[0])
+
+    def detect_and_align(self, image):
+        """Tespit + hizalama (+ kalite filtresi); (yüzler, kırpıntılar, elenenler) döndürür
+
+        image RGB dizi ya da ReducedImage olabilir. ReducedImage'da tespit küçük
+        resimde yapılır, koordinatlar orijinale çevrilir ve kırpıntılar yeterli
+        çözünürlükteki kaynaktan (RGB) alınır. Elenenler {neden: sayı} sözlüğüdür;
+        kalite filtresi yoksa None.
+        """
+        if not isinstance(image, ReducedImage):
+            faces, rejected = self._filter_detections(self.detect(image))
+            with self.profiler.stage('alignment'):
+                crops = [self.align(image, face) for face in faces]
+            return self._filter_crops(faces, crops, rejected)
+
+        faces = self.detect(image.rgb)
+        image.to_original(faces)
+        # Elenen küçük yüzler yüksek çözünürlüklü hizalama kaynağı gerektirmesin diye önce filtrele
+        faces, rejected = self._filter_detections(faces)
+        if not faces:
+            return faces, [], rejected
+        source, scale, is_bgr = image.alignment_source(faces, self.profiler)
+        size = self.rec_model.input_size[0]
+        crops = []
+        with self.profiler.stage('alignment'):
+            for face in faces:
+                crop = self._norm_crop(source, landmark=face.kps / scale, image_size=size)
+                crops.append(np.ascontiguousarray(crop[..., ::-1]) if is_bgr else crop)
+        return self._filter_crops(faces, crops, rejected)
+
+    def _filter_detections(self, faces):
+        if self.quality is None:
+            return faces, None
+        with self.profiler.stage('quality'):
+            return self.quality.filter_detections(faces)
+
+    def _filter_crops(self, faces, crops, rejected):
+        if self.quality is None:
+            return faces, crops, rejected
+        with self.profiler.stage('quality'):
+            faces, crops = self.quality.filter_crops(faces, crops, rejected)
+        return faces, crops, rejected
+
+    def embed(self, crops):
+        """Kırpıntıları batch_size'lık parçalar halinde göm; (N, 512) döndürür"""
+        feats = []
+        for start in range(0, len(crops), self.batch_size):
+            with self.profiler.stage('recognition'):
+                feats.append(self.rec_model.get_feat(crops[start:start + self.batch_size]))
+        return np.concatenate(feats, axis=0)
+
+
+class _PerImageStage:
+    """Çıkarım aşaması: her resim için face_app.get (yüz başına tanıma)
+
+    Küçültülmüş resimler (ReducedImage) ve kalite filtresi açıkken tüm resimler
+    analyzer ile tespit/hizalama/tanıma yapılır.
+    """
+
+    def __init__(self, face_app, analyzer=None, profiler=NO_PROFILE):
+        self.face_app = face_app
+        self.analyzer = analyzer
+        self.profiler = profiler
+
+    def push(self, item):
+        """Çözülmüş resmi (ya da hata sonucunu) işle; hazır sonuçları döndür"""
+        if isinstance(item, ImageResult):
+            return [item]
+        index, file_path, rgb, digest, hash_value = item
+        rejected = None
+        try:
+            if isinstance(rgb, ReducedImage) or (self.analyzer is not None and self.analyzer.quality is not None):
+                faces, crops, rejected = self.analyzer.detect_and_align(rgb)
+                if crops:
+                    for face, feat in zip(faces, self.analyzer.embed(crops)):
+                        face.embedding = feat.flatten()
+            else:
+                with self.profiler.stage('inference'):
+                    faces = self.face_app.get(rgb)
+        except Exception as e:
+            return [ImageResult(index, file_path, ImageResult.FAILED, error=str(e), content_hash=digest)]
+        return [ImageResult(index, file_path, ImageResult.OK, faces=faces, content_hash=digest, image_hash=hash_value,
+                            rejected=rejected)]
+
+    def flush(self):
+        return []
+
+
+class _BatchedRecognitionStage:
+    """Çıkarım aşaması: tespit hemen, tanıma resimler arası toplu yapılır
+
+    Sonuçlar batch dolduğunda (veya flush çağrıldığında) geliş sırasıyla döner;
+    yüzsüz resimlerde ilerleme takılmasın diye bekleyen resim sayısı da sınırlıdır.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.pending = []
+        self.crops = []
+
+    def push(self, item):
+        if isinstance(item, ImageResult):
+            self.pending.append((item, []))
+        else:
+            index, file_path, rgb, digest, hash_value = item
+            try:
+                faces, crops, rejected = self.analyzer.detect_and_align(rgb)
+            except Exception as e:
+                result = ImageResult(index, file_path, ImageResult.FAILED, error=str(e), content_hash=digest)
+                self.pending.append((result, []))
+            else:
+                result = ImageResult(index, file_path, ImageResult.OK, faces=faces, content_hash=digest,
+                                     image_hash=hash_value, rejected=rejected)
+                self.pending.append((result, crops))
+                self.crops.extend(crops)
+
+        if len(self.crops) >= self.analyzer.batch_size or len(self.pending) >= self.analyzer.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        pending, self.pending = self.pending, []
+        crops, self.crops = self.crops, []
+        if not crops:
+            return [result for result, _ in pending]
+
+        try:
+            feats = self.analyzer.embed(crops)
+        except Exception:
+            # Toplu çağrı başarısızsa resim resim dene, sadece hatalı resmi kaybet
+            feats = None
+
+        offset = 0
+        for result, image_crops in pending:
+            if not image_crops:
+                continue
+            try:
+                image_feats = feats[offset:offset + len(image_crops)] if feats is not None \
+                    else self.analyzer.embed(image_crops)
+                for face, feat in zip(result.faces, image_feats):
+                    face.embedding = feat.flatten()
+            except Exception as e:
+                result.status, result.faces, result.error = ImageResult.FAILED, None, str(e)
+            offset += len(image_crops)
+        return [result for result, _ in pending]
+
+
+class TrainingPipeline:
+    """Aşamalı eğitim pipeline'ı
+
+    Çözme işçileri dosyaları okuyup sınırlı bir kuyruğa koyar, çıkarım
+    işçileri bu kuyruğu boşaltıp face_app.get çalıştırır. Sonuçlar dosya
+    sırasına göre yeniden dizilerek döndürülür; böylece ilerleme ve log
+    mesajları seri döngüdeki sırayla aynı kalır.
+    decode_workers=0 verilirse eski seri döngü kullanılır.
+    recognition_batch_size > 0 ise tanıma adımı resimler arası toplu yapılır.
+    cache (EmbeddingCache) verilirse içerik özeti önbellekte olan resimler
+    çözülmeden geçer, yeni sonuçlar önbelleğe yazılır.
+    control (PipelineControl) duraklatıldığında işçiler yeni resme geçmez.
+    detect_max_side > 0 ise resimler tespit için bu uzun kenara küçültülerek
+    çözülür (decode_for_detection); hizalama gerektiği kadar yüksek çözünürlükten.
+    profiler (StageProfiler) verilirse aşama süreleri ve kuyruk dolulukları toplanır.
+    dedup (DuplicateFilter) verilirse yüz vektörü üretmiş önceki bir resmin kopyası olan
+    resimler DUPLICATE sonucu olarak döner (mümkünse çıkarımdan önce ayıklanır).
+    quality (FaceQualityFilter) verilirse düşük kaliteli yüzler tanımadan önce elenir
+    (ImageResult.rejected); önbellek ad alanı da eşiklere göre ayrılmalıdır.
+    """
+
+    def __init__(self, face_app, decode_workers=None, inference_workers=1, queue_size=None,
+                 recognition_batch_size=0, cache=None, control=None, detect_max_side=0, profiler=None,
+                 dedup=None, quality=None):
+        self.face_app = face_app
+        self.cache = cache
+        self.dedup = dedup
+        self.quality = quality
+        self.control = control
+        self.detect_max_side = max(0, detect_max_side or 0)
+        self.recognition_batch_size = max(0, recognition_batch_size)
+        self.decode_workers = default_decode_workers() if decode_workers is None else max(0, decode_workers)
+        self.inference_workers = max(1, inference_workers)
+        self.queue_size = queue_size or max(4, 2 * (self.decode_workers + self.inference_workers))
+        self.profiler = profiler or NO_PROFILE
+        if self.profiler.enabled:
+            self.profiler.workers.update(decode=self.decode_workers, inference=self.inference_workers)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Tüm işçilere durma sinyali gönder"""
+        self._stop_event.set()
+
+    def process(self, files):
+        """Dosyaları işle ve ImageResult nesnelerini dosya sırasıyla üret"""
+        if self.decode_workers == 0:
+            results = self._process_serial(files)
+        else:
+            results = self._process_parallel(files)
+        try:
+            for result in results:
+                if self.cache is not None and result.status == ImageResult.OK and not result.cached:
+                    with self.profiler.stage('cache'):
+                        self.cache.put(result.content_hash, result.faces)
+                if self.dedup is not None:
+                    resolve_duplicate(self.dedup, result)
+                self.profiler.count('images')
+                self.profiler.count('faces', len(result.faces or ()))
+                if result.rejected:
+                    self.profiler.count('rejected_faces', sum(result.rejected.values()))
+                yield result
+        finally:
+            results.close()
+            if self.cache is not None:
+                self.cache.commit()
+
+    def _create_stage(self):
+        """Her çıkarım işçisi için ayrı çıkarım aşaması oluştur"""
+        if self.recognition_batch_size:
+            return _BatchedRecognitionStage(
+                BatchedFaceAnalyzer(self.face_app, self.recognition_batch_size, self.profiler, self.quality)
+            )
+        analyzer = None
+        if self.detect_max_side or self.quality is not None:
+            analyzer = BatchedFaceAnalyzer(self.face_app, DEFAULT_RECOGNITION_BATCH, self.profiler, self.quality)
+        return _PerImageStage(self.face_app, analyzer, self.profiler)
+
+    def _decode(self, index, file_path):
+        """Tek dosyayı oku ve çöz; çıkarım aşamasına gidecek öğeyi döndürür"""
+        digest = None
+        profiler = self.profiler
+        try:
+            with profiler.stage('io'):
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            with profiler.stage('hash'):
+                digest = content_hash(data)
+            hash_value = None
+            if self.dedup is not None:
+                # Sadece yüz vektörü üretmiş (kesinleşmiş) asıl resimlere bakılır; kayıt, sonuçlar
+                # dosya sırasıyla döndürülürken yapılır (resolve_duplicate)
+                # Birebir kopya: okumak yeterli, çözülmez
+                original = self.dedup.find(digest)
+                if original is None and self.dedup.near_duplicates:
+                    # Neredeyse aynı resim: küçük gri çözmeyle, tam çözmeden ve çıkarımdan önce
+                    with profiler.stage('dedup'):
+                        hash_value = fingerprint_from_bytes(data)
+                    original = self.dedup.find(None, hash_value)
+                if original is not None and original != file_path:
+                    return ImageResult(index, file_path, ImageResult.DUPLICATE, content_hash=digest,
+                                       image_hash=hash_value, duplicate_of=original)
+            if self.cache is not None:
+                with profiler.stage('cache'):
+                    faces = self.cache.get(digest)
+                if faces is not None:
+                    profiler.count('cached_images')
+                    return ImageResult(index, file_path, ImageResult.OK, faces=faces, content_hash=digest,
+                                       cached=True, image_hash=hash_value)
+            if self.detect_max_side:
+                rgb = decode_for_detection(data, self.detect_max_side, profiler)
+            else:
+                rgb = decode_image(data, profiler)
+        except Exception as e:
+            return ImageResult(index, file_path, ImageResult.FAILED, error=str(e), content_hash=digest)
+        if rgb is None:
+            return ImageResult(index, file_path, ImageResult.UNREADABLE, content_hash=digest)
+        return index, file_path, rgb, digest, hash_value
+
+    def _wait_while_paused(self):
+        """Duraklatıldıysa devam ya da durma sinyaline kadar bekle"""
+        if self.control is None:
+            return
+        while not self._stop_event.is_set() and not self.control.wait_resumed(0.1):
+            continue
+
+    def _process_serial(self, files):
+        stage = self._create_stage()
+        for index, file_path in enumerate(files):
+            if self.control is not None and self.control.paused:
+                yield from stage.flush()
+                self._wait_while_paused()
+            if self._stop_event.is_set():
+                return
+            yield from stage.push(self._decode(index, file_path))
+        yield from stage.flush()
+
+    def _put(self, q, item):
+        """Durma sinyaline duyarlı bloklayan put"""
+        while not self._stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, on_pause=None):
+        """Durma sinyaline duyarlı bloklayan get (durdurulursa _STOP)
+
+        on_pause verilirse duraklatılmışken kuyruk boş kaldıkça çağrılır.
+        """
+        while not self._stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if on_pause is not None and self.control is not None and self.control.paused:
+                    on_pause()
+                continue
+        return _STOP
+
+    def _process_parallel(self, files):
+        path_queue = queue.Queue(maxsize=self.queue_size)
+        decoded_queue = queue.Queue(maxsize=self.queue_size)
+        result_queue = queue.Queue()
+
+        def decode_loop():
+            while True:
+                item = self._get(path_queue)
+                if item is _STOP:
+                    return
+                self._wait_while_paused()
+                if not self._put(decoded_queue, self._decode(*item)):
+                    return
+
+        def inference_loop():
+            stage = self._create_stage()
+
+            def flush_pending():
+                # Yarım batch'i bekletme: tamamlanan resimler duraklamadan önce kaydedilsin
+                for result in stage.flush():
+                    result_queue.put(result)
+
+            while True:
+                item = self._get(decoded_queue, on_pause=flush_pending)
+                if item is _STOP:
+                    break
+                if self.control is not None and self.control.paused:
+                    flush_pending()
+                    self._wait_while_paused()
+                for result in stage.push(item):
+                    result_queue.put(result)
+            for result in stage.flush():
+                result_queue.put(result)
+            result_queue.put(_STOP)
+
+        decoders = [threading.Thread(target=decode_loop, daemon=True) for _ in range(self.decode_workers)]
+        consumers = [threading.Thread(target=inference_loop, daemon=True) for _ in range(self.inference_workers)]
+
+        feed_errors = []
+
+        def feed():
+            # Dosya yollarını çözme işçilerine dağıt (files tarama akışı olabilir), bitince işçileri kapat
+            try:
+                for index, file_path in enumerate(files):
+                    if not self._put(path_queue, (index, file_path)):
+                        return
+            except Exception as e:
+                feed_errors.append(e)
+            finally:
+                for _ in decoders:
+                    self._put(path_queue, _STOP)
+                for decoder in decoders:
+                    decoder.join()
+                for _ in consumers:
+                    self._put(decoded_queue, _STOP)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        for thread in decoders + consumers + [feeder]:
+            thread.start()
+
+        # Sonuçları dosya sırasına göre yeniden dizerek üret
+        pending = {}
+        next_index = 0
+        finished_consumers = 0
+        completed = False
+        try:
+            while finished_consumers < len(consumers):
+                result = self._get(result_queue)
+                if result is _STOP:
+                    if self._stop_event.is_set():
+                        return
+                    finished_consumers += 1
+                    continue
+                pending[result.index] = result
+                self.profiler.sample_queue('paths', path_queue.qsize(), self.queue_size)
+                self.profiler.sample_queue('decoded', decoded_queue.qsize(), self.queue_size)
+                self.profiler.sample_queue('results', len(pending) + result_queue.qsize())
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+            completed = True
+            if feed_errors:
+                raise feed_errors[0]
+        finally:
+            # Yarıda bırakıldıysa (hata / generator kapatma) işçileri durdur
+            if not completed:
+                self._stop_event.set()
+            for thread in decoders + consumers + [feeder]:
+                thread.join()
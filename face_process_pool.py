@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+🧵 Buffalo-L Çok Süreçli Eğitim
+GPU'suz sunucularda tek süreçteki pipeline GIL ve tek ONNX oturumu yüzünden
+tüm çekirdekleri dolduramaz. FaceProcessPool her biri kendi FaceAnalysis
+oturumunu (süreç başına ayarlı intra-op thread sayısıyla) yükleyen işçi
+süreçleri başlatır. Dosyalar küçük parçalar (shard) halinde dağıtılır; her
+süreç kendi parçasını okur, çözer ve gömer. Sonuçlar ana süreçte dosya
+sırasıyla birleştirilir; ara depo, manifest ve önbellek yazımı ana süreçte
+kalır, böylece tek bir face_database oluşur.
+
+İşçiler embedding önbelleğini salt okunur açar; isabetler ve yeni sonuçlar
+ana süreçte kaydedilir. Süreçler 'spawn' ile başlatılır (ONNX Runtime ve Qt
+thread'leriyle fork güvenli değildir). Her süreç modelin bir kopyasını taşır
+(buffalo_l için süreç başına birkaç yüz MB).
+"""
+import multiprocessing
+import os
+import signal
+import sqlite3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+
+from face_cache import EmbeddingCache, cache_namespace, pack_faces, unpack_faces
+from face_dedup import DuplicateFilter
+from face_pipeline import DEFAULT_RECOGNITION_BATCH, ImageResult, TrainingPipeline, create_face_app
+from face_profile import NO_PROFILE, StageProfiler
+
+DEFAULT_SHARD_SIZE = 8  # Görev başına resim; küçük parçalar süreçler arasında yükü dengeler
+
+_worker = {}  # İşçi süreç durumu: face_app, ayarlar, salt okunur önbellek
+
+
+def default_process_count():
+    """Varsayılan süreç sayısı: çekirdek sayısı"""
+    return max(1, os.cpu_count() or 1)
+
+
+def _init_worker(intra_op_threads, recognition_batch_size, detect_max_side, dedup, dedup_distance,
+                 face_app_factory, quality):
+    """İşçi süreç başlangıcı: modeli bir kez yükle"""
+    # Ctrl+C tüm süreç grubuna gider; iptali ana süreç yönetir (çalışan parça tamamlanır)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cv2.setNumThreads(1)  # Paralellik süreçlerden gelir; OpenCV thread'leri çekirdekleri aşırı doldurmasın
+    factory = face_app_factory or create_face_app
+    _worker.update(
+        face_app=factory(intra_op_threads=intra_op_threads),
+        recognition_batch_size=recognition_batch_size,
+        detect_max_side=detect_max_side,
+        quality=quality,
+        # Süreç içi yineleme kaydı; süreçler arası kopyalar ana süreçte ayıklanır
+        dedup=DuplicateFilter(dedup_distance) if dedup else None,
+        cache=None,
+        cache_dir=None
+    )
+
+
+def _worker_namespace():
+    return cache_namespace(_worker['face_app'], _worker['detect_max_side'], _worker['quality'])
+
+
+def _worker_cache(cache_dir):
+    """İşçinin salt okunur önbelleği (açılamazsa önbelleksiz)"""
+    if cache_dir is None:
+        return None
+    if _worker['cache_dir'] != cache_dir:
+        try:
+            cache = EmbeddingCache(_worker_namespace(), cache_dir=cache_dir, readonly=True)
+        except sqlite3.Error:
+            cache = None
+        _worker.update(cache=cache, cache_dir=cache_dir)
+    return _worker['cache']
+
+
+def _process_shard(shard, cache_dir):
+    """[(index, yol), ...] parçasını işle: (sonuç satırları, aşama süreleri)"""
+    profiler = StageProfiler()
+    pipeline = TrainingPipeline(
+        _worker['face_app'],
+        decode_workers=0,
+        recognition_batch_size=_worker['recognition_batch_size'],
+        cache=_worker_cache(cache_dir),
+        detect_max_side=_worker['detect_max_side'],
+        profiler=profiler,
+        dedup=_worker['dedup'],
+        quality=_worker['quality']
+    )
+    rows = []
+    for result in pipeline.process(file_path for _, file_path in shard):
+        # Face nesneleri yerine float32 blob taşınır (önbellek biçimi)
+        blob = pack_faces(result.faces) if result.faces is not None else None
+        rows.append((shard[result.index][0], result.file_path, result.status, blob, result.error,
+                     result.content_hash, result.cached, result.image_hash, result.duplicate_of, result.rejected))
+    return rows, profiler.stage_totals()
+
+
+def _image_result(row):
+    index, file_path, status, blob, error, digest, cached, hash_value, duplicate_of, rejected = row
+    faces = unpack_faces(blob) if blob is not None else None
+    return ImageResult(index, file_path, status, faces=faces, error=error, content_hash=digest, cached=cached,
+                       image_hash=hash_value, duplicate_of=duplicate_of, rejected=rejected)
+
+
+def _shards(files, shard_size):
+    """Dosyaları tembel olarak [(index, yol), ...] parçalarına böl (FileScanner ile de çalışır)"""
+    shard = []
+    for item in enumerate(files):
+        shard.append(item)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+class FaceProcessPool:
+    """Her biri kendi FaceAnalysis oturumunu taşıyan işçi süreç havuzu
+
+    threads_per_process verilmezse çekirdekler süreçlere bölünür (en az 1).
+    face_app_factory işçide oturumu oluşturan, intra_op_threads alan ve
+    pickle edilebilen (modül düzeyinde) bir fonksiyondur; varsayılanı create_face_app.
+    dedup verilirse her işçi kendi yineleme kaydını tutar (DuplicateFilter; dedup_distance verilirse
+    neredeyse aynı resimler de).
+    quality (FaceQualityFilter) işçilere kopyalanır; elenen yüzler tanımaya gitmez.
+    """
+
+    def __init__(self, processes=None, threads_per_process=None, recognition_batch_size=DEFAULT_RECOGNITION_BATCH,
+                 detect_max_side=0, shard_size=DEFAULT_SHARD_SIZE, dedup=False, dedup_distance=None,
+                 face_app_factory=None, quality=None):
+        self.processes = max(1, processes or default_process_count())
+        self.threads_per_process = threads_per_process or max(1, (os.cpu_count() or 1) // self.processes)
+        self.recognition_batch_size = max(0, recognition_batch_size)
+        self.detect_max_side = max(0, detect_max_side or 0)
+        self.shard_size = max(1, shard_size)
+        self._namespace = None
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.threads_per_process, self.recognition_batch_size, self.detect_max_side, dedup,
+                      dedup_distance, face_app_factory, quality)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @property
+    def cache_namespace(self):
+        """İşçilerin modeline göre önbellek ad alanı (ilk çağrı bir işçinin modeli yüklemesini bekler)"""
+        if self._namespace is None:
+            self._namespace = self._result(self._executor.submit(_worker_namespace))
+        return self._namespace
+
+    def process(self, files, cache=None, control=None, profiler=None):
+        """Dosyaları parça parça işçilere dağıt ve ImageResult nesnelerini dosya sırasıyla üret
+
+        En fazla 2 × süreç sayısı parça aynı anda işlenir; duraklatıldığında ya da
+        iptalde yeni parça gönderilmez (çalışan parçalar tamamlanır).
+        """
+        profiler = profiler or NO_PROFILE
+        if profiler.enabled:
+            profiler.workers.update(
+                decode=self.processes, inference=self.processes,
+                processes=self.processes, threads_per_process=self.threads_per_process
+            )
+        cache_dir = cache.cache_dir if cache is not None else None
+        shards = _shards(files, self.shard_size)
+        window = 2 * self.processes
+        in_flight = deque()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < window and not self._held(control):
+                    shard = next(shards, None)
+                    if shard is None:
+                        exhausted = True
+                        break
+                    in_flight.append(self._executor.submit(_process_shard, shard, cache_dir))
+                if not in_flight:
+                    if exhausted or control is None or control.cancelled:
+                        return
+                    control.wait_resumed(0.1)
+                    continue
+
+                rows, stage_totals = self._result(in_flight.popleft())
+                profiler.merge_stages(stage_totals)
+                for row in rows:
+                    result = _image_result(row)
+                    if cache is not None and result.content_hash is not None:
+                        with profiler.stage('cache'):
+                            cache.record_lookup(result.content_hash, result.cached)
+                            if result.status == ImageResult.OK and not result.cached:
+                                cache.put(result.content_hash, result.faces)
+                    if result.cached:
+                        profiler.count('cached_images')
+                    profiler.count('images')
+                    profiler.count('faces', len(result.faces or ()))
+                    if result.rejected:
+                        profiler.count('rejected_faces', sum(result.rejected.values()))
+                    yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if cache is not None:
+                cache.commit()
+
+    def close(self):
+        """Bekleyen parçaları iptal et, çalışanların bitmesini bekle ve süreçleri kapat"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _held(control):
+        return control is not None and (control.paused or control.cancelled)
+
+    @staticmethod
+    def _result(future):
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            raise RuntimeError(
+                "İşçi süreç beklenmedik şekilde kapandı (model yüklenemedi ya da bellek yetmedi)"
+            ) from e
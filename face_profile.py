@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+📊 Buffalo-L Eğitim Profili
+Eğitim sırasında aşama sürelerini (dosya okuma, çözme, renk dönüşümü, tespit,
+tanıma, kayıt), resim/sn ve yüz/sn hızlarını, kuyruk doluluklarını ve bellek
+(RSS) tepe değerini toplar. Canlı özet GUI/CLI'ye gönderilir, eğitim sonunda
+models/<model_adı>/training_profile.json dosyasına yazılır.
+
+Süreler işçi thread'leri boyunca toplanır; paralel pipeline'da bir aşamanın
+toplam süresi duvar saati süresinden uzun olabilir. Darboğaz tahmini işçi
+başına meşguliyet ve çözülmüş resim kuyruğunun doluluğuna göre yapılır.
+"""
+import contextlib
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_FILE = "training_profile.json"
+PROFILE_VERSION = 1
+
+# Aşama grupları: girdi (G/Ç + çözme) ve çıkarım
+INPUT_STAGES = ('io', 'hash', 'cache', 'decode', 'color', 'dedup')
+INFERENCE_STAGES = ('inference', 'detection', 'quality', 'alignment', 'recognition')
+
+STAGE_LABELS = {
+    'io': "dosya okuma",
+    'hash': "içerik özeti",
+    'cache': "önbellek",
+    'decode': "çözme",
+    'color': "renk/ölçek",
+    'dedup': "yineleme kontrolü",
+    'inference': "tespit+tanıma",
+    'detection': "tespit",
+    'quality': "kalite filtresi",
+    'alignment': "hizalama",
+    'recognition': "tanıma",
+    'serialization': "kayıt"
+}
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def current_rss():
+    """Sürecin anlık bellek kullanımı (bayt); ölçülemezse None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """Sürecin bellek tepe değeri (bayt); ölçülemezse None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB, macOS bayt döndürür
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _StageTimer:
+    __slots__ = ('profiler', 'stage', 'started_at')
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.stage, time.perf_counter() - self.started_at)
+        return False
+
+
+class StageProfiler:
+    """Thread-safe aşama süresi, sayaç ve kuyruk doluluğu toplayıcı
+
+    enabled=False verilirse tüm çağrılar boş geçer (pipeline varsayılanı).
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}   # aşama -> [çağrı, toplam sn, en uzun sn]
+        self._queues = {}   # kuyruk -> [örnek, toplam, en fazla, kapasite]
+        self._counters = {'images': 0, 'faces': 0, 'cached_images': 0, 'rejected_faces': 0}
+        self._peak_rss = 0
+        self.workers = {}
+        self.started_at = time.time()
+        self.paused_seconds = 0.0
+
+    def stage(self, name):
+        """with profiler.stage('decode'): ... bloğunun süresini kaydet"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageTimer(self, name)
+
+    def add(self, name, seconds, calls=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._stages.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def stage_totals(self):
+        """Ham aşama toplamları {aşama: [çağrı, toplam sn, en uzun sn]} (süreçler arası birleştirme için)"""
+        with self._lock:
+            return {name: list(values) for name, values in self._stages.items()}
+
+    def merge_stages(self, totals):
+        """Başka bir süreçte toplanmış aşama sürelerini ekle"""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, (calls, total, longest) in totals.items():
+                entry = self._stages.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += calls
+                entry[1] += total
+                entry[2] = max(entry[2], longest)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def sample_queue(self, name, depth, capacity=None):
+        """Kuyruk doluluğu örneği (ortalama ve en fazla değer için)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._queues.setdefault(name, [0, 0, 0, capacity])
+            entry[0] += 1
+            entry[1] += depth
+            entry[2] = max(entry[2], depth)
+
+    def sample_memory(self):
+        rss = current_rss()
+        if rss is not None:
+            with self._lock:
+                self._peak_rss = max(self._peak_rss, rss)
+
+    def elapsed(self):
+        return max(time.time() - self.started_at - self.paused_seconds, 1e-6)
+
+    def bottleneck(self, stages=None, queues=None):
+        """'input' (G/Ç/çözme), 'inference' ya da veri yetersizse None"""
+        stages = self._stages if stages is None else stages
+        queues = self._queues if queues is None else queues
+        input_busy = sum(stages.get(name, (0, 0.0))[1] for name in INPUT_STAGES)
+        inference_busy = sum(stages.get(name, (0, 0.0))[1] for name in INFERENCE_STAGES)
+        if not input_busy and not inference_busy:
+            return None
+
+        # Çözülmüş resim kuyruğu çoğunlukla doluysa çıkarım yetişemiyor
+        decoded = queues.get('decoded')
+        if decoded and decoded[0] and decoded[3]:
+            fill = decoded[1] / float(decoded[0]) / decoded[3]
+            if fill >= 0.75:
+                return 'inference'
+            if fill <= 0.1:
+                return 'input'
+
+        input_per_worker = input_busy / max(1, self.workers.get('decode', 1))
+        inference_per_worker = inference_busy / max(1, self.workers.get('inference', 1))
+        return 'input' if input_per_worker > inference_per_worker else 'inference'
+
+    def snapshot(self):
+        """Canlı özet ve profil dosyası için sözlük"""
+        self.sample_memory()
+        with self._lock:
+            stages = {name: list(values) for name, values in self._stages.items()}
+            queues = {name: list(values) for name, values in self._queues.items()}
+            counters = dict(self._counters)
+            peak_memory = self._peak_rss
+
+        elapsed = self.elapsed()
+        busy_total = sum(values[1] for values in stages.values()) or 1e-9
+        overall_peak = peak_rss()
+        return {
+            'version': PROFILE_VERSION,
+            'elapsed': round(elapsed, 3),
+            'images': counters['images'],
+            'faces': counters['faces'],
+            'cached_images': counters['cached_images'],
+            'rejected_faces': counters['rejected_faces'],
+            'images_per_sec': round(counters['images'] / elapsed, 3),
+            'faces_per_sec': round(counters['faces'] / elapsed, 3),
+            'workers': dict(self.workers),
+            'stages': {
+                name: {
+                    'calls': calls,
+                    'total': round(total, 4),
+                    'mean_ms': round(total * 1000.0 / calls, 3) if calls else 0.0,
+                    'max_ms': round(longest * 1000.0, 3),
+                    'share': round(total / busy_total, 4)
+                }
+                for name, (calls, total, longest) in sorted(stages.items(), key=lambda item: -item[1][1])
+            },
+            'queues': {
+                name: {
+                    'mean': round(total / samples, 2) if samples else 0.0,
+                    'max': largest,
+                    'capacity': capacity
+                }
+                for name, (samples, total, largest, capacity) in queues.items()
+            },
+            'rss_peak_bytes': max(peak_memory, overall_peak or 0) or None,
+            'rss_current_bytes': current_rss(),
+            'bottleneck': self.bottleneck(stages, queues)
+        }
+
+
+def format_summary(snapshot):
+    """Tek satırlık canlı özet: hız, en pahalı aşamalar, kuyruk, bellek, darboğaz"""
+    parts = [f"{snapshot['images_per_sec']:.1f} resim/sn", f"{snapshot['faces_per_sec']:.1f} yüz/sn"]
+    top_stages = list(snapshot['stages'].items())[:3]
+    if top_stages:
+        parts.append(", ".join(
+            f"{STAGE_LABELS.get(name, name)} %{stage['share'] * 100:.0f}" for name, stage in top_stages
+        ))
+    decoded = snapshot['queues'].get('decoded')
+    if decoded and decoded['capacity']:
+        parts.append(f"kuyruk {decoded['mean']:.1f}/{decoded['capacity']}")
+    rss = snapshot['rss_peak_bytes']
+    if rss:
+        parts.append(f"RSS tepe {rss / (1 << 20):.0f} MB")
+    bottleneck = {'input': "G/Ç/çözme", 'inference': "çıkarım"}.get(snapshot['bottleneck'])
+    if bottleneck:
+        parts.append(f"darboğaz: {bottleneck}")
+    return " · ".join(parts)
+
+
+# Profil istenmediğinde kullanılan boş profil (tüm çağrılar etkisiz)
+NO_PROFILE = StageProfiler(enabled=False)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+🧹 Buffalo-L Yüz Kalitesi Filtresi
+Dedektör arka plandaki küçük yüzleri, bulanık yüzleri ve neredeyse profilden
+görünen yüzleri de bulur; bunlar veritabanını büyütür ve yanlış eşleşme
+üretir. FaceQualityFilter tespitten sonra, tanıma (ArcFace) çağrısından önce
+çalışır; elenen yüzler hiç gömülmez.
+
+Kontroller (ucuzdan pahalıya, ilk başarısız olan neden sayılır):
+- det_score : dedektör güveni
+- size      : bbox'ın kısa kenarı (orijinal resim pikseli)
+- pose      : 5 noktadan (gözler, burun, ağız köşeleri) yaw tahmini; burnun göz
+              ortasına göre kayması göz ekseni üzerinde yarım göz mesafesine
+              bölünür, yaw ≈ atan(kayma) (burun ucu ~yarım göz mesafesi öndedir)
+- blur      : hizalanmış 112x112 gri kırpıntıda Laplacian varyansı (keskin yüz
+              yüzlerce, σ=1.5 Gauss bulanıklığı ~15)
+
+Her eşik 0 (ya da None) verilirse o kontrol kapalıdır. Elenen yüz sayıları
+resim sonucunda (ImageResult.rejected) taşınır, eğitim sonunda model_info.json
+'quality' alanına yazılır.
+"""
+import math
+
+import cv2
+import numpy as np
+
+QUALITY_REASONS = ('det_score', 'size', 'pose', 'blur')
+QUALITY_LABELS = {'det_score': "düşük güven", 'size': "küçük", 'pose': "profil", 'blur': "bulanık"}
+DEFAULT_MIN_DET_SCORE = 0.6    # buffalo_l tespit eşiği 0.5; sınırdaki tespitler çoğunlukla yüz değildir
+DEFAULT_MIN_FACE_SIZE = 40     # Piksel; ArcFace girişi 112x112, daha küçük yüzler büyütülerek bulanıklaşır
+DEFAULT_MAX_YAW = 60.0         # Derece; daha yandan görünen yüzlerde tek göz/yanak öne çıkar
+DEFAULT_MIN_SHARPNESS = 15.0   # Hizalanmış kırpıntıda Laplacian varyansı
+
+
+def face_size(face):
+    """bbox'ın kısa kenarı (piksel)"""
+    x1, y1, x2, y2 = np.asarray(face.bbox, dtype=np.float32)[:4]
+    return float(min(x2 - x1, y2 - y1))
+
+
+def estimate_yaw(kps):
+    """5 noktadan yaklaşık yaw açısı (derece, işaretli); nokta yoksa None"""
+    if kps is None:
+        return None
+    kps = np.asarray(kps, dtype=np.float32).reshape(-1, 2)
+    if len(kps) < 3:
+        return None
+    left_eye, right_eye, nose = kps[0], kps[1], kps[2]
+    axis = right_eye - left_eye
+    half_distance = float(np.linalg.norm(axis)) / 2.0
+    if half_distance < 1e-6:
+        return 90.0  # Gözler üst üste: tam profil
+    # Baş eğikliğinden (roll) bağımsız olsun diye göz ekseni üzerine izdüşüm
+    offset = float(np.dot(nose - (left_eye + right_eye) / 2.0, axis / (2.0 * half_distance))) / half_distance
+    return math.degrees(math.atan(offset))
+
+
+def sharpness(crop):
+    """Hizalanmış kırpıntının Laplacian varyansı (düşük = bulanık)"""
+    gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY) if crop.ndim == 3 else crop
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+class FaceQualityFilter:
+    """Tespit edilen yüzleri kalite eşiklerine göre ele (süreçler arası pickle edilebilir)"""
+
+    def __init__(self, min_det_score=DEFAULT_MIN_DET_SCORE, min_face_size=DEFAULT_MIN_FACE_SIZE,
+                 max_yaw=DEFAULT_MAX_YAW, min_sharpness=DEFAULT_MIN_SHARPNESS):
+        self.min_det_score = min_det_score or 0
+        self.min_face_size = min_face_size or 0
+        self.max_yaw = max_yaw or 0
+        self.min_sharpness = min_sharpness or 0
+
+    @property
+    def settings(self):
+        """Eşikler (model_info.json ve önbellek ad alanı için)"""
+        return {
+            'min_det_score': self.min_det_score,
+            'min_face_size': self.min_face_size,
+            'max_yaw': self.max_yaw,
+            'min_sharpness': self.min_sharpness
+        }
+
+    @property
+    def namespace(self):
+        """Önbellek ad alanı eki: eşikler değişince eski (farklı elenmiş) kayıtlar kullanılmaz"""
+        return "q" + "-".join(f"{value:g}" for value in self.settings.values())
+
+    def check_detection(self, face):
+        """Kırpıntı gerektirmeyen kontroller; eleme nedeni ya da None"""
+        if self.min_det_score and face.det_score is not None and float(face.det_score) < self.min_det_score:
+            return 'det_score'
+        if self.min_face_size and face_size(face) < self.min_face_size:
+            return 'size'
+        if self.max_yaw:
+            yaw = estimate_yaw(face.kps)
+            if yaw is not None and abs(yaw) > self.max_yaw:
+                return 'pose'
+        return None
+
+    def check_crop(self, crop):
+        """Hizalanmış kırpıntı kontrolü; eleme nedeni ya da None"""
+        if self.min_sharpness and sharpness(crop) < self.min_sharpness:
+            return 'blur'
+        return None
+
+    def filter_detections(self, faces):
+        """(kalan yüzler, {neden: sayı})"""
+        kept, rejected = [], {}
+        for face in faces:
+            reason = self.check_detection(face)
+            if reason is None:
+                kept.append(face)
+            else:
+                rejected[reason] = rejected.get(reason, 0) + 1
+        return kept, rejected
+
+    def filter_crops(self, faces, crops, rejected):
+        """Bulanık kırpıntıları ele; (yüzler, kırpıntılar) döndürür, rejected yerinde güncellenir"""
+        if not self.min_sharpness:
+            return faces, crops
+        kept_faces, kept_crops = [], []
+        for face, crop in zip(faces, crops):
+            reason = self.check_crop(crop)
+            if reason is None:
+                kept_faces.append(face)
+                kept_crops.append(crop)
+            else:
+                rejected[reason] = rejected.get(reason, 0) + 1
+        return kept_faces, kept_crops
+
+
+def format_rejections(rejected):
+    """{'size': 3, 'blur': 1} -> '3 küçük, 1 bulanık'"""
+    return ", ".join(f"{rejected[reason]} {QUALITY_LABELS[reason]}" for reason in QUALITY_REASONS
+                     if rejected.get(reason))
+
+
+def quality_summary(quality, checked_faces, rejected, prefiltered_images=0):
+    """model_info.json 'quality' alanı: eşikler ve eleme istatistikleri
+
+    prefiltered_images: önbellekten gelen resimler; yüzleri önbelleğe yazılırken aynı
+    eşiklerle elenmişti, eleme sayıları bu eğitimde yeniden hesaplanmaz.
+    """
+    rejected_faces = sum(rejected.values())
+    return {
+        **quality.settings,
+        'checked_faces': checked_faces,
+        'prefiltered_images': prefiltered_images,
+        'accepted_faces': checked_faces - rejected_faces,
+        'rejected_faces': rejected_faces,
+        'rejected_share': round(rejected_faces / checked_faces, 4) if checked_faces else 0.0,
+        'rejected': {reason: rejected.get(reason, 0) for reason in QUALITY_REASONS}
+    }
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+🗜️ Buffalo-L Nicemlenmiş Embedding'ler
+float32 embedding yüz başına 2 KB'dir; büyük modellerde eşleştirme bellek
+bant genişliğiyle sınırlanır. int8 formatında satırlar normalize edilip
+boyut başına ölçekle (scale[d] = o boyuttaki en büyük |değer| / 127)
+-127..127 aralığına yuvarlanır: yüz başına 512 bayt.
+
+EmbeddingMatrix int8 skorları tamsayı çarpımıyla hesaplar: probe ölçekle
+çarpılıp (p·(s⊙q) = (p⊙s)·q) probe başına ölçekle int8'e yuvarlanır, satırlarla
+int32 toplamlı MatMulInteger (ONNX Runtime, u8×s8 çekirdeği) ile çarpılır;
+float32'ye çevirme, (P, n) devrikleme, ölçekler ve önceden hesaplanmış satır
+normları aynı ONNX grafiğinde uygulanır (NumPy'da devriklemek büyük probe
+gruplarında çarpımdan pahalıydı). Hızlanma probe sayısına bağlıdır: 200 bin
+satırda 1-64 probe'da float32'den ~2-7 kat hızlı, face_batch_match'in
+256-1024 probe'luk bloklarında ~2 kat (bkz. evaluate_quantization). Satırlar
+bellekte uint8 kod (int8 + 128, sıfır noktası 128) olarak tutulur; float32 kopya
+tutulmaz. ONNX Runtime yoksa satırlar önbelleğe sığan bloklar halinde float32'ye
+çevrilip skorlanır (sadece bellek kazancı).
+float16 depolar yüklenirken float32'ye çevrilir: sadece disk boyutu yarıya iner
+(NumPy'ın float16 aritmetiği SIMD'siz ve float32 taramadan yavaştır).
+
+evaluate_quantization eğitim sonunda nicemlenmiş depoyu ara depodaki float32
+embedding'lerle karşılaştırır: ayrılan yüzler probe olarak kullanılır (kendi
+satırları hariç), skor hatası, eşik kararları, recall@k ve aynı probe'larla
+ölçülen tarama süreleri (float32'ye göre hızlanma) raporlanır.
+"""
+import time
+
+import numpy as np
+
+QUANTIZED_DTYPES = ('int8',)
+INT8_LEVELS = 127
+INT8_OFFSET = 128               # Bellekteki uint8 kod = int8 değer + 128 (MatMulInteger sıfır noktası)
+DEFAULT_SCORE_BLOCK = 256       # Dönüştürme bloğu (satır); float32 hali L2 önbelleğe sığar
+INTEGER_SCORE_BLOCK = 4096      # Tamsayı çarpımı bloğunda en fazla satır
+INTEGER_SCORE_BYTES = 1 << 20   # Tamsayı çarpımı bloğunun (P, n) float32 sonucu; devrikleme önbellekte kalır
+DEFAULT_HELD_OUT = 200          # Doğruluk ölçümünde probe olarak ayrılan yüz sayısı
+DEFAULT_EVAL_THRESHOLD = 0.3    # Eşik kararlarının karşılaştırıldığı eşleştirme eşiği (sunucu varsayılanı)
+DEFAULT_SPEED_ROWS = 100000     # Tarama hızı ölçümünde kullanılan en fazla satır (float32 kopyası ~200 MB)
+
+
+def _normalized(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def quantization_scale(blocks, dim):
+    """Normalize satırlardan boyut başına int8 ölçeği (bloklar bir kez okunur)"""
+    peak = np.zeros(dim, dtype=np.float32)
+    for block in blocks:
+        if len(block):
+            np.maximum(peak, np.abs(_normalized(block)).max(axis=0), out=peak)
+    # Hiç kullanılmayan boyutlarda sıfıra bölme olmasın
+    peak[peak == 0] = 1.0
+    return peak / INT8_LEVELS
+
+
+def quantize_int8(block, scale):
+    """Satırları normalize edip boyut başına ölçekle int8'e yuvarla"""
+    scaled = np.rint(_normalized(block) / scale)
+    return np.clip(scaled, -INT8_LEVELS, INT8_LEVELS).astype(np.int8)
+
+
+def dequantize(block, scale=None):
+    """Depo satırlarını float32'ye çevir (int8 için ölçekle çarp)"""
+    block = np.asarray(block, dtype=np.float32)
+    return block * scale if scale is not None else block
+
+
+_integer_matmul_session = None
+
+
+def integer_matmul_session():
+    """(n, D) uint8 kod × (D, P) int8 çarpıp (P, n) float32 skor döndüren ONNX Runtime oturumu; kurulamıyorsa None
+
+    Skor = float(çarpım)ᵀ * steps (P, 1) * inv_norms (1, n); |çarpım| <= 127·127·D < 2^24 olduğundan
+    float32'ye tam çevrilir.
+    """
+    global _integer_matmul_session
+    if _integer_matmul_session is None:
+        try:
+            import onnxruntime
+            from onnx import TensorProto, helper
+        except ImportError:
+            _integer_matmul_session = False
+            return None
+        graph = helper.make_graph(
+            [helper.make_node('MatMulInteger', ['rows', 'probes', 'row_zero_point'], ['products']),
+             helper.make_node('Cast', ['products'], ['float_products'], to=TensorProto.FLOAT),
+             helper.make_node('Transpose', ['float_products'], ['probe_products'], perm=[1, 0]),
+             helper.make_node('Mul', ['probe_products', 'steps'], ['probe_scores']),
+             helper.make_node('Mul', ['probe_scores', 'inv_norms'], ['scores'])], 'int8_scores',
+            [helper.make_tensor_value_info('rows', TensorProto.UINT8, ['n', 'dim']),
+             helper.make_tensor_value_info('probes', TensorProto.INT8, ['dim', 'probes']),
+             helper.make_tensor_value_info('steps', TensorProto.FLOAT, ['probes', 1]),
+             helper.make_tensor_value_info('inv_norms', TensorProto.FLOAT, [1, 'n'])],
+            [helper.make_tensor_value_info('scores', TensorProto.FLOAT, ['probes', 'n'])],
+            initializer=[helper.make_tensor('row_zero_point', TensorProto.UINT8, [], [INT8_OFFSET])]
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 10)])
+        model.ir_version = 7  # Eski ONNX Runtime sürümleri de açabilsin
+        try:
+            _integer_matmul_session = onnxruntime.InferenceSession(model.SerializeToString(),
+                                                                   providers=['CPUExecutionProvider'])
+        except Exception:
+            _integer_matmul_session = False
+    return _integer_matmul_session or None
+
+
+def quantize_probes(probes, scale):
+    """(P, D) probe'ları ölçekle çarpıp probe başına ölçekle int8'e yuvarla: (D, P) kodlar ve (P,) adımlar"""
+    weighted = probes * scale
+    steps = np.abs(weighted).max(axis=1) / INT8_LEVELS
+    steps[steps == 0] = 1.0
+    codes = np.rint(weighted / steps[:, None]).astype(np.int8)
+    return np.ascontiguousarray(codes.T), steps.astype(np.float32)
+
+
+class EmbeddingMatrix:
+    """Eşleştirme matrisi: normalize float32 ya da int8 (boyut başına ölçekli) satırlar üzerinde cosine skorları"""
+
+    def __init__(self, data, scale=None, block_rows=DEFAULT_SCORE_BLOCK):
+        self.block_rows = max(1, block_rows)
+        if scale is None:
+            self.data = _normalized(data)  # (N, D) float32
+            self.scale = None
+            self.inv_norms = None
+            self.session = None
+            return
+
+        # int8 satırlar uint8 kod olarak (int8 + 128; memmap ise tek geçişte belleğe okunur)
+        self.data = np.bitwise_xor(np.asarray(data, dtype=np.int8).view(np.uint8), np.uint8(INT8_OFFSET))
+        self.scale = np.asarray(scale, dtype=np.float32)
+        norms = np.empty(len(self.data), dtype=np.float32)
+        for start in range(0, len(self.data), 4096):
+            rows = self.int8_rows(slice(start, start + 4096))
+            norms[start:start + 4096] = np.linalg.norm(rows * self.scale, axis=1)
+        self.inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.session = integer_matmul_session()
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def dim(self):
+        return self.data.shape[1]
+
+    @property
+    def dtype(self):
+        return 'int8' if self.scale is not None else 'float32'
+
+    @property
+    def integer_scoring(self):
+        """Skorlar tamsayı çarpımıyla mı hesaplanıyor (int8 ve ONNX Runtime varsa)"""
+        return self.scale is not None and self.session is not None
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.inv_norms.nbytes if self.inv_norms is not None else 0)
+
+    def dot(self, probes, start=0, stop=None):
+        """Normalize (P, D) probe'ların [start, stop) satırlarıyla (P, n) cosine benzerlikleri"""
+        stop = len(self.data) if stop is None else min(stop, len(self.data))
+        if self.scale is None:
+            return probes @ self.data[start:stop].T
+
+        if stop <= start:
+            return np.empty((len(probes), 0), dtype=np.float32)
+        if self.session is None:
+            return self._widened_dot(probes, start, stop)
+
+        codes, steps = quantize_probes(probes, self.scale)
+        steps = steps[:, None]
+        block_rows = max(1, min(INTEGER_SCORE_BLOCK, INTEGER_SCORE_BYTES // (4 * max(1, len(probes)))))
+        scores = np.empty((len(probes), stop - start), dtype=np.float32)
+        for block_start in range(start, stop, block_rows):
+            block_stop = min(block_start + block_rows, stop)
+            scores[:, block_start - start:block_stop - start] = self.session.run(None, {
+                'rows': self.data[block_start:block_stop], 'probes': codes, 'steps': steps,
+                'inv_norms': self.inv_norms[None, block_start:block_stop]
+            })[0]
+        return scores
+
+    def _widened_dot(self, probes, start, stop):
+        """ONNX Runtime yoksa: satırları bloklar halinde float32'ye çevirip skorla"""
+        weighted = probes * self.scale
+        scores = np.empty((len(probes), stop - start), dtype=np.float32)
+        buffer = np.empty((self.block_rows, self.dim), dtype=np.float32)
+        for block_start in range(start, stop, self.block_rows):
+            block = self.int8_rows(slice(block_start, min(block_start + self.block_rows, stop)))
+            converted = buffer[:len(block)]
+            np.copyto(converted, block, casting='unsafe')
+            scores[:, block_start - start:block_start - start + len(block)] = weighted @ converted.T
+        scores *= self.inv_norms[start:stop]
+        return scores
+
+    def row_dot(self, probe, rows):
+        """Tek (normalize) probe'un seçilen satırlarla cosine benzerlikleri"""
+        if self.scale is None:
+            return self.data[rows] @ probe
+        return (dequantize(self.int8_rows(rows)) @ (probe * self.scale)) * self.inv_norms[rows]
+
+    def to_float32(self, start=0, stop=None):
+        """Normalize float32 satırlar (nicemlenmişse çözülmüş kopya)"""
+        if self.scale is None:
+            return self.data[start:stop]
+        return _normalized(dequantize(self.int8_rows(slice(start, stop)), self.scale))
+
+    def int8_rows(self, rows):
+        """Seçilen satırların int8 değerleri (uint8 kodlardan)"""
+        return np.bitwise_xor(self.data[rows], np.uint8(INT8_OFFSET)).view(np.int8)
+
+
+def _best_ms(function, repeat=3):
+    """Isınmadan sonra en iyi çalışma süresi (ms)"""
+    function()
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000.0
+
+
+def evaluate_quantization(reference_blocks, matrix, held_out=DEFAULT_HELD_OUT, threshold=DEFAULT_EVAL_THRESHOLD, k=10,
+                          seed=0, speed_rows=DEFAULT_SPEED_ROWS):
+    """Nicemlenmiş matrisi float32 referansa göre ayrılan yüzlerle ölç
+
+    reference_blocks: matrisle aynı satır sırasında float32 blokları üreten,
+    iki kez çağrılabilen fonksiyon. Ayrılan her yüz probe olur; kendi satırı
+    karşılaştırmadan çıkarılır. Tarama hızı ilk speed_rows satırda, aynı
+    probe'larla float32 matris çarpımına karşı ölçülür.
+    """
+    count = len(matrix)
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(count, min(held_out, count), replace=False)) if count else np.empty(0, dtype=np.int64)
+    if len(rows) == 0 or count < 2:
+        return None
+
+    probes = np.empty((len(rows), matrix.dim), dtype=np.float32)
+    speed_blocks = []
+    offset = 0
+    for block in reference_blocks():
+        inside = (rows >= offset) & (rows < offset + len(block))
+        probes[inside] = block[rows[inside] - offset]
+        if offset < speed_rows:
+            speed_blocks.append(_normalized(block[:speed_rows - offset]))
+        offset += len(block)
+    probes = _normalized(probes)
+
+    speed_reference = np.concatenate(speed_blocks)
+    reference_ms = _best_ms(lambda: probes @ speed_reference.T)
+    quantized_ms = _best_ms(lambda: matrix.dot(probes, 0, len(speed_reference)))
+    del speed_reference, speed_blocks
+
+    k = min(k, count - 1)
+    probe_index = np.arange(len(rows))
+    top = {'reference': (np.full((len(rows), 0), -np.inf, dtype=np.float32), np.empty((len(rows), 0), np.int64)),
+           'quantized': (np.full((len(rows), 0), -np.inf, dtype=np.float32), np.empty((len(rows), 0), np.int64))}
+    max_error = error_sum = 0.0
+    pairs = reference_hits = quantized_hits = both_hits = 0
+    offset = 0
+    for block in reference_blocks():
+        scores = {
+            'reference': probes @ _normalized(block).T,
+            'quantized': matrix.dot(probes, offset, offset + len(block))
+        }
+        inside = (rows >= offset) & (rows < offset + len(block))
+        for values in scores.values():
+            values[probe_index[inside], rows[inside] - offset] = -np.inf  # Kendi satırı
+
+        valid = np.isfinite(scores['reference'])
+        error = np.abs(scores['reference'][valid] - scores['quantized'][valid])
+        if len(error):
+            max_error = max(max_error, float(error.max()))
+            error_sum += float(error.sum())
+            pairs += len(error)
+        reference_hit = scores['reference'] >= threshold
+        quantized_hit = scores['quantized'] >= threshold
+        reference_hits += int(reference_hit.sum())
+        quantized_hits += int(quantized_hit.sum())
+        both_hits += int((reference_hit & quantized_hit).sum())
+
+        # Probe başına en iyi k satırı blok blok güncelle
+        for name, values in scores.items():
+            best_scores, best_rows = top[name]
+            merged_scores = np.concatenate([best_scores, values], axis=1)
+            merged_rows = np.concatenate([best_rows, np.broadcast_to(np.arange(offset, offset + len(block)),
+                                                                      values.shape)], axis=1)
+            if merged_scores.shape[1] > k:
+                keep = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+                merged_scores = np.take_along_axis(merged_scores, keep, axis=1)
+                merged_rows = np.take_along_axis(merged_rows, keep, axis=1)
+            top[name] = (merged_scores, merged_rows)
+        offset += len(block)
+
+    overlap = sum(len(np.intersect1d(reference, quantized))
+                  for reference, quantized in zip(top['reference'][1], top['quantized'][1]))
+    return {
+        "held_out": len(rows),
+        "max_abs_error": round(max_error, 6),
+        "mean_abs_error": round(error_sum / pairs, 7) if pairs else 0.0,
+        "threshold": threshold,
+        "threshold_recall": round(both_hits / reference_hits, 4) if reference_hits else 1.0,
+        "threshold_precision": round(both_hits / quantized_hits, 4) if quantized_hits else 1.0,
+        "top_k": k,
+        "recall_at_k": round(overlap / float(k * len(rows)), 4) if k else 1.0,
+        "integer_scoring": matrix.integer_scoring,
+        "scan_rows": min(speed_rows, count),
+        "reference_scan_ms": round(reference_ms, 3),
+        "quantized_scan_ms": round(quantized_ms, 3),
+        "scan_speedup": round(reference_ms / quantized_ms, 2) if quantized_ms > 0 else None
+    }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+🧩 Buffalo-L Parçalı (Shard) Modeller
+Çok büyük arşivlerde tek embedding matrisi hem yüklemeyi hem taramayı tek
+çekirdeğe bağlar ve küçük bir güncelleme tüm depoyu yeniden yazdırır. Parçalı
+modelde yüzler dosya yoluna göre N parçaya bölünür; her parça shards/<ad>/
+altında kendi face_embeddings.bin + face_index.json deposu (ve varsa ANN
+indeksi/kimlik kümeleri) ile tam bir mini modeldir. Eşleştirici parçaları
+paralel yükleyip sorgular ve sonuçları birleştirir (bkz. face_matcher).
+
+Bölme stratejileri (bir dosyanın tüm yüzleri her zaman aynı parçadadır):
+- hash   : sha1(relative_path) % N
+- folder : üst klasör başına bir parça (kökteki dosyalar "_root"); N verilirse
+           üst klasör adı N parçaya hash'lenir (klasörler bölünmez)
+
+face_shards.json (model_info.json 'shards' alanına da yazılır) parça listesini,
+her parçanın dosya/yüz sayısını ve içerik özetini (fingerprint) tutar. Artımlı
+eğitimde özeti ve seçenekleri değişmeyen parçalar yeniden yazılmaz;
+ShardedFaceMatcher.refresh() de sadece özeti değişen parçaları yeniden yükler.
+"""
+import hashlib
+import os
+import re
+import shutil
+
+from face_ann import ANN_FILE
+from face_clusters import remove_face_clusters
+from face_store import (
+    EMBEDDINGS_FILE, INDEX_FILE, SHARDS_FILE, SHARDS_VERSION, load_shard_manifest, write_json_atomic
+)
+
+SHARD_STRATEGIES = ('hash', 'folder')
+SHARDS_DIR = "shards"
+ROOT_SHARD = "_root"
+DEFAULT_SHARD_COUNT = 8
+
+
+def _hash_bucket(text, count):
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8], 16) % count
+
+
+def shard_of(relative_path, strategy='hash', count=DEFAULT_SHARD_COUNT):
+    """Dosyanın parça adı"""
+    if strategy == 'hash':
+        return f"{_hash_bucket(relative_path, count):03d}"
+    if strategy != 'folder':
+        raise ValueError(f"Desteklenmeyen parçalama stratejisi: {strategy}")
+    folder = relative_path.split('/', 1)[0] if '/' in relative_path else ROOT_SHARD
+    return f"{_hash_bucket(folder, count):03d}" if count else folder
+
+
+def plan_shards(manifest, strategy='hash', count=DEFAULT_SHARD_COUNT):
+    """{parça adı: sıralı dosya listesi}; hash stratejisinde boş parçalar da listelenir"""
+    groups = {f"{number:03d}": [] for number in range(count)} if strategy == 'hash' else {}
+    for relative_path in sorted(manifest):
+        groups.setdefault(shard_of(relative_path, strategy, count), []).append(relative_path)
+    return dict(sorted(groups.items()))
+
+
+def shard_dir_names(names):
+    """Parça adlarından güvenli, çakışmayan klasör yolları (shards/<ad>)"""
+    dirs, used = {}, set()
+    for name in names:
+        base = re.sub(r'[^A-Za-z0-9_.-]', '_', name).lstrip('.') or '_'
+        safe, suffix = base, 1
+        while safe.lower() in used:  # Büyük/küçük harf duyarsız dosya sistemleri için
+            suffix += 1
+            safe = f"{base}-{suffix}"
+        used.add(safe.lower())
+        dirs[name] = f"{SHARDS_DIR}/{safe}"
+    return dirs
+
+
+def shard_fingerprint(paths, manifest):
+    """Parçadaki dosyaların yol + içerik özetinden parça özeti"""
+    digest = hashlib.sha1()
+    for relative_path in paths:
+        digest.update(f"{relative_path}\0{manifest[relative_path].get('sha1', '')}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def remove_root_store(model_dir):
+    """Parçalı modele geçerken kökteki tek parça depoyu ve indekslerini sil"""
+    for name in (EMBEDDINGS_FILE, INDEX_FILE, ANN_FILE):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    remove_face_clusters(model_dir)
+
+
+def remove_shards(model_dir):
+    """Tek parça modele geçerken parça listesini ve klasörlerini sil"""
+    path = os.path.join(model_dir, SHARDS_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+    if os.path.isdir(os.path.join(model_dir, SHARDS_DIR)):
+        shutil.rmtree(os.path.join(model_dir, SHARDS_DIR))
+
+
+def write_shards(staged, model_dir, strategy='hash', count=DEFAULT_SHARD_COUNT, dtype='float32', options=None):
+    """Ara depoyu parça depolarına yaz; (parça listesi, yeniden yazılan parça adları)
+
+    options: parça indekslerini etkileyen kayıt seçenekleri (ANN, kümeler); bunlar, strateji
+    ve tip aynıysa içerik özeti değişmeyen parçalar olduğu gibi bırakılır.
+    Parça listesi (face_shards.json) indeksler kurulduktan sonra write_shard_manifest ile yazılır.
+    """
+    if strategy == 'hash' and count < 1:
+        raise ValueError("hash parçalama için parça sayısı en az 1 olmalı")
+    manifest = staged.manifest
+    groups = plan_shards(manifest, strategy, count)
+    dirs = shard_dir_names(groups)
+    settings = {'strategy': strategy, 'count': count, 'dtype': dtype, 'options': options or {}}
+
+    previous = load_shard_manifest(model_dir) or {}
+    reusable = {}
+    if all(previous.get(field) == value for field, value in settings.items()):
+        reusable = {shard['name']: shard for shard in previous['shards']}
+
+    shards, rewrite, owners = [], {}, {}
+    for name, paths in groups.items():
+        fingerprint = shard_fingerprint(paths, manifest)
+        old = reusable.get(name)
+        if (old is not None and old['fingerprint'] == fingerprint and old['dir'] == dirs[name]
+                and os.path.exists(os.path.join(model_dir, dirs[name], INDEX_FILE))):
+            shards.append(old)
+            continue
+        shard_dir = os.path.join(model_dir, dirs[name])
+        os.makedirs(shard_dir, exist_ok=True)
+        rewrite[name] = shard_dir
+        owners.update((relative_path, name) for relative_path in paths)
+        shards.append({'name': name, 'dir': dirs[name], 'files': len(paths), 'faces': 0,
+                       'fingerprint': fingerprint, 'ann': None, 'clusters': None})
+
+    counts = staged.finalize_shards(rewrite, owners.get, dtype=dtype)
+    for shard in shards:
+        if shard['name'] in counts:
+            shard['faces'] = counts[shard['name']]
+
+    # Artık kullanılmayan parça klasörleri ve kökteki eski tek parça depo
+    shards_root = os.path.join(model_dir, SHARDS_DIR)
+    kept = {os.path.basename(shard['dir']) for shard in shards}
+    for entry in os.listdir(shards_root):
+        if entry not in kept:
+            shutil.rmtree(os.path.join(shards_root, entry), ignore_errors=True)
+    remove_root_store(model_dir)
+
+    return {'version': SHARDS_VERSION, **settings, 'faces': sum(shard['faces'] for shard in shards),
+            'shards': shards}, list(rewrite)
+
+
+def write_shard_manifest(model_dir, shard_manifest):
+    """face_shards.json yaz (parça depoları ve indeksleri yazıldıktan sonra; okuyucular için commit işareti)"""
+    write_json_atomic(os.path.join(model_dir, SHARDS_FILE), shard_manifest, indent=2, ensure_ascii=False)
+    return SHARDS_FILE
+
+
+def shard_summary(shard_manifest):
+    """model_info.json 'shards' alanı: parça listesi (özetler ve indeks ayrıntıları olmadan)"""
+    return {
+        'strategy': shard_manifest['strategy'],
+        'count': len(shard_manifest['shards']),
+        'file': SHARDS_FILE,
+        'shards': [{'name': shard['name'], 'dir': shard['dir'], 'files': shard['files'], 'faces': shard['faces']}
+                   for shard in shard_manifest['shards']]
+    }
+
+
+def describe_shards(shard_manifest):
+    """Log için kısa özet: '8 parça (hash), 120-141 yüz/parça'"""
+    faces = [shard['faces'] for shard in shard_manifest['shards']]
+    return (f"{len(faces)} parça ({shard_manifest['strategy']}), "
+            f"{min(faces, default=0)}-{max(faces, default=0)} yüz/parça")
+
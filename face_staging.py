@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+🧱 Buffalo-L Eğitim Ara Deposu
+Eğitim sırasında üretilen yüzleri bellekte biriktirmek yerine parça (chunk)
+parça models/.staging/<model_adı>/ altına yazar. Her parça:
+- chunk_000001.bin  : (n, 512) float32 embedding matrisi
+- chunk_000001.json : anahtar/path/bbox/kps/confidence sütunları ve parçadaki
+                      dosyaların manifest kayıtları (parçanın commit işareti)
+Önce .bin, sonra .json geçici dosyadan yerine taşınır; .json'u olmayan parça
+hiç yazılmamış sayılır. Yarıda kalan eğitim aynı klasör ve model adıyla
+yeniden başlatılırsa commit edilmiş dosyalar atlanır; yüzleri etkileyen
+ayarlar (küçültülmüş çözme, kalite eşikleri, kopya eleme, alt klasörler)
+değişmişse ara depo silinip baştan başlanır.
+
+Bir dosyanın yüzleri ve manifest kaydı her zaman aynı parçadadır; bir dosya
+birden fazla parçada geçiyorsa (yeniden işlenmişse) en son parça geçerlidir.
+Artımlı eğitimde eski modelden aktarılan yüzler "previous" parçalarına yazılır;
+bu dosyaların manifest kayıtları previous_manifest.json'dadır ve aynı dosya
+sonradan yeniden işlenirse eski yüzleri sonuca girmez.
+
+Parçalı (shard) modellerde finalize_shards aynı satırları dosya yoluna göre
+parça depolarına dağıtır; ara depo yine tek geçişte okunur.
+"""
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+
+from face_quant import QUANTIZED_DTYPES, quantization_scale
+from face_store import MODELS_DIR, EmbeddingStoreWriter, write_embedding_store, write_json_atomic
+
+STAGING_DIR = os.path.join(MODELS_DIR, ".staging")
+STAGING_META = "staging.json"
+PREVIOUS_MANIFEST = "previous_manifest.json"
+STAGING_VERSION = 2
+DEFAULT_CHUNK_FILES = 256
+DEFAULT_CHUNK_FACES = 4096
+
+
+class StagedFaceDatabase:
+    """Diske parça parça yazılan yüz veritabanı"""
+
+    def __init__(self, staging_dir, meta, dim=512, chunk_files=DEFAULT_CHUNK_FILES, chunk_faces=DEFAULT_CHUNK_FACES):
+        self.staging_dir = staging_dir
+        self.meta = meta
+        self.dim = dim
+        self.chunk_files = chunk_files
+        self.chunk_faces = chunk_faces
+        self.manifest = {}          # relative_path -> manifest kaydı (commit edilmiş + bekleyen)
+        self._chunk_paths = []      # Her parçadaki dosyalar (en son parça kazanır; previous parçada None)
+        self._forgotten = set()     # Artık diskte olmayan/değişmiş dosyalar (sonuca alınmaz)
+        self._reset_pending()
+
+    @classmethod
+    def open(cls, model_name, folder_path, incremental, options=None, staging_root=STAGING_DIR, **kwargs):
+        """Ara depoyu aç; aynı eğitim aynı ayarlarla yarım kaldıysa kaldığı yerden devam et
+
+        options: üretilen yüzleri etkileyen pipeline ayarları (JSON'a yazılabilir);
+        önceki koşudan farklıysa eski parçalar atılır. (depo, devam_ediliyor_mu) döndürür.
+        """
+        staging_dir = os.path.join(staging_root, model_name)
+        meta = {
+            'version': STAGING_VERSION,
+            'model_name': model_name,
+            'folder_path': os.path.abspath(folder_path),
+            'incremental': bool(incremental),
+            'options': json.loads(json.dumps(options or {}))  # Okunan meta ile aynı tiplerle karşılaştır
+        }
+
+        meta_path = os.path.join(staging_dir, STAGING_META)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                previous_meta = json.load(f)
+            if previous_meta == meta:
+                staged = cls(staging_dir, meta, **kwargs)
+                staged._load_committed()
+                return staged, True
+
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+        os.makedirs(staging_dir)
+        write_json_atomic(meta_path, meta)
+        return cls(staging_dir, meta, **kwargs), False
+
+    def __len__(self):
+        return sum(1 for _ in self._effective_rows())
+
+    @property
+    def committed_chunks(self):
+        return len(self._chunk_paths)
+
+    def has_previous_import(self):
+        """Artımlı eğitimde eski modelin değişmeyen yüzleri zaten aktarıldı mı"""
+        return os.path.exists(os.path.join(self.staging_dir, PREVIOUS_MANIFEST))
+
+    def add_face(self, key, record):
+        """Bekleyen parçaya bir yüz ekle"""
+        self._keys.append(key)
+        self._paths.append(record.get('path', ''))
+        self._bboxes.append(record.get('bbox'))
+        self._kps.append(record.get('kps'))
+        self._confidences.append(float(record.get('confidence', 0.95)))
+        self._embeddings.append(np.asarray(record['embedding'], dtype=np.float32).ravel())
+
+    def add_file(self, relative_path, entry):
+        """Dosyanın manifest kaydını bekleyen parçaya ekle (yüzleri eklendikten sonra)"""
+        self._files[relative_path] = entry
+        self.manifest[relative_path] = entry
+        self._forgotten.discard(relative_path)
+
+    def maybe_commit(self):
+        """Bekleyen parça yeterince büyüdüyse diske yaz"""
+        if len(self._files) >= self.chunk_files or len(self._keys) >= self.chunk_faces:
+            self.commit()
+
+    def commit(self, previous=False):
+        """Bekleyen yüzleri ve manifest kayıtlarını yeni bir parça olarak kalıcı yaz"""
+        if not self._files and not self._keys:
+            return
+        number = len(self._chunk_paths) + 1
+        base = os.path.join(self.staging_dir, f"chunk_{number:06d}")
+
+        matrix = np.stack(self._embeddings) if self._embeddings else np.empty((0, self.dim), dtype=np.float32)
+        with open(base + '.bin.tmp', 'wb') as f:
+            matrix.astype('<f4').tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(base + '.bin.tmp', base + '.bin')
+
+        write_json_atomic(base + '.json', {
+            'count': len(self._keys),
+            'keys': self._keys,
+            'paths': self._paths,
+            'bboxes': self._bboxes,
+            'kps': self._kps,
+            'confidences': self._confidences,
+            'files': self._files,
+            'previous': previous
+        }, ensure_ascii=False)
+
+        self._chunk_paths.append(None if previous else set(self._files))
+        self._reset_pending()
+
+    def import_previous(self, previous_database, previous_manifest):
+        """Artımlı eğitimde eski modelin değişmeyen dosyalarına ait yüzleri aktar
+
+        previous_database items() sağlayan bir kaynaktır (EmbeddingStore/sözlük);
+        satırlar sırayla okunur, bellekte sadece bekleyen parça tutulur.
+        previous_manifest: değişmeyen dosyaların manifest kayıtları.
+        """
+        self.commit()
+        for key, record in previous_database.items():
+            if record.get('path') in previous_manifest:
+                self.add_face(key, record)
+                if len(self._keys) >= self.chunk_faces:
+                    self.commit(previous=True)
+        self.commit(previous=True)
+
+        # Aktarım tamamlandı işareti; yarıda kesilirse devamda baştan aktarılır
+        write_json_atomic(os.path.join(self.staging_dir, PREVIOUS_MANIFEST), previous_manifest, ensure_ascii=False)
+        self._apply_previous_manifest(previous_manifest)
+
+    def forget(self, relative_paths):
+        """Commit edilmiş ama artık geçerli olmayan dosyaları sonuçtan çıkar"""
+        for relative_path in relative_paths:
+            self.manifest.pop(relative_path, None)
+            self._forgotten.add(relative_path)
+
+    def face_paths(self):
+        """Sonuca girecek en az bir yüzü olan dosyalar (commit edilmiş + bekleyen)"""
+        paths = set(self._paths)
+        for _, rows in self._chunk_rows():
+            paths.update(rows['paths'])
+        return paths
+
+    def finalize(self, model_dir, dtype='float32'):
+        """Parçaları binary depo olarak model klasörüne yaz (geçici dosya + yerine taşıma)"""
+        self.commit()
+        columns = {'keys': [], 'paths': [], 'bboxes': [], 'kps': [], 'confidences': []}
+        selections = []
+        for number, rows in self._chunk_rows():
+            selections.append((number, rows['rows'], rows['count']))
+            for column in columns:
+                columns[column].extend(rows[column])
+        scale = None
+        if dtype in QUANTIZED_DTYPES:
+            # int8 ölçeği için parçalar bir kez önceden okunur (tüm matris bellekte kurulmaz)
+            scale = quantization_scale(self._chunk_blocks(selections), self.dim)
+        return write_embedding_store(model_dir, columns, self._chunk_blocks(selections), self.dim, dtype=dtype,
+                                     scale=scale)
+
+    def finalize_shards(self, shard_dirs, shard_of, dtype='float32'):
+        """Parçaları shard başına ayrı binary depolar olarak yaz; shard başına yüz sayısını döndür
+
+        shard_dirs: yazılacak shard adı -> klasör (listede olmayan shard'ların satırları atlanır)
+        shard_of  : relative_path -> shard adı
+        int8 ölçeği yazılan tüm satırlardan ortak hesaplanır (parça başına indekste saklanır).
+        """
+        self.commit()
+        columns = {name: {'keys': [], 'paths': [], 'bboxes': [], 'kps': [], 'confidences': []} for name in shard_dirs}
+        selections = []
+        for number, rows in self._chunk_rows():
+            groups = {}
+            for position, relative_path in enumerate(rows['paths']):
+                name = shard_of(relative_path)
+                if name in shard_dirs:
+                    groups.setdefault(name, []).append(position)
+            for name, positions in groups.items():
+                for column, values in columns[name].items():
+                    values.extend(rows[column][position] for position in positions)
+            selected = [rows['rows'][position] for positions in groups.values() for position in positions]
+            selections.append((number, sorted(selected), rows['count'], groups, rows['rows']))
+
+        scale = None
+        if dtype in QUANTIZED_DTYPES:
+            scale = quantization_scale(self._chunk_blocks([selection[:3] for selection in selections]), self.dim)
+
+        writers = {name: EmbeddingStoreWriter(shard_dir, self.dim, dtype=dtype, scale=scale)
+                   for name, shard_dir in shard_dirs.items()}
+        try:
+            for number, _, count, groups, chunk_rows in selections:
+                if not groups:
+                    continue
+                matrix = np.fromfile(self._chunk_file(number, '.bin'), dtype='<f4').reshape(count, self.dim)
+                for name, positions in groups.items():
+                    writers[name].write(matrix[[chunk_rows[position] for position in positions]])
+        except BaseException:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        for name, writer in writers.items():
+            writer.close(columns[name])
+        return {name: writer.count for name, writer in writers.items()}
+
+    def embedding_blocks(self, include=None):
+        """Sonuca girecek float32 embedding blokları (finalize ile aynı satır sırası)
+
+        include: verilirse sadece bu dosyaların (relative_path kümesi) satırları
+        """
+        selections = []
+        for number, rows in self._chunk_rows():
+            selected = rows['rows']
+            if include is not None:
+                selected = [row for row, relative_path in zip(selected, rows['paths']) if relative_path in include]
+            selections.append((number, selected, rows['count']))
+        return self._chunk_blocks(selections)
+
+    def discard(self):
+        """Ara depoyu sil (başarılı kayıttan ya da vazgeçilen eğitimden sonra)"""
+        if os.path.exists(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+        # Başka yarım eğitim yoksa models/.staging klasörünü de bırakma
+        try:
+            os.rmdir(os.path.dirname(self.staging_dir))
+        except OSError:
+            pass
+
+    def _reset_pending(self):
+        self._keys = []
+        self._paths = []
+        self._bboxes = []
+        self._kps = []
+        self._confidences = []
+        self._embeddings = []
+        self._files = {}
+
+    def _chunk_file(self, number, extension):
+        return os.path.join(self.staging_dir, f"chunk_{number:06d}{extension}")
+
+    def _apply_previous_manifest(self, previous_manifest):
+        # Sonradan işlenen dosyaların kayıtları öncelikli kalır
+        for relative_path, entry in previous_manifest.items():
+            self.manifest.setdefault(relative_path, entry)
+
+    def _load_committed(self):
+        """Commit edilmiş parçaların manifest kayıtlarını oku; yarım parçaları temizle"""
+        previous_manifest_path = os.path.join(self.staging_dir, PREVIOUS_MANIFEST)
+        imported = os.path.exists(previous_manifest_path)
+
+        number = 0
+        while os.path.exists(self._chunk_file(number + 1, '.json')):
+            number += 1
+            with open(self._chunk_file(number, '.json'), 'r', encoding='utf-8') as f:
+                chunk = json.load(f)
+            if chunk.get('previous') and not imported:
+                # Eski model aktarımı yarıda kalmış: aktarım parçalarını at, yeniden aktarılacak
+                self._chunk_paths.append(set())
+                continue
+            self.manifest.update(chunk['files'])
+            self._chunk_paths.append(None if chunk.get('previous') else set(chunk['files']))
+
+        if imported:
+            with open(previous_manifest_path, 'r', encoding='utf-8') as f:
+                self._apply_previous_manifest(json.load(f))
+
+        # Commit işareti (.json) yazılmadan kesilmiş parça artıkları
+        for leftover in glob.glob(os.path.join(self.staging_dir, '*.tmp')):
+            os.remove(leftover)
+        orphan = self._chunk_file(number + 1, '.bin')
+        if os.path.exists(orphan):
+            os.remove(orphan)
+
+    def _latest_chunk(self):
+        """Her dosya için geçerli (en son) parça numarası"""
+        latest = {}
+        for number, paths in enumerate(self._chunk_paths, start=1):
+            for relative_path in paths or ():
+                latest[relative_path] = number
+        return latest
+
+    def _chunk_rows(self):
+        """Her parçadan sonuca girecek satırları (sütunlar + satır numaraları) üret"""
+        latest = self._latest_chunk()
+        for number in range(1, len(self._chunk_paths) + 1):
+            with open(self._chunk_file(number, '.json'), 'r', encoding='utf-8') as f:
+                chunk = json.load(f)
+            if chunk.get('previous') and self._chunk_paths[number - 1] is None:
+                # Eski modelden aktarılan yüzler: dosya yeniden işlenmediyse geçerli
+                selected = [
+                    row for row, relative_path in enumerate(chunk['paths'])
+                    if relative_path not in self._forgotten and relative_path not in latest
+                ]
+            elif chunk.get('previous'):
+                selected = []  # Yarıda kalmış aktarımın parçası
+            else:
+                selected = [
+                    row for row, relative_path in enumerate(chunk['paths'])
+                    if relative_path not in self._forgotten and latest.get(relative_path) == number
+                ]
+            rows = {column: [chunk[column][row] for row in selected]
+                    for column in ('keys', 'paths', 'bboxes', 'kps', 'confidences')}
+            rows['rows'] = selected
+            rows['count'] = chunk['count']
+            yield number, rows
+
+    def _chunk_blocks(self, selections):
+        """Seçilen satırların embedding bloklarını parça parça oku"""
+        for number, selected, count in selections:
+            if not selected:
+                continue
+            matrix = np.fromfile(self._chunk_file(number, '.bin'), dtype='<f4').reshape(count, self.dim)
+            yield matrix[selected]
+
+    def _effective_rows(self):
+        for _, rows in self._chunk_rows():
+            yield from rows['keys']
@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+"""
+💾 Buffalo-L Model Deposu
+models/<model_adı>/ klasöründeki yüz veritabanı ve eğitim manifestini okur/yazar.
+Qt bağımlılığı yoktur; GUI ve yardımcı araçlar tarafından ortak kullanılır.
+
+Binary depo formatı:
+- face_embeddings.bin : (N, 512) little-endian float32/float16/int8 matris (satır = yüz)
+- face_index.json     : anahtar, path, bbox, kps ve confidence sütunları; int8 depoda
+                        boyut başına ölçek (scale, bkz. face_quant)
+- face_aliases.json   : yinelenen fotoğraflar; {yüz_anahtarı: [aynı yüzü içeren diğer fotoğraflar]}
+
+Parçalı (shard) modellerde kökte depo yerine face_shards.json bulunur; her parça
+shards/<ad>/ altında kendi face_embeddings.bin + face_index.json deposudur
+(bkz. face_shards).
+
+Eğitim fotoğrafları üç şekilde saklanabilir (PHOTO_STORAGE_MODES):
+- link : model klasöründe hardlink (olmazsa reflink, o da olmazsa kopya)
+- blobs: paylaşılan içerik adresli depo (photo_blobs/<sha1[:2]>/<sha1>.<uzantı>);
+         model, manifestteki sha1 ile fotoğrafa başvurur. Depo model klasörünün
+         dışında olduğu için sunucuya export_model_archive ile paketlenen ZIP
+         yüklenir; modelin fotoğrafları models/<ad>/photo_blobs/ altına eklenir.
+- copy : eski davranış, tam kopya
+"""
+import json
+import os
+import shutil
+import zipfile
+
+import numpy as np
+
+from face_pipeline import file_content_hash
+from face_quant import QUANTIZED_DTYPES, dequantize, quantization_scale, quantize_int8
+
+MODELS_DIR = "models"
+DATABASE_FILE = "face_database.json"
+EMBEDDINGS_FILE = "face_embeddings.bin"
+INDEX_FILE = "face_index.json"
+MANIFEST_FILE = "training_manifest.json"
+ALIASES_FILE = "face_aliases.json"
+SHARDS_FILE = "face_shards.json"
+MODEL_INFO_FILE = "model_info.json"
+PHOTO_BLOB_DIR = "photo_blobs"
+PHOTO_STORAGE_MODES = ('link', 'blobs', 'copy')
+DEFAULT_PHOTO_STORAGE = 'link'
+FICLONE = 0x40049409  # Linux ioctl: dosyayı copy-on-write klonla (btrfs/xfs)
+MANIFEST_VERSION = 1
+STORE_VERSION = 1
+ALIASES_VERSION = 1
+SHARDS_VERSION = 1
+EMBEDDING_DTYPES = {'float32': '<f4', 'float16': '<f2', 'int8': '<i1'}
+
+
+def relative_image_path(file_path, folder_path):
+    """Models klasörüne uyumlu, forward slash'li relative path"""
+    relative_path = os.path.relpath(file_path, folder_path)
+    # Windows backslash'leri forward slash'e çevir (cross-platform)
+    return relative_path.replace('\\', '/')
+
+
+def has_face_database(model_dir):
+    """Model klasöründe binary depo, parçalı depo veya JSON veritabanı var mı"""
+    return any(os.path.exists(os.path.join(model_dir, name)) for name in (INDEX_FILE, SHARDS_FILE, DATABASE_FILE))
+
+
+def load_face_database(model_dir):
+    """Model veritabanını oku (önce binary/parçalı depo, yoksa JSON); embedding'ler float32"""
+    if os.path.exists(os.path.join(model_dir, INDEX_FILE)):
+        return load_embedding_store(model_dir).to_face_database()
+    if os.path.exists(os.path.join(model_dir, SHARDS_FILE)):
+        return load_sharded_store(model_dir).to_face_database()
+
+    with open(os.path.join(model_dir, DATABASE_FILE), 'r', encoding='utf-8') as f:
+        json_database = json.load(f)
+
+    face_database = {}
+    for key, value in json_database.items():
+        value['embedding'] = np.asarray(value['embedding'], dtype=np.float32)
+        face_database[key] = value
+    return face_database
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """JSON'u geçici dosyaya yazıp yerine taşı (yarım dosya kalmaz)"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_json_database(model_dir, face_database):
+    """Eski sunucularla uyum için face_database.json yaz
+
+    face_database, items() sağlayan herhangi bir kaynak olabilir (sözlük veya
+    EmbeddingStore); kayıtlar tek tek yazıldığı için tüm JSON bellekte kurulmaz.
+    """
+    path = os.path.join(model_dir, DATABASE_FILE)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for position, (key, value) in enumerate(face_database.items()):
+            record = {
+                "embedding": np.asarray(value["embedding"], dtype=np.float32).tolist(),
+                "path": value.get("path", ""),
+                "bbox": value.get("bbox", []),
+                "kps": value.get("kps", None),
+                "confidence": float(value.get("confidence", 0.95))
+            }
+            f.write((',' if position else '') + json.dumps(key, ensure_ascii=False) + ':')
+            json.dump(record, f, ensure_ascii=False)
+        f.write('}')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return DATABASE_FILE
+
+
+class EmbeddingStore:
+    """Binary embedding deposu: bellek eşlemeli matris + sütunlu indeks"""
+
+    def __init__(self, keys, paths, bboxes, kps, confidences, embeddings, scale=None):
+        self.keys = keys
+        self.paths = paths
+        self.bboxes = bboxes
+        self.kps = kps
+        self.confidences = confidences
+        self.embeddings = embeddings  # (N, D) np.memmap ya da ndarray (depodaki tip)
+        self.scale = scale            # int8 depoda boyut başına ölçek, yoksa None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def items(self):
+        """(anahtar, kayıt) çiftlerini sırayla üret; embedding satırları diskten okunur"""
+        for row, key in enumerate(self.keys):
+            yield key, {
+                'embedding': dequantize(self.embeddings[row], self.scale),
+                'path': self.paths[row],
+                'bbox': self.bboxes[row],
+                'kps': self.kps[row],
+                'confidence': self.confidences[row]
+            }
+
+    def float_embeddings(self):
+        """Tüm matris float32 olarak (int8 depoda çözülmüş, normalize satırlar)"""
+        return dequantize(self.embeddings, self.scale)
+
+    def to_face_database(self):
+        """Eğitimde kullanılan {anahtar: kayıt} sözlüğüne çevir"""
+        return dict(self.items())
+
+
+class EmbeddingStoreWriter:
+    """Binary depoyu blok blok yazan yazıcı; close() indeksi yazıp depoyu yerine koyar
+
+    Birden fazla depo (parçalı model) aynı anda, ara depo tek geçişte okunarak yazılabilir.
+    Önce matris, sonra indeks yerine taşınır; okuyucular indeksteki sayıya
+    göre okuduğundan indeks yazılana kadar eski depo tutarlı kalır.
+    """
+
+    def __init__(self, model_dir, dim, dtype='float32', scale=None):
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Desteklenmeyen embedding tipi: {dtype}")
+        if dtype in QUANTIZED_DTYPES and scale is None:
+            raise ValueError("int8 depo için ölçek (scale) gerekli")
+        self.model_dir = model_dir
+        self.dim = dim
+        self.dtype = dtype
+        self.scale = scale
+        self.count = 0
+        self._path = os.path.join(model_dir, EMBEDDINGS_FILE)
+        self._file = open(self._path + '.tmp', 'wb')
+
+    def write(self, block):
+        if self.dtype in QUANTIZED_DTYPES:
+            quantize_int8(block, self.scale).tofile(self._file)
+        else:
+            np.asarray(block, dtype=EMBEDDING_DTYPES[self.dtype]).tofile(self._file)
+        self.count += len(block)
+
+    def close(self, columns):
+        """columns: 'keys', 'paths', 'bboxes', 'kps', 'confidences' listeleri; yazılan dosya adlarını döndürür"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        if self.count != len(columns['keys']):
+            self.abort()
+            raise ValueError(f"Embedding sayısı indeksle uyuşmuyor: {self.count} vs {len(columns['keys'])}")
+
+        index = {
+            'version': STORE_VERSION,
+            'dtype': self.dtype,
+            'count': self.count,
+            'dim': self.dim,
+            'keys': columns['keys'],
+            'paths': columns['paths'],
+            'bboxes': [_rounded(bbox) for bbox in columns['bboxes']],
+            'kps': [_rounded(kps) for kps in columns['kps']],
+            'confidences': [round(float(confidence), 4) for confidence in columns['confidences']]
+        }
+        if self.dtype in QUANTIZED_DTYPES:
+            index['scale'] = np.asarray(self.scale, dtype=np.float32).tolist()
+        os.replace(self._path + '.tmp', self._path)
+        write_json_atomic(os.path.join(self.model_dir, INDEX_FILE), index, ensure_ascii=False, separators=(',', ':'))
+        return {'embeddings': EMBEDDINGS_FILE, 'index': INDEX_FILE}
+
+    def abort(self):
+        """Yarım geçici dosyayı sil (eski depo olduğu gibi kalır)"""
+        self._file.close()
+        if os.path.exists(self._path + '.tmp'):
+            os.remove(self._path + '.tmp')
+
+
+def write_embedding_store(model_dir, columns, blocks, dim, dtype='float32', scale=None):
+    """Binary depoyu parça parça yaz ve atomik olarak yerine koy
+
+    columns: 'keys', 'paths', 'bboxes', 'kps', 'confidences' listeleri
+    blocks : satır sırasıyla (n, dim) float32 embedding blokları
+    scale  : int8 için boyut başına ölçek; verilmezse bloklardan hesaplanır
+    """
+    if dtype in QUANTIZED_DTYPES and scale is None:
+        blocks = list(blocks)
+        scale = quantization_scale(blocks, dim)
+
+    writer = EmbeddingStoreWriter(model_dir, dim, dtype=dtype, scale=scale)
+    try:
+        for block in blocks:
+            writer.write(block)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close(columns)
+
+
+def save_embedding_store(model_dir, face_database, dtype='float32'):
+    """Bellekteki yüz veritabanını binary depo olarak yaz; yazılan dosya adlarını döndür"""
+    keys = list(face_database.keys())
+    dim = len(face_database[keys[0]]['embedding']) if keys else 512
+    matrix = np.empty((len(keys), dim), dtype=np.float32)
+    for row, key in enumerate(keys):
+        matrix[row] = face_database[key]['embedding']
+
+    columns = {
+        'keys': keys,
+        'paths': [face_database[key].get('path', '') for key in keys],
+        'bboxes': [face_database[key].get('bbox') for key in keys],
+        'kps': [face_database[key].get('kps') for key in keys],
+        'confidences': [face_database[key].get('confidence', 0.95) for key in keys]
+    }
+    return write_embedding_store(model_dir, columns, [matrix], dim, dtype=dtype)
+
+
+def load_embedding_store(model_dir, mmap=True):
+    """Binary depoyu yükle; matris varsayılan olarak bellek eşlemeli açılır"""
+    with open(os.path.join(model_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    shape = (index['count'], index['dim'])
+    dtype = np.dtype(EMBEDDING_DTYPES[index['dtype']])
+    embeddings_path = os.path.join(model_dir, EMBEDDINGS_FILE)
+    if shape[0] == 0:
+        embeddings = np.empty(shape, dtype=dtype)
+    elif mmap:
+        embeddings = np.memmap(embeddings_path, dtype=dtype, mode='r', shape=shape)
+    else:
+        embeddings = np.fromfile(embeddings_path, dtype=dtype).reshape(shape)
+
+    scale = np.asarray(index['scale'], dtype=np.float32) if 'scale' in index else None
+    return EmbeddingStore(index['keys'], index['paths'], index['bboxes'], index['kps'],
+                          index['confidences'], embeddings, scale=scale)
+
+
+class ShardedEmbeddingStore:
+    """Parçalı modelin depoları tek kaynak gibi: anahtar/yol sütunları ve items() (parça sırasıyla)
+
+    Matris birleştirilmez; her parçanın embedding'leri kendi (bellek eşlemeli) deposunda kalır.
+    """
+
+    def __init__(self, names, stores):
+        self.names = list(names)
+        self.stores = list(stores)
+        self.keys = [key for store in self.stores for key in store.keys]
+        self.paths = [path for store in self.stores for path in store.paths]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def items(self):
+        for store in self.stores:
+            yield from store.items()
+
+    def to_face_database(self):
+        return dict(self.items())
+
+
+def load_shard_manifest(model_dir):
+    """face_shards.json (parça listesi); parçalı model değilse ya da sürüm uyumsuzsa None"""
+    path = os.path.join(model_dir, SHARDS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('version') == SHARDS_VERSION else None
+
+
+def load_sharded_store(model_dir, mmap=True, manifest=None):
+    """Parçalı modelin tüm parça depolarını (face_shards.json ya da verilen liste sırasıyla) yükle"""
+    manifest = manifest or load_shard_manifest(model_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Parça listesi bulunamadı: {os.path.join(model_dir, SHARDS_FILE)}")
+    shards = manifest['shards']
+    return ShardedEmbeddingStore(
+        [shard['name'] for shard in shards],
+        [load_embedding_store(os.path.join(model_dir, shard['dir']), mmap=mmap) for shard in shards]
+    )
+
+
+def _rounded(values, digits=2):
+    """bbox/kps koordinatlarını indeks boyutu için yuvarla"""
+    if values is None:
+        return None
+    return np.round(np.asarray(values, dtype=np.float64), digits).tolist()
+
+
+def manifest_entry(file_path, sha1):
+    """Manifest kaydı: boyut, değişiklik zamanı ve içerik özeti"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': sha1}
+
+
+def load_manifest(model_dir):
+    """Eğitim manifestini oku ({relative_path: kayıt}); yoksa None"""
+    manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != MANIFEST_VERSION:
+        return None
+    return data.get('files', {})
+
+
+def save_manifest(model_dir, manifest):
+    """Eğitim manifestini kaydet"""
+    write_json_atomic(os.path.join(model_dir, MANIFEST_FILE), {'version': MANIFEST_VERSION, 'files': manifest},
+                      ensure_ascii=False)
+
+
+def build_face_aliases(manifest, keys, paths):
+    """Manifestteki takma adlardan {yüz_anahtarı: [fotoğraflar]} eşlemesi
+
+    duplicate_of: kopya fotoğraf, asıl fotoğrafın tüm yüzlerinin (asıl fotoğrafın yüzleri benzer
+    yüzlerle birleştiyse onların) takma adıdır.
+    face_aliases: fotoğraftaki birleşen yüzler, listelenen tutulan yüzlerin takma adıdır.
+    """
+    keys_by_path = {}
+    for key, path in zip(keys, paths):
+        keys_by_path.setdefault(path, []).append(key)
+    known_keys = set(keys)
+
+    aliases = {}
+    for relative_path in sorted(manifest):
+        entry = manifest[relative_path]
+        original = entry.get('duplicate_of')
+        if original:
+            merged = manifest.get(original, {}).get('face_aliases', ())
+            for key in [*keys_by_path.get(original, ()), *(key for key in merged if key in known_keys)]:
+                aliases.setdefault(key, []).append(relative_path)
+        for key in entry.get('face_aliases', ()):
+            if key in known_keys:
+                aliases.setdefault(key, []).append(relative_path)
+    return aliases
+
+
+def save_face_aliases(model_dir, aliases):
+    """face_aliases.json yaz (takma ad yoksa eski dosyayı sil); dosya adı ya da None"""
+    path = os.path.join(model_dir, ALIASES_FILE)
+    if not aliases:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    write_json_atomic(path, {'version': ALIASES_VERSION, 'aliases': aliases}, ensure_ascii=False)
+    return ALIASES_FILE
+
+
+def load_face_aliases(model_dir):
+    """{yüz_anahtarı: [fotoğraflar]}; dosya yoksa boş sözlük"""
+    path = os.path.join(model_dir, ALIASES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != ALIASES_VERSION:
+        return {}
+    return data.get('aliases', {})
+
+
+def alias_targets(entry):
+    """Manifest kaydının takma ad olarak bağlı olduğu fotoğraflar"""
+    targets = {key.split('||')[0] for key in entry.get('face_aliases', ())}
+    if entry.get('duplicate_of'):
+        targets.add(entry['duplicate_of'])
+    return targets
+
+
+class IncrementalPlan:
+    """Artımlı eğitim planı: hangi dosyalar işlenecek, hangileri korunacak"""
+
+    def __init__(self):
+        self.to_process = []   # Mutlak yollar (yeni + değişen)
+        self.added = []        # Relative path'ler
+        self.modified = []
+        self.deleted = []
+        self.unchanged = set()
+        self.manifest = {}     # Değişmeyen dosyaların (güncel) manifest kayıtları
+
+
+def plan_incremental(files, folder_path, previous_manifest):
+    """Klasörü önceki manifestle karşılaştır
+
+    Boyut ve mtime aynıysa dosya okunmaz; farklıysa içerik özeti
+    karşılaştırılır, böylece sadece dokunulmuş dosyalar yeniden gömülür.
+    Takma adı olduğu fotoğraf değişen/silinen değişmemiş dosyalar da yeniden
+    gömülür (yüzleri o fotoğrafın vektörleriyle temsil ediliyordu).
+    """
+    plan = IncrementalPlan()
+    seen = set()
+    file_paths = {}
+
+    for file_path in files:
+        relative_path = relative_image_path(file_path, folder_path)
+        seen.add(relative_path)
+        file_paths[relative_path] = file_path
+        previous = previous_manifest.get(relative_path)
+
+        if previous is None:
+            plan.added.append(relative_path)
+            plan.to_process.append(file_path)
+            continue
+
+        stat = os.stat(file_path)
+        if stat.st_size == previous.get('size') and stat.st_mtime == previous.get('mtime'):
+            plan.unchanged.add(relative_path)
+            plan.manifest[relative_path] = previous
+            continue
+
+        # Zaman damgası değişmiş olabilir (kopyalama, yeniden yükleme) - içeriğe bak
+        sha1 = file_content_hash(file_path)
+        if stat.st_size == previous.get('size') and sha1 == previous.get('sha1'):
+            plan.unchanged.add(relative_path)
+            plan.manifest[relative_path] = dict(previous, size=stat.st_size, mtime=stat.st_mtime, sha1=sha1)
+        else:
+            plan.modified.append(relative_path)
+            plan.to_process.append(file_path)
+
+    plan.deleted = sorted(set(previous_manifest) - seen)
+
+    # Takma ad bağımlılıkları: asıl fotoğrafı artık değişmemiş kümede olmayanlar yeniden işlenir
+    changed = True
+    while changed:
+        changed = False
+        for relative_path in sorted(plan.unchanged):
+            if alias_targets(plan.manifest[relative_path]) - plan.unchanged:
+                plan.unchanged.discard(relative_path)
+                del plan.manifest[relative_path]
+                plan.modified.append(relative_path)
+                plan.to_process.append(file_paths[relative_path])
+                changed = True
+    return plan
+
+
+def _reflink(source, target):
+    """Copy-on-write klon (destekleyen dosya sistemlerinde veri kopyalanmaz)"""
+    import fcntl
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+
+def place_file(source, target, mode=DEFAULT_PHOTO_STORAGE):
+    """Dosyayı hedefe yerleştir; kullanılan yöntemi ('hardlink'/'reflink'/'copy') döndür
+
+    link : hardlink -> reflink -> kopya. Hardlink kaynakla aynı dosyadır; eğitim
+           klasöründeki fotoğraf yerinde düzenlenirse model kopyası da değişir
+           (artımlı eğitim bunu zaten algılar).
+    blobs: içerik adresli depo değişmemeli, bu yüzden reflink -> kopya.
+    copy : her zaman tam kopya.
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    if mode == 'link':
+        try:
+            os.link(source, target)
+            return 'hardlink'
+        except OSError:
+            pass
+    if mode in ('link', 'blobs'):
+        try:
+            _reflink(source, target)
+            return 'reflink'
+        except (OSError, ImportError):
+            if os.path.lexists(target):
+                os.remove(target)
+    shutil.copy2(source, target)
+    return 'copy'
+
+
+def materialize_photos(training_folder, dest_folder, mode=DEFAULT_PHOTO_STORAGE):
+    """copytree karşılığı: klasör ağacını seçilen yöntemle oluştur; yöntem sayılarını döndür"""
+    counts = {}
+    for root, _, files in os.walk(training_folder):
+        target_root = os.path.join(dest_folder, os.path.relpath(root, training_folder))
+        os.makedirs(target_root, exist_ok=True)
+        for file_name in files:
+            method = place_file(os.path.join(root, file_name), os.path.join(target_root, file_name), mode)
+            counts[method] = counts.get(method, 0) + 1
+    return counts
+
+
+def photo_blob_path(sha1, relative_path, blob_dir=PHOTO_BLOB_DIR):
+    """İçerik adresli depoda fotoğrafın yolu (uzantı korunur)"""
+    extension = os.path.splitext(relative_path)[1].lower()
+    return os.path.join(blob_dir, sha1[:2], sha1 + extension)
+
+
+def store_photo_blobs(training_folder, manifest, blob_dir=PHOTO_BLOB_DIR):
+    """Manifestteki fotoğrafları paylaşılan depoya ekle (olanlar atlanır); yöntem sayılarını döndür"""
+    counts = {}
+    for relative_path, entry in manifest.items():
+        target = photo_blob_path(entry['sha1'], relative_path, blob_dir)
+        if os.path.exists(target):
+            method = 'existing'
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp_path = target + '.tmp'
+            method = place_file(os.path.join(training_folder, relative_path), temp_path, mode='blobs')
+            os.replace(temp_path, target)
+        counts[method] = counts.get(method, 0) + 1
+    return counts
+
+
+def model_photo_storage(model_dir):
+    """model_info.json'daki fotoğraf saklama yöntemi; okunamazsa None"""
+    try:
+        with open(os.path.join(model_dir, MODEL_INFO_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f).get('storage', {}).get('photos')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def export_model_archive(model_dir, archive_path, blob_dir=PHOTO_BLOB_DIR):
+    """Modeli sunucuya yüklenecek ZIP olarak paketle (models/<ad>/...); {'files', 'blobs'} sayıları
+
+    Fotoğrafları paylaşılan içerik deposunda tutan modelde (photos='blobs') manifestteki
+    fotoğraflar models/<ad>/photo_blobs/ altına eklenir. Depoda bulunmayan fotoğraf varsa
+    FileNotFoundError fırlatılır: fotoğrafsız paket sunucuda eşleşmeleri döndüremez.
+    """
+    model_name = os.path.basename(os.path.normpath(model_dir))
+    root = f"{MODELS_DIR}/{model_name}"
+    blobs = {}
+    if model_photo_storage(model_dir) == 'blobs':
+        missing = []
+        for relative_path, entry in (load_manifest(model_dir) or {}).items():
+            source = photo_blob_path(entry['sha1'], relative_path, blob_dir)
+            if os.path.exists(source):
+                blobs[os.path.relpath(source, blob_dir).replace(os.sep, '/')] = source
+            else:
+                missing.append(relative_path)
+        if missing:
+            raise FileNotFoundError(
+                f"İçerik deposunda {len(missing)} fotoğraf yok ({blob_dir}/): {', '.join(sorted(missing)[:5])}"
+            )
+
+    files = 0
+    temp_path = archive_path + '.tmp'
+    with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for folder, dirs, names in os.walk(model_dir):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(folder, name)
+                archive.write(path, f"{root}/{os.path.relpath(path, model_dir).replace(os.sep, '/')}")
+                files += 1
+        # Fotoğraflar zaten sıkıştırılmış; tekrar sıkıştırmak sadece zaman kaybı
+        for name, source in sorted(blobs.items()):
+            archive.write(source, f"{root}/{PHOTO_BLOB_DIR}/{name}", compress_type=zipfile.ZIP_STORED)
+    os.replace(temp_path, archive_path)
+    return {'files': files, 'blobs': len(blobs)}
+
+
+def sync_training_photos(training_folder, dest_folder, plan_changes, mode=DEFAULT_PHOTO_STORAGE):
+    """Artımlı eğitimde model fotoğraf klasörünü sadece değişikliklerle güncelle"""
+    for relative_path in plan_changes.get('deleted', []):
+        target = os.path.join(dest_folder, relative_path)
+        if os.path.exists(target):
+            os.remove(target)
+
+    copied = 0
+    for relative_path in plan_changes.get('added', []) + plan_changes.get('modified', []):
+        target = os.path.join(dest_folder, relative_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        place_file(os.path.join(training_folder, relative_path), target, mode)
+        copied += 1
+    return copied
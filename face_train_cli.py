@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+🖥️ Buffalo-L Komut Satırı Eğitim Aracı
+GUI ile aynı eğitim çekirdeğini (face_training) ekransız çalıştırır; cron veya
+systemd altında kullanılabilir. PyQt5 hiç yüklenmez.
+
+İlerleme stdout'a satır başına bir JSON olay olarak yazılır:
+    {"event": "progress", "percent": 42, "message": "İşleniyor: a.jpg", "time": ...}
+    {"event": "log", "message": "✅ a.jpg: 1 yüz kaydedildi (512D)", "time": ...}
+    {"event": "telemetry", "images_per_sec": 12.5, "stages": {...}, "bottleneck": "input", ...}
+    {"event": "done", "model_dir": "models/ad", "total_faces": 1234, ...}
+    {"event": "error", "message": "..."}
+    {"event": "cancelled", "message": "..."}
+
+SIGINT/SIGTERM eğitimi bir sonraki resimde durdurur (ikinci Ctrl+C hemen
+çıkar); işlenen dosyalar models/.staging/ altında kalır ve aynı komut tekrar
+çalıştırılınca kaldığı yerden devam eder. SIGUSR1 duraklatır, SIGUSR2 devam
+ettirir:  kill -USR1 <pid>
+
+Kullanım (proje kök dizininden; model models/<ad>/ altına yazılır):
+    python face_train_cli.py /yol/fotograflar akparti_genclik_2025 --decode-workers 4 --ann
+    python face_train_cli.py /yol/fotograflar akparti_genclik_2025 --clusters
+    python face_train_cli.py /yol/fotograflar akparti_genclik_2025 --quality --min-face-size 60
+    python face_train_cli.py /yol/fotograflar akparti_genclik_2025 --shards 8 --ann
+    python face_train_cli.py /yol/fotograflar akparti_genclik_2025 --incremental --format binary+json
+    python face_train_cli.py /yol/fotograflar akparti_genclik_2025 --photos blobs --export-zip
+
+Çıkış kodları: 0 başarılı, 1 eğitim hatası (resim/yüz yok), 2 durduruldu, 3 beklenmeyen hata.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+
+from face_cache import CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+from face_clusters import DEFAULT_CLUSTER_SIMILARITY
+from face_dedup import DEFAULT_FACE_SIMILARITY, DEFAULT_MAX_DISTANCE, MAX_DISTANCE_LIMIT
+from face_pipeline import DEFAULT_DETECT_MAX_SIDE, DEFAULT_RECOGNITION_BATCH
+from face_process_pool import default_process_count
+from face_profile import format_summary
+from face_quality import (
+    DEFAULT_MAX_YAW, DEFAULT_MIN_DET_SCORE, DEFAULT_MIN_FACE_SIZE, DEFAULT_MIN_SHARPNESS, FaceQualityFilter
+)
+from face_shards import SHARD_STRATEGIES
+from face_store import DEFAULT_PHOTO_STORAGE, MODELS_DIR, PHOTO_STORAGE_MODES
+from face_training import TrainingCancelled, TrainingError, TrainingJob, save_model
+
+OUTPUT_FORMATS = ('binary', 'binary+json')
+
+
+class ProgressPrinter:
+    """Eğitim geri çağrılarını JSON satırları (ya da düz metin) olarak yazar"""
+
+    def __init__(self, stream=sys.stdout, text=False, min_interval=1.0):
+        self.stream = stream
+        self.text = text
+        self.min_interval = min_interval
+        self._last_percent = None
+        self._last_time = 0.0
+
+    def emit(self, event, **fields):
+        if self.text:
+            message = fields.get('message', '')
+            if event == 'progress':
+                message = f"[{fields['percent']:3d}%] {message}"
+            elif event == 'telemetry':
+                message = f"📊 {format_summary(fields)}"
+            elif event == 'cancelled':
+                message = f"⏹️ {message}"
+            elif event == 'done':
+                message = f"🎉 Model hazır: {fields['model_dir']} ({fields['total_faces']} yüz)"
+            self.stream.write(message + "\n")
+        else:
+            self.stream.write(json.dumps({'event': event, **fields, 'time': round(time.time(), 3)},
+                                         ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def progress(self, message, percent):
+        # Resim başına ilerleme: yüzde değişmedikçe saniyede en fazla bir satır
+        now = time.monotonic()
+        if percent == self._last_percent and now - self._last_time < self.min_interval:
+            return
+        self._last_percent = percent
+        self._last_time = now
+        self.emit('progress', percent=percent, message=message)
+
+    def log(self, message):
+        self.emit('log', message=message)
+
+    def telemetry(self, snapshot):
+        self.emit('telemetry', **snapshot)
+
+
+def install_signal_handlers(control):
+    """Sinyalleri eğitim kontrolüne bağla (iptal / duraklat / devam)"""
+    def cancel(signum, frame):
+        control.cancel()
+        # İkinci sinyalde beklemeden çık
+        signal.signal(signum, signal.SIG_DFL)
+
+    signal.signal(signal.SIGINT, cancel)
+    signal.signal(signal.SIGTERM, cancel)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: control.pause())
+        signal.signal(signal.SIGUSR2, lambda signum, frame: control.resume())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffalo-L ekransız yüz tanıma eğitimi")
+    parser.add_argument('folder', help="Eğitim fotoğrafları klasörü")
+    parser.add_argument('model_name', help="Model adı (models/<model_adı>/)")
+    parser.add_argument('--decode-workers', type=int, default=None,
+                        help="Resim çözme işçisi sayısı (varsayılan: çekirdek-1, 0 = seri)")
+    parser.add_argument('--inference-workers', type=int, default=1, help="Çıkarım işçisi sayısı")
+    parser.add_argument('--recognition-batch', type=int, default=DEFAULT_RECOGNITION_BATCH,
+                        help="Toplu ArcFace batch boyutu (0 = yüz başına tanıma)")
+    parser.add_argument('--reduced-decode', type=int, nargs='?', const=DEFAULT_DETECT_MAX_SIDE, default=0,
+                        metavar='MAX_SIDE',
+                        help=f"Büyük resimleri tespit için küçültülmüş çöz (uzun kenar, varsayılan "
+                             f"{DEFAULT_DETECT_MAX_SIDE}); küçük yüzler yüksek çözünürlükten hizalanır")
+    parser.add_argument('--processes', type=int, nargs='?', const=default_process_count(), default=0,
+                        metavar='N',
+                        help="Çok süreçli eğitim: N işçi süreç, her biri kendi modeliyle (varsayılan N: çekirdek "
+                             "sayısı); GPU'suz sunucular için")
+    parser.add_argument('--threads-per-process', type=int, default=None,
+                        help="Çok süreçli eğitimde süreç başına ONNX intra-op thread (varsayılan: çekirdek / süreç)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Mevcut modelde sadece yeni/değişen fotoğrafları işle")
+    parser.add_argument('--no-cache', action='store_true', help="Modeller arası embedding önbelleğini kullanma")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Embedding önbelleği klasörü")
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help="Önbellek boyut sınırı (aşılınca en eski kullanılanlar silinir)")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Birebir kopya fotoğrafları da ayıklama (her dosyayı ayrı göm)")
+    parser.add_argument('--dedup-distance', type=int, nargs='?', const=DEFAULT_MAX_DISTANCE, default=None,
+                        metavar='BITS',
+                        help=f"Neredeyse aynı resimleri de ayıkla: en büyük fark özeti uzaklığı, bit (varsayılan "
+                             f"kapalı, sadece birebir kopya; değersiz {DEFAULT_MAX_DISTANCE}, en fazla "
+                             f"{MAX_DISTANCE_LIMIT})")
+    parser.add_argument('--face-dedup', type=float, nargs='?', const=DEFAULT_FACE_SIMILARITY, default=None,
+                        metavar='SIMILARITY',
+                        help=f"Aynı klasördeki ardışık dosyalarda neredeyse aynı yüzleri birleştir (cosine eşiği, "
+                             f"varsayılan {DEFAULT_FACE_SIMILARITY})")
+    parser.add_argument('--quality', action='store_true',
+                        help="Düşük kaliteli yüzleri (küçük, bulanık, profilden, düşük güvenli) tanımadan önce ele")
+    parser.add_argument('--min-face-size', type=float, default=DEFAULT_MIN_FACE_SIZE,
+                        help="--quality: en küçük yüz (bbox kısa kenarı, piksel; 0 = kontrol yok)")
+    parser.add_argument('--min-det-score', type=float, default=DEFAULT_MIN_DET_SCORE,
+                        help="--quality: en düşük tespit güveni (0 = kontrol yok)")
+    parser.add_argument('--max-yaw', type=float, default=DEFAULT_MAX_YAW,
+                        help="--quality: en büyük yaw açısı, derece (0 = kontrol yok)")
+    parser.add_argument('--min-sharpness', type=float, default=DEFAULT_MIN_SHARPNESS,
+                        help="--quality: hizalanmış yüzde en düşük Laplacian varyansı (0 = kontrol yok)")
+    parser.add_argument('--no-recursive', action='store_true', help="Alt klasörleri tarama")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='binary',
+                        help="Kayıt formatı (binary+json: face_database.json da yazılır)")
+    parser.add_argument('--dtype', choices=('float32', 'float16', 'int8'), default='float32',
+                        help="Binary depodaki embedding tipi (int8: tamsayı çarpımıyla eşleştirme, float32'den "
+                             "1-64 probe'da ~2-7 kat, face_batch_match'in 256-1024 probe'luk bloklarında ~2 kat "
+                             "hızlı; float16 sadece disk boyutunu yarıya indirir, eşleştirmede float32'ye açılır; "
+                             "doğruluk/hız raporu yazılır)")
+    parser.add_argument('--photos', choices=PHOTO_STORAGE_MODES, default=DEFAULT_PHOTO_STORAGE,
+                        help="Eğitim fotoğrafları: link (hardlink/reflink), blobs (paylaşılan sha1 deposu), copy")
+    parser.add_argument('--export-zip', nargs='?', const='', default=None, metavar='PATH',
+                        help="Sunucuya yüklenecek model ZIP'i oluştur (varsayılan models/<ad>.zip; "
+                             "--photos blobs ile modelin fotoğrafları pakete eklenir)")
+    parser.add_argument('--ann', action='store_true', help="ANN (IVF) arama indeksi oluştur")
+    parser.add_argument('--clusters', type=float, nargs='?', const=DEFAULT_CLUSTER_SIMILARITY, default=None,
+                        metavar='SIMILARITY',
+                        help=f"Yüzleri kimlik kümelerine ayır; eşleştirme önce küme merkezlerini tarar "
+                             f"(kümeye katılma cosine eşiği, varsayılan {DEFAULT_CLUSTER_SIMILARITY})")
+    parser.add_argument('--shards', type=int, default=None, metavar='N',
+                        help="Modeli N parçalı kaydet (ayrı depolar; eşleştirme parçaları paralel tarar)")
+    parser.add_argument('--shard-by', choices=SHARD_STRATEGIES, default=None,
+                        help="Parçalama: hash (dosya yolu, varsayılan) ya da folder (üst klasör başına bir "
+                             "parça; --shards ile klasörler N parçaya dağıtılır)")
+    parser.add_argument('--telemetry-interval', type=float, default=10.0,
+                        help="Canlı profil (telemetry) olayı aralığı, saniye (0 = kapalı)")
+    parser.add_argument('--text', action='store_true', help="JSON yerine okunabilir düz metin yaz")
+    args = parser.parse_args()
+
+    printer = ProgressPrinter(text=args.text)
+    if not os.path.isdir(args.folder):
+        printer.emit('error', message=f"Klasör bulunamadı: {args.folder}")
+        return 1
+
+    storage_options = {
+        'dtype': args.dtype,
+        'export_json': args.format == 'binary+json',
+        'ann_index': args.ann,
+        'clusters': args.clusters,
+        'photos': args.photos,
+        'shards': None,
+        'archive': None
+    }
+    if args.export_zip is not None:
+        storage_options['archive'] = args.export_zip or os.path.join(MODELS_DIR, f"{args.model_name}.zip")
+    if args.shard_by == 'folder' or args.shards:
+        storage_options['shards'] = {'by': args.shard_by or 'hash', 'count': args.shards or 0}
+    quality = None
+    if args.quality:
+        quality = FaceQualityFilter(min_det_score=args.min_det_score, min_face_size=args.min_face_size,
+                                    max_yaw=args.max_yaw, min_sharpness=args.min_sharpness)
+    job = TrainingJob(
+        args.folder, args.model_name, recursive=not args.no_recursive, decode_workers=args.decode_workers,
+        inference_workers=args.inference_workers, recognition_batch_size=args.recognition_batch,
+        detect_max_side=args.reduced_decode, incremental=args.incremental, use_cache=not args.no_cache, cache_dir=args.cache_dir,
+        cache_size_mb=args.cache_size_mb, progress=printer.progress, log=printer.log,
+        telemetry=printer.telemetry if args.telemetry_interval > 0 else None,
+        telemetry_interval=args.telemetry_interval, processes=args.processes,
+        threads_per_process=args.threads_per_process, dedup=not args.no_dedup,
+        dedup_distance=args.dedup_distance,
+        face_dedup_similarity=args.face_dedup, quality=quality
+    )
+    install_signal_handlers(job.control)
+
+    try:
+        staged, training_info = job.run()
+        metadata = save_model(staged, args.folder, args.model_name, training_info,
+                              storage_options=storage_options, log=printer.log)
+    except TrainingCancelled as e:
+        printer.emit('cancelled', message=str(e))
+        return 2
+    except TrainingError as e:
+        printer.emit('error', message=str(e))
+        return 1
+    except Exception as e:
+        printer.emit('error', message=f"Buffalo-S Lite eğitim sırasında kritik hata: {str(e)}",
+                     traceback=traceback.format_exc())
+        return 3
+
+    printer.emit(
+        'done',
+        model_dir=f"{MODELS_DIR}/{args.model_name}",
+        total_faces=metadata['total_faces'],
+        incremental=training_info['incremental'],
+        stats=training_info.get('stats', {}),
+        profile=training_info.get('profile'),
+        files=metadata['files'],
+        archive=metadata.get('archive')
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,881 @@
+#!/usr/bin/env python3
+"""
+🧠 Buffalo-L Eğitim Çekirdeği
+Klasör tarama, yüz tespiti/embedding döngüsü ve models/<ad>/ klasörüne kayıt.
+Qt bağımlılığı yoktur; GUI (TrainingWorker) ve komut satırı aracı
+(face_train_cli.py) aynı kodu geri çağrılarla kullanır.
+"""
+import os
+import shutil
+import time
+from datetime import datetime
+
+from face_ann import ANN_FILE, MIN_ANN_FACES, build_model_ann_index
+from face_cache import CACHE_DIR, DEFAULT_CACHE_SIZE_MB, EmbeddingCache
+from face_clusters import CLUSTERS_FILE, MIN_CLUSTER_FACES, build_model_clusters, remove_face_clusters
+from face_dedup import DuplicateFilter, FaceGroupDeduplicator, format_fingerprint, parse_fingerprint
+from face_process_pool import FaceProcessPool
+from face_profile import PROFILE_FILE, STAGE_LABELS, StageProfiler, format_summary
+from face_pipeline import (
+    DEFAULT_RECOGNITION_BATCH, ImageResult, PipelineControl, FileScanner, TrainingPipeline, get_face_app,
+    resolve_duplicate
+)
+from face_quality import format_rejections, quality_summary
+from face_quant import EmbeddingMatrix, evaluate_quantization
+from face_shards import (
+    describe_shards, remove_shards, shard_summary, write_shard_manifest, write_shards
+)
+from face_staging import StagedFaceDatabase
+from face_store import (
+    ALIASES_FILE, DATABASE_FILE, DEFAULT_PHOTO_STORAGE, EMBEDDINGS_FILE, INDEX_FILE, MANIFEST_FILE, MODELS_DIR,
+    PHOTO_BLOB_DIR, SHARDS_FILE, build_face_aliases, has_face_database, load_embedding_store, load_face_database,
+    load_manifest, load_sharded_store, manifest_entry, materialize_photos, plan_incremental, relative_image_path,
+    export_model_archive, save_face_aliases, save_json_database, save_manifest, store_photo_blobs,
+    sync_training_photos, write_json_atomic
+)
+
+PLACEMENT_LABELS = {'hardlink': 'hardlink', 'reflink': 'reflink', 'copy': 'kopya', 'existing': 'zaten depoda'}
+
+
+class TrainingError(Exception):
+    """Eğitimin kullanıcıya gösterilecek bir nedenle durması"""
+
+
+class TrainingCancelled(TrainingError):
+    """Eğitim kullanıcı tarafından durduruldu (işlenen dosyalar ara depoda kalır)"""
+
+
+def _ignore(*args):
+    pass
+
+
+def _describe_placement(counts):
+    """{'hardlink': 10, 'copy': 2} -> '10 hardlink, 2 kopya'"""
+    return ", ".join(f"{count} {PLACEMENT_LABELS.get(method, method)}" for method, count in counts.items()) or "0 dosya"
+
+
+class TrainingJob:
+    """Bir klasörden yüz veritabanı üreten eğitim işi
+
+    progress(mesaj, yüzde) ve log(mesaj) geri çağrıları ilerlemeyi bildirir;
+    run() (StagedFaceDatabase, training_info) döndürür ya da TrainingError fırlatır.
+    Yüzler eğitim sırasında models/.staging/<ad>/ altına parça parça yazılır;
+    yarıda kalan bir eğitim aynı klasör/model adıyla başlatılınca devam eder.
+    control (PipelineControl) ile başka bir thread'den iptal/duraklatma yapılır;
+    iptalde TrainingCancelled fırlatılır.
+    detect_max_side > 0 ise büyük resimler tespit için küçültülerek çözülür.
+    telemetry(özet) en fazla telemetry_interval saniyede bir StageProfiler
+    özetiyle çağrılır; son profil training_info['profile'] içinde döner.
+    face_app verilirse (benchmark stub'ı vb.) o kullanılır; verilmezse süreç genelinde
+    paylaşılan oturum alınır (get_face_app), art arda eğitimlerde model yeniden yüklenmez.
+    processes > 0 ise gömme işi bu kadar işçi sürece dağıtılır (FaceProcessPool); her süreç
+    threads_per_process intra-op thread'li kendi oturumunu face_app_factory ile oluşturur.
+    dedup birebir kopya resimleri (içerik özeti) çıkarımdan önce ayıklar; dedup_distance verilirse
+    (varsayılan kapalı) fark özeti bu kadar bit yakın neredeyse aynı resimler de ayıklanır.
+    Kopya, tarama sırasında ilk gelen ve yüz vektörü üreten asıl resme bağlanır.
+    face_dedup_similarity verilirse aynı klasördeki ardışık dosyalarda bu cosine eşiğini
+    aşan yüzler tek vektörde birleştirilir. İkisi de manifestte takma ad olarak kaydedilir.
+    quality (FaceQualityFilter) verilirse küçük, bulanık, profilden ve düşük güvenli yüzler
+    tanımadan önce elenir; eleme istatistikleri training_info['quality'] içinde döner.
+    """
+
+    def __init__(self, folder_path, model_name, recursive=True, decode_workers=None, inference_workers=1,
+                 recognition_batch_size=DEFAULT_RECOGNITION_BATCH, detect_max_side=0, incremental=False,
+                 use_cache=True, cache_dir=CACHE_DIR, cache_size_mb=DEFAULT_CACHE_SIZE_MB, control=None,
+                 progress=None, log=None, telemetry=None, telemetry_interval=2.0, face_app=None,
+                 processes=0, threads_per_process=None, face_app_factory=None,
+                 dedup=True, dedup_distance=None, face_dedup_similarity=None, quality=None):
+        self.folder_path = folder_path
+        self.model_name = model_name
+        self.recursive = recursive
+        self.incremental = incremental
+        self.decode_workers = decode_workers
+        self.inference_workers = inference_workers
+        self.recognition_batch_size = recognition_batch_size
+        self.detect_max_side = detect_max_side
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.cache_size_mb = cache_size_mb
+        self.control = control or PipelineControl()
+        self.progress = progress or _ignore
+        self.log = log or _ignore
+        self.telemetry = telemetry
+        self.telemetry_interval = telemetry_interval
+        self.face_app = face_app
+        self.processes = max(0, processes or 0)
+        self.threads_per_process = threads_per_process
+        self.face_app_factory = face_app_factory
+        self.dedup_enabled = dedup
+        self.dedup_distance = dedup_distance
+        self.face_dedup_similarity = face_dedup_similarity
+        self.quality = quality
+        self.pool = None
+        self.dedup = None
+
+    def run(self):
+        self.log("🚀 Buffalo-S Lite eğitim süreci başlatılıyor...")
+        self.progress("Buffalo-S Lite modeli yükleniyor...", 5)
+
+        # GPU/CPU kontrolü ve FaceAnalysis başlatma (süreçte zaten yüklüyse tekrar kullanılır);
+        # çok süreçli modda model işçi süreçlerde yüklenir
+        if self.face_app is None and not self.processes:
+            self.face_app = get_face_app(log=self.log)
+
+        self.progress("Eğitim verisi taranıyor...", 10)
+
+        # Diskteki ara depo: yarım kalmış aynı eğitim varsa kaldığı yerden devam
+        staged, resumed = StagedFaceDatabase.open(self.model_name, self.folder_path, self.incremental,
+                                                  options=self.staging_options())
+        if resumed:
+            self.log(
+                f"♻️ Yarım kalan eğitim bulundu: {len(staged.manifest)} dosya işlenmiş, kaldığı yerden devam"
+            )
+        training_info = {'incremental': False, 'added': [], 'modified': [], 'deleted': []}
+
+        # Tam eğitimde dosyalar tarama sürerken pipeline'a akar; artımlı plan ve
+        # devam eden eğitim silinen dosyaları bulmak için tüm listeye ihtiyaç duyar
+        scanner = FileScanner(self.folder_path, self.recursive)
+        if not self.incremental and not resumed:
+            self.log("📁 Klasör taranırken işleme başlanıyor")
+            return self.embed_staged(scanner, staged, training_info)
+
+        files = list(scanner)
+        self.log(f"📁 Toplam {len(files)} resim dosyası bulundu")
+        if not files:
+            if not resumed:
+                staged.discard()  # Yarım eğitimin ara deposu korunur (klasör geçici olarak erişilemiyor olabilir)
+            raise TrainingError("Seçilen klasörde hiç resim dosyası bulunamadı!")
+        all_files = files
+
+        # Artımlı mod: mevcut modeli koru, sadece yeni/değişen dosyaları göm
+        if self.incremental:
+            plan, previous_database = self.plan_incremental_run(files)
+            if plan is not None:
+                # Değişmeyen dosyaların yüzlerini eski veritabanından ara depoya aktar
+                if not staged.has_previous_import():
+                    staged.import_previous(previous_database, plan.manifest)
+                files = plan.to_process
+                training_info.update(
+                    incremental=True, added=plan.added, modified=plan.modified, deleted=plan.deleted
+                )
+
+        if resumed:
+            files = self.skip_committed(staged, files, all_files)
+        return self.embed_staged(files, staged, training_info)
+
+    def staging_options(self):
+        """Ara depodaki yüzleri etkileyen ayarlar (önbellek ad alanındakiler + kopya eleme ve tarama)
+
+        Biri değişirse yarım kalan eğitimin parçalarıyla birleştirilmez, eğitim baştan başlar.
+        """
+        return {
+            'recursive': bool(self.recursive),
+            'detect_max_side': self.detect_max_side or 0,
+            'quality': self.quality.settings if self.quality is not None else None,
+            'dedup': bool(self.dedup_enabled),
+            'dedup_distance': self.dedup_distance,
+            'face_dedup_similarity': self.face_dedup_similarity
+        }
+
+    def embed_staged(self, files, staged, training_info):
+        """Önbelleği açıp dosyaları göm; hata/iptalde bekleyen parçayı diske yaz"""
+        self.progress("Buffalo-S Lite yüz tespiti ve embedding başlıyor...", 15)
+
+        cache = None
+        try:
+            if self.processes:
+                self.pool = FaceProcessPool(
+                    self.processes, self.threads_per_process, self.recognition_batch_size,
+                    self.detect_max_side, dedup=self.dedup_enabled, dedup_distance=self.dedup_distance,
+                    face_app_factory=self.face_app_factory, quality=self.quality
+                )
+            cache = self.open_cache()
+            return self.embed_files(files, staged, training_info, cache)
+        except Exception:
+            # İşlenmiş dosyaları kaybetme: bekleyen parçayı yaz, devamda atlanır
+            try:
+                staged.commit()
+            except Exception:
+                pass
+            raise
+        finally:
+            if cache is not None:
+                cache.close()
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+
+    def skip_committed(self, staged, files, all_files):
+        """Devam eden eğitimde ara depoya yazılmış ve o zamandan beri değişmemiş dosyaları atla"""
+        current = {relative_image_path(file_path, self.folder_path) for file_path in all_files}
+        staged.forget([relative_path for relative_path in staged.manifest if relative_path not in current])
+
+        remaining = []
+        for file_path in files:
+            entry = staged.manifest.get(relative_image_path(file_path, self.folder_path))
+            stat = os.stat(file_path)
+            if entry is None or entry.get('size') != stat.st_size or entry.get('mtime') != stat.st_mtime:
+                remaining.append(file_path)
+        self.log(f"⏭️ {len(files) - len(remaining)} dosya zaten işlenmiş, {len(remaining)} dosya kaldı")
+        return remaining
+
+    def open_cache(self):
+        """Modeller arası paylaşılan embedding önbelleğini aç (açılamazsa önbelleksiz devam)"""
+        if not self.use_cache:
+            return None
+        try:
+            if self.pool is not None:
+                cache = EmbeddingCache(
+                    self.pool.cache_namespace, cache_dir=self.cache_dir, max_bytes=self.cache_size_mb << 20
+                )
+            else:
+                cache = EmbeddingCache.for_face_app(
+                    self.face_app, detect_max_side=self.detect_max_side, quality=self.quality,
+                    cache_dir=self.cache_dir, max_bytes=self.cache_size_mb << 20
+                )
+        except Exception as e:
+            self.log(f"⚠️ Embedding önbelleği açılamadı, önbelleksiz devam ediliyor: {str(e)}")
+            return None
+        self.log(f"♻️ Embedding önbelleği: {self.cache_dir}/ ({cache.total_bytes / (1 << 20):.1f} MB)")
+        return cache
+
+    def embed_with_pipeline(self, files, cache, profiler):
+        """Tek süreçte paralel çözme + çıkarım pipeline'ı"""
+        pipeline = TrainingPipeline(
+            self.face_app,
+            decode_workers=self.decode_workers,
+            inference_workers=self.inference_workers,
+            recognition_batch_size=self.recognition_batch_size,
+            cache=cache,
+            control=self.control,
+            detect_max_side=self.detect_max_side,
+            profiler=profiler,
+            dedup=self.dedup,
+            quality=self.quality
+        )
+        self.log(
+            f"⚙️ Pipeline: {pipeline.decode_workers} çözme işçisi, "
+            f"{pipeline.inference_workers} çıkarım işçisi, "
+            f"tanıma batch: {pipeline.recognition_batch_size or 'kapalı'}, "
+            f"küçültülmüş çözme: {f'{pipeline.detect_max_side} px' if pipeline.detect_max_side else 'kapalı'}"
+        )
+        return pipeline.process(files)
+
+    def embed_with_pool(self, files, cache, profiler):
+        """İşçi süreç havuzu: her süreç kendi oturumuyla bir parça dosyayı işler"""
+        pool = self.pool
+        self.log(
+            f"⚙️ Çok süreçli: {pool.processes} süreç × {pool.threads_per_process} thread, "
+            f"parça: {pool.shard_size} resim, "
+            f"tanıma batch: {pool.recognition_batch_size or 'kapalı'}, "
+            f"küçültülmüş çözme: {f'{pool.detect_max_side} px' if pool.detect_max_side else 'kapalı'}"
+        )
+        return pool.process(files, cache=cache, control=self.control, profiler=profiler)
+
+    def embed_files(self, files, staged, training_info, cache=None):
+        """Dosyaları pipeline'dan geçir ve yüzleri ara depoya parça parça yaz
+
+        files bir liste ya da FileScanner olabilir; taramada toplam dosya sayısı
+        tarama bitene kadar o ana kadar bulunan sayıdır.
+        """
+        scanner = files if isinstance(files, FileScanner) else None
+        total_files = None if scanner is not None else len(files)
+
+        # Paralel çözme + çıkarım pipeline'ı ya da süreç havuzu (sonuçlar dosya sırasıyla gelir)
+        profiler = StageProfiler()
+        self.dedup = self.create_duplicate_filter(staged)
+        face_dedup = None
+        if self.face_dedup_similarity:
+            face_dedup = FaceGroupDeduplicator(self.face_dedup_similarity)
+        duplicate_roots = {}  # kopya resim -> asıl resim (süreçler arası zincirleri çözmek için)
+        if self.pool is not None:
+            results = self.embed_with_pool(files, cache, profiler)
+        else:
+            results = self.embed_with_pipeline(files, cache, profiler)
+
+        processed_files = 0
+        total_faces = 0
+        failed_files = 0
+        duplicate_files = 0
+        aliased_faces = 0
+        checked_faces = 0  # Kalite filtresinden geçen + elenen (önbellekten gelenler hariç)
+        rejected = {}
+        prefiltered_images = 0  # Önbellekten gelen, önceki eğitimde aynı eşiklerle filtrelenmiş resimler
+        paused_seconds = 0.0
+        started_at = time.time()
+        last_telemetry = time.monotonic()
+
+        for result in results:
+            if scanner is not None:
+                total_files = max(scanner.count, result.index + 1)
+            # Resimler arası kontrol noktası: duraklatma ve iptal
+            if self.control.paused:
+                paused_seconds += self.wait_while_paused(staged, cache, result.index, total_files)
+                profiler.paused_seconds = paused_seconds
+            if self.control.cancelled:
+                raise TrainingCancelled(
+                    f"Eğitim durduruldu ({result.index}/{total_files} dosya işlendi). İşlenen dosyalar "
+                    f"kaydedildi; aynı klasör ve model adıyla yeniden başlatınca kaldığı yerden devam eder."
+                )
+
+            # Canlı profil özeti (aşama süreleri, hız, kuyruk, bellek)
+            if self.telemetry is not None and time.monotonic() - last_telemetry >= self.telemetry_interval:
+                last_telemetry = time.monotonic()
+                self.telemetry(profiler.snapshot())
+
+            file_path = result.file_path
+            file_name = os.path.basename(file_path)
+
+            # İlerleme güncelleme (tarama sürerken bulunan dosya sayısı da gösterilir)
+            progress_percent = 15 + int((result.index / total_files) * 70)
+            if scanner is not None and not scanner.done:
+                self.progress(f"İşleniyor: {file_name} (taranıyor: {scanner.count} resim bulundu)", progress_percent)
+            else:
+                self.progress(f"İşleniyor: {file_name}", progress_percent)
+
+            # Models klasörüne uyumlu relative path oluştur
+            relative_path = relative_image_path(file_path, self.folder_path)
+
+            if result.status == ImageResult.FAILED:
+                # Manifeste yazılmaz: bir sonraki (artımlı/devam eden) eğitimde yeniden denenir
+                self.log(f"❌ Hata ({file_name}): {result.error}")
+                failed_files += 1
+                continue
+
+            # Yineleme: süreç havuzunda işçiler arası kopyalar burada, dosya sırasıyla ayıklanır
+            # (thread modunda pipeline aynı kaydı kullanarak sonucu zaten kesinleştirdi)
+            if self.pool is not None and self.dedup is not None:
+                resolve_duplicate(self.dedup, result)
+
+            # Yüzler ve dosyanın manifest kaydı aynı parçaya yazılır
+            entry = manifest_entry(file_path, result.content_hash)
+            if result.image_hash is not None:
+                entry['phash'] = format_fingerprint(result.image_hash)
+            if result.status == ImageResult.DUPLICATE:
+                # Kopya resim gömülmez; asıl resmin takma adı olarak kaydedilir
+                original = duplicate_roots.get(result.duplicate_of, result.duplicate_of)
+                duplicate_roots[file_path] = original
+                entry['duplicate_of'] = relative_image_path(original, self.folder_path)
+                self.log(f"🔁 Yinelenen resim: {file_name} = {entry['duplicate_of']} (takma ad)")
+                duplicate_files += 1
+                with profiler.stage('serialization'):
+                    staged.add_file(relative_path, entry)
+                    staged.maybe_commit()
+                continue
+
+            if result.status == ImageResult.UNREADABLE:
+                self.log(f"❌ Resim okunamadı: {file_name}")
+                failed_files += 1
+                with profiler.stage('serialization'):
+                    staged.add_file(relative_path, entry)
+                    staged.maybe_commit()
+                continue
+
+            faces = result.faces
+            if result.cached and self.quality is not None:
+                prefiltered_images += 1
+            if result.rejected is not None:
+                checked_faces += len(faces or ()) + sum(result.rejected.values())
+                for reason, count in result.rejected.items():
+                    rejected[reason] = rejected.get(reason, 0) + count
+            if not faces:
+                if result.rejected:
+                    self.log(f"🧹 {file_name}: tüm yüzler kalite filtresinde elendi "
+                             f"({format_rejections(result.rejected)})")
+                else:
+                    self.log(f"👤 Yüz bulunamadı: {file_name}")
+                with profiler.stage('serialization'):
+                    staged.add_file(relative_path, entry)
+                    staged.maybe_commit()
+                continue
+
+            # Her yüz için 512D embedding kaydet (benzer yüz birleştirme açıksa sadece yeni yüzler)
+            file_faces = 0
+            with profiler.stage('serialization'):
+                embeddings = [face.normed_embedding.astype('float32') for face in faces]
+                if face_dedup is not None:
+                    aliases = face_dedup.match(os.path.dirname(relative_path), embeddings)
+                else:
+                    aliases = [None] * len(faces)
+                kept_keys = []
+                kept_embeddings = []
+                for face_idx, (face, embedding, alias) in enumerate(zip(faces, embeddings, aliases)):
+                    if alias is not None:
+                        entry.setdefault('face_aliases', []).append(alias)
+                        aliased_faces += 1
+                        continue
+
+                    # Benzersiz anahtar oluştur (relative path ile)
+                    key = f"{relative_path}||face_{face_idx}"
+                    staged.add_face(key, {
+                        'embedding': embedding,
+                        'path': relative_path,  # Relative path kaydet
+                        'bbox': face.bbox.tolist(),
+                        'kps': face.kps.tolist() if hasattr(face, 'kps') else None,
+                        'confidence': getattr(face, 'det_score', 0.9)
+                    })
+                    kept_keys.append(key)
+                    kept_embeddings.append(embedding)
+                    file_faces += 1
+                    total_faces += 1
+
+                if face_dedup is not None:
+                    face_dedup.add(kept_keys, kept_embeddings)
+                staged.add_file(relative_path, entry)
+                staged.maybe_commit()
+
+            merged = len(entry.get('face_aliases', ()))
+            if merged:
+                self.log(f"🔗 {file_name}: {file_faces} yüz kaydedildi, {merged} yüz benzer yüze bağlandı")
+                processed_files += 1
+            elif file_faces > 0:
+                self.log(f"✅ {file_name}: {file_faces} yüz kaydedildi (512D)")
+                processed_files += 1
+
+        with profiler.stage('serialization'):
+            staged.commit()
+
+        if scanner is not None:
+            total_files = scanner.count
+            self.log(f"📁 Toplam {total_files} resim dosyası bulundu")
+            if total_files == 0:
+                staged.discard()
+                raise TrainingError("Seçilen klasörde hiç resim dosyası bulunamadı!")
+        database_size = len(staged)
+
+        elapsed = max(time.time() - started_at - paused_seconds, 1e-6)
+        profile = profiler.snapshot()
+
+        # Eğitim tamamlandı
+        self.progress("Buffalo-S Lite sonuçları kaydediliyor...", 90)
+
+        # İstatistikler
+        self.log("=" * 50)
+        self.log("📊 BUFFALO-S LITE EĞİTİM SONUÇLARI:")
+        self.log(f"✅ Başarıyla işlenen dosya: {processed_files}")
+        self.log(f"❌ Başarısız dosya: {failed_files}")
+        self.log(f"👥 Toplam tespit edilen yüz: {total_faces}")
+        self.log(f"💾 Veritabanı boyutu: {database_size} kayıt (512D)")
+        self.log(f"⚡ Hız: {total_files / elapsed:.1f} resim/sn ({elapsed:.1f} sn)")
+        if cache is not None:
+            self.log(f"♻️ Önbellek: {cache.hits} isabet, {cache.misses} yeni resim")
+        if duplicate_files or aliased_faces:
+            self.log(f"🔁 Yineleme: {duplicate_files} kopya resim atlandı, {aliased_faces} benzer yüz birleştirildi")
+        quality_info = None
+        if self.quality is not None:
+            quality_info = quality_summary(self.quality, checked_faces, rejected, prefiltered_images)
+            self.log(
+                f"🧹 Kalite filtresi: {checked_faces} yüzden {quality_info['rejected_faces']} elendi "
+                f"(%{quality_info['rejected_share'] * 100:.1f}{'; ' + format_rejections(rejected) if rejected else ''})"
+                + (f", {prefiltered_images} resim önbellekten (önceden filtrelendi)" if prefiltered_images else "")
+            )
+        self.log(f"📊 Profil: {format_summary(profile)}")
+        if profile['stages']:
+            self.log("⏱️ Aşamalar (çağrı başına): " + ", ".join(
+                f"{STAGE_LABELS.get(name, name)} {stage['mean_ms']:.1f} ms"
+                for name, stage in profile['stages'].items()
+            ))
+        if training_info['incremental']:
+            self.log(
+                f"🔁 Artımlı: {len(training_info['added'])} yeni, {len(training_info['modified'])} değişen, "
+                f"{len(training_info['deleted'])} silinen dosya"
+            )
+        self.log("=" * 50)
+
+        if database_size == 0:
+            staged.discard()
+            raise TrainingError("Hiç yüz tespit edilemedi! Lütfen farklı resimler deneyin.")
+
+        training_info['manifest'] = staged.manifest
+        training_info['stats'] = {
+            'processed_files': processed_files,
+            'failed_files': failed_files,
+            'total_faces': total_faces,
+            'elapsed': round(elapsed, 3),
+            'cache_hits': cache.hits if cache is not None else 0,
+            'duplicate_files': duplicate_files,
+            'aliased_faces': aliased_faces,
+            'rejected_faces': sum(rejected.values())
+        }
+        training_info['quality'] = quality_info
+        training_info['profile'] = profile
+
+        self.progress("Buffalo-S Lite eğitim tamamlandı!", 100)
+        return staged, training_info
+
+    def create_duplicate_filter(self, staged):
+        """Yineleme kaydını oluştur; ara depodaki (önceki model/yarım eğitim) asıl resimlerle başlat
+
+        Sadece yüz vektörü olan (kendi yüzü kaydedilmiş ya da benzer yüze bağlanmış) resimler
+        asıl resim sayılır.
+        """
+        if not self.dedup_enabled:
+            return None
+        dedup = DuplicateFilter(self.dedup_distance)
+        face_paths = staged.face_paths()
+        for relative_path in sorted(staged.manifest):
+            entry = staged.manifest[relative_path]
+            if 'duplicate_of' not in entry and (relative_path in face_paths or entry.get('face_aliases')):
+                dedup.register(os.path.join(self.folder_path, relative_path), parse_fingerprint(entry.get('phash')),
+                               entry.get('sha1'))
+        return dedup
+
+    def wait_while_paused(self, staged, cache, done, total_files):
+        """İlerlemeyi diske yaz ve devam/iptal komutuna kadar bekle; bekleme süresini döndürür"""
+        staged.commit()
+        if cache is not None:
+            cache.commit()
+        self.log(f"⏸️ Eğitim duraklatıldı ({done}/{total_files} dosya), ilerleme kaydedildi")
+        self.progress(f"Duraklatıldı ({done}/{total_files} dosya)", 15 + int((done / total_files) * 70))
+
+        paused_at = time.time()
+        while not self.control.wait_resumed(0.5):
+            continue
+        if not self.control.cancelled:
+            self.log("▶️ Eğitim devam ediyor")
+        return time.time() - paused_at
+
+    def plan_incremental_run(self, files):
+        """Mevcut modelin manifestine göre artımlı plan çıkar; (plan, eski veritabanı)"""
+        model_dir = os.path.join(MODELS_DIR, self.model_name)
+        previous_manifest = load_manifest(model_dir)
+        if previous_manifest is None or not has_face_database(model_dir):
+            self.log("⚠️ Artımlı eğitim için mevcut model/manifest bulunamadı, tam eğitim yapılıyor")
+            return None, None
+
+        # Binary (parçalı) depo satır satır okunur (bellek eşlemeli); eski modeller için JSON
+        if os.path.exists(os.path.join(model_dir, INDEX_FILE)):
+            previous_database = load_embedding_store(model_dir)
+        elif os.path.exists(os.path.join(model_dir, SHARDS_FILE)):
+            previous_database = load_sharded_store(model_dir)
+        else:
+            previous_database = load_face_database(model_dir)
+        plan = plan_incremental(files, self.folder_path, previous_manifest)
+        self.log(
+            f"🔁 Artımlı eğitim: {len(plan.unchanged)} değişmeyen, {len(plan.added)} yeni, "
+            f"{len(plan.modified)} değişen, {len(plan.deleted)} silinen dosya"
+        )
+        return plan, previous_database
+
+
+def save_model(staged, training_folder, model_name, training_info, storage_options=None, log=None):
+    """Eğitim sonucunu (ara depo) models/<ad>/ klasörüne kaydet; model_info.json içeriğini döndür
+
+    storage_options: {'dtype': 'float32'|'float16'|'int8', 'export_json': bool, 'ann_index': bool,
+                      'clusters': kümeye katılma benzerliği ya da None, 'photos': 'link'|'blobs'|'copy',
+                      'shards': {'by': 'hash'|'folder', 'count': N} ya da None (tek parça),
+                      'archive': sunucuya yüklenecek ZIP yolu ya da None}
+    """
+    storage_options = storage_options or {}
+    log = log or _ignore
+    log("💾 Models klasöründe Buffalo-S Lite model oluşturuluyor...")
+    save_timings = {}  # Kayıt adımlarının süreleri (training_profile.json)
+    step_started = time.perf_counter()
+
+    # Models klasörünü oluştur
+    if not os.path.exists(MODELS_DIR):
+        os.makedirs(MODELS_DIR)
+
+    model_dir = os.path.join(MODELS_DIR, model_name)
+    folder_name = os.path.basename(training_folder.rstrip(os.sep))
+    dest_folder = os.path.join(model_dir, folder_name)
+
+    photo_mode = storage_options.get('photos', DEFAULT_PHOTO_STORAGE)
+    use_blobs = photo_mode == 'blobs'
+    has_previous_photos = os.path.isdir(model_dir) if use_blobs else os.path.isdir(dest_folder)
+
+    if training_info.get('incremental') and has_previous_photos:
+        # Artımlı: model klasörünü koru, sadece değişen fotoğrafları eşitle
+        if not use_blobs:
+            copied = sync_training_photos(training_folder, dest_folder, training_info, mode=photo_mode)
+            log(
+                f"🔁 Eğitim verileri güncellendi: {copied} yerleştirildi, "
+                f"{len(training_info.get('deleted', []))} silindi"
+            )
+        elif os.path.isdir(dest_folder):
+            # Önceki sürüm fotoğrafları model klasöründe tutuyordu; artık depodan okunacak
+            shutil.rmtree(dest_folder)
+    else:
+        # Model klasörünü temizle/oluştur
+        if os.path.exists(model_dir):
+            shutil.rmtree(model_dir)
+        os.makedirs(model_dir)
+        log(f"📂 Model klasörü oluşturuldu: models/{model_name}/")
+
+        # Eğitim verilerini bağla (hardlink/reflink, olmazsa kopya)
+        if not use_blobs:
+            counts = materialize_photos(training_folder, dest_folder, mode=photo_mode)
+            log(f"✅ Eğitim verileri yerleştirildi: {folder_name} ({_describe_placement(counts)})")
+
+    if use_blobs:
+        # Paylaşılan içerik adresli depo: model fotoğraflara manifestteki sha1 ile başvurur
+        counts = store_photo_blobs(training_folder, training_info.get('manifest', {}))
+        log(f"🗃️ Eğitim fotoğrafları içerik deposunda: {PHOTO_BLOB_DIR}/ ({_describe_placement(counts)})")
+    save_timings['photos'] = time.perf_counter() - step_started
+
+    # Artımlı eğitim için dosya manifestini kaydet
+    step_started = time.perf_counter()
+    save_manifest(model_dir, training_info.get('manifest', {}))
+
+    # Ara depodaki parçaları binary embedding deposuna birleştir (geçici dosya + yerine taşıma)
+    embedding_dtype = storage_options.get('dtype', 'float32')
+    sharding = storage_options.get('shards')
+    shard_manifest = None
+    if sharding:
+        # Parça indekslerini etkileyen seçenekler; değişirse tüm parçalar yeniden yazılır
+        index_options = {'ann_index': bool(storage_options.get('ann_index')),
+                         'clusters': storage_options.get('clusters')}
+        shard_manifest, rewritten = write_shards(
+            staged, model_dir, strategy=sharding.get('by', 'hash'), count=sharding.get('count', 0),
+            dtype=embedding_dtype, options=index_options
+        )
+        model_files = {'shards': SHARDS_FILE}
+        store = load_sharded_store(model_dir, manifest=shard_manifest)
+        face_count = shard_manifest['faces']
+        log(
+            f"💾 Parçalı embedding deposu kaydedildi: models/{model_name}/shards/ ({embedding_dtype}, "
+            f"{describe_shards(shard_manifest)}, {len(rewritten)} parça yeniden yazıldı)"
+        )
+    else:
+        remove_shards(model_dir)
+        model_files = staged.finalize(model_dir, dtype=embedding_dtype)
+        store = load_embedding_store(model_dir)
+        face_count = len(store)
+        log(f"💾 Binary embedding deposu kaydedildi: models/{model_name}/{EMBEDDINGS_FILE} ({embedding_dtype})")
+    save_timings['embedding_store'] = time.perf_counter() - step_started
+
+    # Yarı/çeyrek boyutlu depoların doğruluk kaybı: ara depodaki float32 embedding'lere göre
+    # (artımlı eğitimde önceki modelden aktarılan yüzler zaten bu tipten çözülmüştür)
+    quantization_info = None
+    if embedding_dtype != 'float32' and face_count >= 2:
+        step_started = time.perf_counter()
+        quantization_info = _quantization_report(staged, store, shard_manifest)
+        save_timings['quantization_report'] = time.perf_counter() - step_started
+    if quantization_info:
+        log(
+            f"🗜️ {embedding_dtype} doğruluk (float32'ye göre, {quantization_info['held_out']} yüz): "
+            f"en büyük skor farkı {quantization_info['max_abs_error']:.4f}, "
+            f"eşik recall {quantization_info['threshold_recall']:.4f}, "
+            f"recall@{quantization_info['top_k']} {quantization_info['recall_at_k']:.4f}"
+        )
+        log(
+            f"⏱️ {embedding_dtype} tarama ({quantization_info['scan_rows']} satır): "
+            f"{quantization_info['quantized_scan_ms']:.1f} ms, float32 {quantization_info['reference_scan_ms']:.1f} ms "
+            f"(x{quantization_info['scan_speedup'] or 0:.2f}"
+            + (", tamsayı çarpımı)" if quantization_info['integer_scoring']
+               else ", sadece disk kazancı)" if embedding_dtype == 'float16' else ", sadece bellek kazancı)")
+        )
+
+    # Yinelenen fotoğraflar: vektör yerine takma ad (eşleşen yüzün fotoğraflarına eklenir)
+    manifest = training_info.get('manifest', {})
+    aliases = build_face_aliases(manifest, store.keys, store.paths)
+    if save_face_aliases(model_dir, aliases):
+        model_files['aliases'] = ALIASES_FILE
+        log(f"🔁 Takma adlar kaydedildi: models/{model_name}/{ALIASES_FILE} ({len(aliases)} yüz)")
+
+    # JSON veritabanı isteğe bağlı (eski sunucularla uyum)
+    database_path = os.path.join(model_dir, DATABASE_FILE)
+    if storage_options.get('export_json'):
+        step_started = time.perf_counter()
+        model_files['database'] = save_json_database(model_dir, store)
+        save_timings['json_export'] = time.perf_counter() - step_started
+        log(f"💾 JSON veritabanı kaydedildi: models/{model_name}/{DATABASE_FILE}")
+    elif os.path.exists(database_path):
+        # Artımlı güncellemeden kalan eski JSON'u bırakma
+        os.remove(database_path)
+
+    # ANN indeksi ve kimlik kümeleri isteğe bağlı; eski indeksler yeni depoyla uyuşmayacağı için yenilenir
+    if shard_manifest is None:
+        ann_info, cluster_info, index_files = build_search_indexes(model_dir, store, storage_options, save_timings, log)
+        model_files.update(index_files)
+    else:
+        # Sadece yeniden yazılan parçaların indeksleri kurulur; diğerleri önceki kayıttan aynen kalır
+        for shard, shard_store in zip(shard_manifest['shards'], store.stores):
+            if shard['name'] in rewritten:
+                shard['ann'], shard['clusters'], _ = build_search_indexes(
+                    os.path.join(model_dir, shard['dir']), shard_store, storage_options, save_timings, log,
+                    label=f"[{shard['name']}] "
+                )
+        shards = shard_manifest['shards']
+        ann_info = {shard['name']: shard['ann'] for shard in shards if shard['ann']} or None
+        cluster_info = {shard['name']: shard['clusters'] for shard in shards if shard['clusters']} or None
+        write_shard_manifest(model_dir, shard_manifest)
+        log(f"🧩 Parça listesi kaydedildi: models/{model_name}/{SHARDS_FILE}")
+
+    # Eğitim profili: aşama süreleri, hız, kuyruklar, bellek + kayıt adımları
+    if training_info.get('profile'):
+        profile = dict(training_info['profile'])
+        profile['save'] = {step: round(seconds, 4) for step, seconds in save_timings.items()}
+        write_json_atomic(os.path.join(model_dir, PROFILE_FILE), profile, indent=2, ensure_ascii=False)
+        model_files['profile'] = PROFILE_FILE
+        log(f"📊 Eğitim profili kaydedildi: models/{model_name}/{PROFILE_FILE}")
+
+    # JSON metadata oluştur
+    metadata = {
+        "name": model_name,
+        "created_at": datetime.now().isoformat(),
+        "total_faces": face_count,
+        "source_folder": os.path.basename(training_folder),
+        "status": "completed",
+        "description": f"Buffalo-S Lite modeli - {face_count} yüz (512D)",
+        "type": "face_recognition",
+        "algorithm": "Buffalo-S Lite",
+        "embedding_size": 512,
+        "threshold": 0.5,
+        "storage": {
+            "format": "binary",
+            "dtype": embedding_dtype,
+            "json_export": 'database' in model_files,
+            "photos": photo_mode,
+            "quantization": quantization_info
+        },
+        "ann": ann_info,
+        "clusters": cluster_info,
+        "shards": shard_summary(shard_manifest) if shard_manifest else None,
+        "quality": training_info.get('quality'),
+        "dedup": {
+            "duplicate_files": sum(1 for entry in manifest.values() if 'duplicate_of' in entry),
+            "aliased_faces": sum(len(entry.get('face_aliases', ())) for entry in manifest.values()),
+            "aliased_keys": len(aliases)
+        },
+        "files": {
+            **model_files,
+            "photos": PHOTO_BLOB_DIR if use_blobs else folder_name,
+            "manifest": MANIFEST_FILE
+        }
+    }
+
+    write_json_atomic(os.path.join(model_dir, "model_info.json"), metadata, indent=2, ensure_ascii=False)
+    log(f"📄 Model metadata kaydedildi: model_info.json")
+
+    # Bilgi dosyası oluştur
+    create_model_info_file(model_dir, training_folder, model_name, face_count, storage_options, log)
+
+    # Model tamamlandı; ara depoya artık gerek yok
+    staged.discard()
+
+    if storage_options.get('archive'):
+        # Sunucuya yüklenecek paket (blobs modunda modelin fotoğrafları da içinde)
+        try:
+            counts = export_model_archive(model_dir, storage_options['archive'])
+            metadata['archive'] = storage_options['archive']
+            log(f"📦 Model ZIP'i oluşturuldu: {storage_options['archive']} ({counts['files']} dosya"
+                + (f", {counts['blobs']} içerik deposu fotoğrafı)" if use_blobs else ")"))
+        except OSError as e:
+            log(f"❌ Model ZIP'i oluşturulamadı: {str(e)}")
+    return metadata
+
+
+def _quantization_report(staged, store, shard_manifest):
+    """int8/float16 doğruluk ve tarama hızı raporu; parçalı modelde en büyük parça üzerinde (ölçek ortak)"""
+    if shard_manifest is None:
+        return evaluate_quantization(staged.embedding_blocks, EmbeddingMatrix(store.embeddings, store.scale))
+
+    position = max(range(len(store.stores)), key=lambda index: len(store.stores[index]))
+    shard_store = store.stores[position]
+    include = set(shard_store.paths)
+    report = evaluate_quantization(lambda: staged.embedding_blocks(include=include),
+                                   EmbeddingMatrix(shard_store.embeddings, shard_store.scale))
+    if report is not None:
+        report['shard'] = store.names[position]
+    return report
+
+
+def build_search_indexes(index_dir, store, storage_options, save_timings, log, label=""):
+    """Depo klasöründe ANN indeksini ve kimlik kümelerini (istenmişse) yeniden kur; (ann, kümeler, dosyalar)
+
+    Eski indeksler yeni depoyla uyuşmayacağı için her durumda silinir. Parçalı modelde her parça
+    kendi klasöründe ayrı indekslenir (label log satırlarında parçayı belirtir).
+    """
+    face_count = len(store)
+    files = {}
+    ann_info = None
+    ann_path = os.path.join(index_dir, ANN_FILE)
+    if os.path.exists(ann_path):
+        os.remove(ann_path)
+    if storage_options.get('ann_index'):
+        if face_count < MIN_ANN_FACES:
+            log(f"ℹ️ {label}ANN indeksi atlandı: {face_count} yüz için tam arama yeterli")
+        else:
+            log(f"🧭 {label}ANN indeksi oluşturuluyor...")
+            step_started = time.perf_counter()
+            ann_info = build_model_ann_index(index_dir, store.float_embeddings())
+            save_timings['ann_index'] = save_timings.get('ann_index', 0.0) + time.perf_counter() - step_started
+            files['ann_index'] = ann_info['file']
+            log(
+                f"🧭 {label}ANN indeksi kaydedildi: {ann_info['nlist']} küme, nprobe {ann_info['nprobe']}, "
+                f"recall@10 {ann_info['recall_at_10']:.3f}"
+            )
+
+    cluster_info = None
+    remove_face_clusters(index_dir)
+    if storage_options.get('clusters'):
+        if face_count < MIN_CLUSTER_FACES:
+            log(f"ℹ️ {label}Kimlik kümeleri atlandı: {face_count} yüz için tam arama yeterli")
+        else:
+            log(f"🧩 {label}Kimlik kümeleri oluşturuluyor...")
+            step_started = time.perf_counter()
+            cluster_info = build_model_clusters(index_dir, store.float_embeddings(),
+                                                similarity=storage_options['clusters'])
+            save_timings['clusters'] = save_timings.get('clusters', 0.0) + time.perf_counter() - step_started
+            files['clusters'] = cluster_info['files'][0]
+            files['cluster_centroids'] = cluster_info['files'][1]
+            log(
+                f"🧩 {label}Kimlik kümeleri kaydedildi: {face_count} yüz → {cluster_info['clusters']} küme "
+                f"({cluster_info['singletons']} tekil), recall {cluster_info['recall']:.3f}, "
+                f"taranan yüz %{cluster_info['scanned_share'] * 100:.2f}"
+            )
+    return ann_info, cluster_info, files
+
+
+def create_model_info_file(model_dir, training_folder, model_name, face_count, storage_options=None, log=None):
+    """Model bilgi dosyası oluştur"""
+    storage_options = storage_options or {}
+    log = log or _ignore
+    try:
+        info_file = os.path.join(model_dir, "README.txt")
+        with open(info_file, 'w', encoding='utf-8') as f:
+            f.write(f"Buffalo-S Lite AI Yüz Tanıma Modeli: {model_name}\n")
+            f.write("=" * 60 + "\n\n")
+            f.write(f"Model Adı: {model_name}\n")
+            f.write(f"Oluşturma Tarihi: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Kaynak Klasör: {training_folder}\n")
+            f.write(f"Toplam Yüz: {face_count}\n")
+            f.write(f"Algoritma: Buffalo-S Lite\n")
+            f.write(f"Embedding Boyutu: 512D\n")
+            f.write(f"Threshold: 0.5\n\n")
+            f.write("📁 DOSYA YAPISI:\n")
+            if os.path.exists(os.path.join(model_dir, SHARDS_FILE)):
+                f.write(f"- {SHARDS_FILE}    (Parça listesi - her parça shards/<ad>/ altında ayrı depo)\n")
+            else:
+                f.write(f"- {EMBEDDINGS_FILE}  (Binary embedding matrisi - 512D)\n")
+                f.write(f"- {INDEX_FILE}      (Anahtar, path, bbox, kps, confidence indeksi)\n")
+            if storage_options.get('export_json'):
+                f.write(f"- {DATABASE_FILE}  (JSON veritabanı - eski sürümlerle uyum)\n")
+            if os.path.exists(os.path.join(model_dir, ANN_FILE)):
+                f.write(f"- {ANN_FILE}    (IVF yaklaşık arama indeksi)\n")
+            if os.path.exists(os.path.join(model_dir, CLUSTERS_FILE)):
+                f.write(f"- {CLUSTERS_FILE}   (Kimlik kümeleri - merkezler face_clusters.bin)\n")
+            if os.path.exists(os.path.join(model_dir, ALIASES_FILE)):
+                f.write(f"- {ALIASES_FILE}   (Yinelenen fotoğraflar - takma adlar)\n")
+            f.write(f"- model_info.json     (JSON metadata)\n")
+            f.write(f"- {MANIFEST_FILE} (Artımlı eğitim dosya manifesti)\n")
+            if storage_options.get('photos') == 'blobs':
+                f.write(f"- ../../{PHOTO_BLOB_DIR}/     (Eğitim fotoğrafları - paylaşılan sha1 deposu; sunucuya "
+                        f"yüklerken ZIP'i --export-zip ile oluşturun, fotoğraflar pakete eklenir)\n")
+            else:
+                f.write(f"- {os.path.basename(training_folder)}/         (Eğitim fotoğrafları)\n")
+            if os.path.exists(os.path.join(model_dir, PROFILE_FILE)):
+                f.write(f"- {PROFILE_FILE} (Aşama süreleri, hız, bellek profili)\n")
+            f.write(f"- README.txt          (Bu dosya)\n\n")
+            f.write("🌐 WEB ARAYÜZÜ KULLANIMI:\n")
+            f.write("- Model otomatik olarak web arayüzünde görünecek\n")
+            f.write("- Genel sekreterlik model_info.json'dan bilgileri okuyacak\n")
+            f.write("- Client-side Buffalo-S Lite ile tam uyumlu\n")
+            f.write("- 512D embeddings ile yüksek doğruluk\n")
+            f.write("- Direkt kullanıma hazır!\n")
+
+        log("📄 Model bilgi dosyası oluşturuldu: README.txt")
+
+    except Exception as e:
+        log(f"❌ Bilgi dosyası oluşturma hatası: {str(e)}")
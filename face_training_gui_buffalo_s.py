@@ -9,26 +9,28 @@ import os
 import time
 import traceback
 import warnings
-import numpy as np
-import cv2
-import torch
 import shutil
 import json
-from datetime import datetime
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QMessageBox,
     QPushButton, QLabel, QVBoxLayout, QHBoxLayout,
     QWidget, QListWidget, QListWidgetItem, QAbstractItemView,
-    QProgressBar, QGroupBox, QTextEdit, QSizePolicy, QFrame,
-    QLineEdit
+    QProgressBar, QGroupBox, QPlainTextEdit, QSizePolicy, QFrame,
+    QLineEdit, QCheckBox, QComboBox
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QTimer
 from PyQt5.QtGui import QPixmap, QImage, QIcon, QFont
 
-try:
-    from insightface.app import FaceAnalysis
-except ImportError:
-    FaceAnalysis = None
+from face_clusters import DEFAULT_CLUSTER_SIMILARITY
+from face_dedup import DEFAULT_FACE_SIMILARITY, DEFAULT_MAX_DISTANCE
+from face_log import DEFAULT_FLUSH_INTERVAL_MS, DEFAULT_LOG_HISTORY, LogBuffer, log_file_path
+from face_pipeline import DEFAULT_DETECT_MAX_SIDE, DEFAULT_RECOGNITION_BATCH, FileScanner, preload_face_app
+from face_process_pool import default_process_count
+from face_profile import format_summary
+from face_quality import FaceQualityFilter
+from face_shards import DEFAULT_SHARD_COUNT
+from face_store import EMBEDDINGS_FILE, INDEX_FILE, MODELS_DIR, SHARDS_FILE
+from face_training import TrainingCancelled, TrainingError, TrainingJob, save_model
 
 # Uyarıları bastır
 warnings.filterwarnings("ignore", category=FutureWarning, message=".*rcond parameter.*")
@@ -36,153 +38,91 @@ warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 
 class TrainingWorker(QThread):
-    """Buffalo-S Lite yüz veritabanı eğitimi için worker thread"""
-    progress = pyqtSignal(str, int)  # mesaj, yüzde
-    log_message = pyqtSignal(str)
-    finished = pyqtSignal(dict, str, str)  # face_database, folder_path, model_name
+    """Buffalo-S Lite yüz veritabanı eğitimi için worker thread
+
+    Günlük satırları ve ilerleme sinyalle değil LogBuffer üzerinden iletilir;
+    arayüz bunları zamanlayıcıyla toplu gösterir. Kayıt (save_model: k-means, recall,
+    kümeleme, parça/ZIP yazımı) da bu thread'de çalışır; arayüz sadece sonucu gösterir.
+    """
+    finished = pyqtSignal(str, dict)  # model_name, model_info.json içeriği (save_model sonucu)
+    saving = pyqtSignal()  # Tarama bitti, model kaydediliyor (durdurma/duraklatma artık etkisiz)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal(str)
+    telemetry = pyqtSignal(dict)  # StageProfiler özeti (aşama süreleri, hız, kuyruk, bellek)
 
-    def __init__(self, folder_path, model_name, recursive=True):
+    def __init__(self, folder_path, model_name, log_buffer, recursive=True, decode_workers=None, inference_workers=1,
+                 recognition_batch_size=DEFAULT_RECOGNITION_BATCH, detect_max_side=0, incremental=False,
+                 use_cache=True, processes=0, dedup=True, dedup_distance=None, face_dedup_similarity=None,
+                 quality=None, storage_options=None):
         super().__init__()
         self.folder_path = folder_path
         self.model_name = model_name
-        self.recursive = recursive
-        self.face_app = None
+        self.storage_options = storage_options or {}
+        self.log = log_buffer.log
+        self.job = TrainingJob(
+            folder_path, model_name, recursive=recursive, decode_workers=decode_workers,
+            inference_workers=inference_workers, recognition_batch_size=recognition_batch_size,
+            detect_max_side=detect_max_side, incremental=incremental, use_cache=use_cache, processes=processes,
+            dedup=dedup, dedup_distance=dedup_distance, face_dedup_similarity=face_dedup_similarity, quality=quality,
+            progress=log_buffer.progress, log=log_buffer.log, telemetry=self.telemetry.emit
+        )
 
-    def run(self):
-        try:
-            self.log_message.emit("🚀 Buffalo-S Lite eğitim süreci başlatılıyor...")
-            self.progress.emit("Buffalo-S Lite modeli yükleniyor...", 5)
+    def cancel(self):
+        """Eğitimi bir sonraki resimde durdur (ilerleme ara depoda kalır)"""
+        self.job.control.cancel()
 
-            # GPU/CPU kontrolü ve FaceAnalysis başlatma
-            try:
-                ctx_id = 0 if torch.cuda.is_available() else -1
-            except:
-                ctx_id = -1
-            device_type = "GPU (CUDA)" if ctx_id >= 0 else "CPU"
+    def pause(self):
+        self.job.control.pause()
+
+    def resume(self):
+        self.job.control.resume()
 
-            self.log_message.emit(f"💻 Cihaz türü: {device_type}")
-            providers = ['CUDAExecutionProvider', 'CPUExecutionProvider'] if ctx_id >= 0 else ['CPUExecutionProvider']
+    def is_paused(self):
+        return self.job.control.paused
 
+    def run(self):
+        try:
+            staged, training_info = self.job.run()
+        except TrainingCancelled as e:
+            self.cancelled.emit(str(e))
+        except TrainingError as e:
+            self.error.emit(str(e))
+        except Exception as e:
+            self.error.emit(f"Buffalo-S Lite eğitim sırasında kritik hata: {str(e)}\n{traceback.format_exc()}")
+        else:
+            self.saving.emit()
             try:
-                # Buffalo-S Lite ONNX model - client-side sistemle uyumlu
-                self.face_app = FaceAnalysis(name='buffalo_l', providers=providers)
-                self.face_app.prepare(ctx_id=ctx_id, det_size=(640, 640))
-                self.log_message.emit("✅ Buffalo-L model başarıyla yüklendi (512D embeddings)")
+                metadata = save_model(staged, self.folder_path, self.model_name, training_info,
+                                      storage_options=self.storage_options, log=self.log)
             except Exception as e:
-                self.log_message.emit("⚠️ GPU başlatılamadı, CPU'ya geçiliyor...")
-                self.face_app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
-                self.face_app.prepare(ctx_id=-1, det_size=(640, 640))
-
-            self.progress.emit("Eğitim verisi taranıyor...", 10)
-
-            # Klasördeki tüm resimleri bul
-            files = []
-            if self.recursive:
-                for root, _, fs in os.walk(self.folder_path):
-                    for f in fs:
-                        if f.lower().endswith(('.jpg', '.png', '.jpeg', '.bmp', '.tiff')):
-                            files.append(os.path.join(root, f))
+                self.error.emit(f"Model oluşturma hatası: {str(e)}")
             else:
-                for f in os.listdir(self.folder_path):
-                    if f.lower().endswith(('.jpg', '.png', '.jpeg', '.bmp', '.tiff')):
-                        files.append(os.path.join(self.folder_path, f))
+                self.finished.emit(self.model_name, metadata)
 
-            total_files = len(files)
-            self.log_message.emit(f"📁 Toplam {total_files} resim dosyası bulundu")
 
-            if total_files == 0:
-                self.error.emit("Seçilen klasörde hiç resim dosyası bulunamadı!")
-                return
+class FolderScanWorker(QThread):
+    """Seçilen klasörü arayüzü dondurmadan tarar (os.scandir akışı)"""
+    counted = pyqtSignal(int)  # O ana kadar bulunan resim sayısı (en fazla saniyede birkaç kez)
+    scan_finished = pyqtSignal(str, int)  # klasör, toplam resim sayısı
 
-            self.progress.emit("Buffalo-S Lite yüz tespiti ve embedding başlıyor...", 15)
-
-            face_database = {}
-            processed_files = 0
-            total_faces = 0
-            failed_files = 0
-
-            for idx, file_path in enumerate(files):
-                try:
-                    # İlerleme güncelleme
-                    progress_percent = 15 + int((idx / total_files) * 70)
-                    file_name = os.path.basename(file_path)
-                    self.progress.emit(f"İşleniyor: {file_name}", progress_percent)
-
-                    # Resmi yükle
-                    with open(file_path, 'rb') as f:
-                        img_data = np.frombuffer(f.read(), np.uint8)
-                    img = cv2.imdecode(img_data, cv2.IMREAD_COLOR)
-
-                    if img is None:
-                        self.log_message.emit(f"❌ Resim okunamadı: {file_name}")
-                        failed_files += 1
-                        continue
-
-                    # BGR'den RGB'ye çevir
-                    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-                    # Buffalo-S Lite yüz tespiti ve embedding extraction
-                    faces = self.face_app.get(rgb)
-
-                    if not faces:
-                        self.log_message.emit(f"👤 Yüz bulunamadı: {file_name}")
-                        continue
-
-                    # Her yüz için 512D embedding kaydet
-                    file_faces = 0
-                    for face_idx, face in enumerate(faces):
-                        embedding = face.normed_embedding.astype('float32')
-
-                        # Models klasörüne uyumlu relative path oluştur
-                        relative_path = os.path.relpath(file_path, self.folder_path)
-                        # Windows backslash'leri forward slash'e çevir (cross-platform)
-                        relative_path = relative_path.replace('\\', '/')
-
-                        # Benzersiz anahtar oluştur (relative path ile)
-                        key = f"{relative_path}||face_{face_idx}"
-                        face_database[key] = {
-                            'embedding': embedding,
-                            'path': relative_path,  # Relative path kaydet
-                            'bbox': face.bbox.tolist(),
-                            'kps': face.kps.tolist() if hasattr(face, 'kps') else None,
-                            'confidence': getattr(face, 'det_score', 0.9)
-                        }
-                        file_faces += 1
-                        total_faces += 1
-
-                    if file_faces > 0:
-                        file_name = os.path.basename(file_path)
-                        self.log_message.emit(f"✅ {file_name}: {file_faces} yüz kaydedildi (512D)")
-                        processed_files += 1
-
-                except Exception as e:
-                    file_name = os.path.basename(file_path)
-                    self.log_message.emit(f"❌ Hata ({file_name}): {str(e)}")
-                    failed_files += 1
-                    continue
-
-            # Eğitim tamamlandı
-            self.progress.emit("Buffalo-S Lite sonuçları kaydediliyor...", 90)
-
-            # İstatistikler
-            self.log_message.emit("=" * 50)
-            self.log_message.emit("📊 BUFFALO-S LITE EĞİTİM SONUÇLARI:")
-            self.log_message.emit(f"✅ Başarıyla işlenen dosya: {processed_files}")
-            self.log_message.emit(f"❌ Başarısız dosya: {failed_files}")
-            self.log_message.emit(f"👥 Toplam tespit edilen yüz: {total_faces}")
-            self.log_message.emit(f"💾 Veritabanı boyutu: {len(face_database)} kayıt (512D)")
-            self.log_message.emit("=" * 50)
-
-            if len(face_database) == 0:
-                self.error.emit("Hiç yüz tespit edilemedi! Lütfen farklı resimler deneyin.")
-                return
+    def __init__(self, folder, parent=None):
+        super().__init__(parent)  # Ebeveyn, yerine yenisi başlatılan taramayı bitene kadar yaşatır
+        self.folder = folder
+        self._cancelled = False
 
-            self.progress.emit("Buffalo-S Lite eğitim tamamlandı!", 100)
-            self.finished.emit(face_database, self.folder_path, self.model_name)
+    def cancel(self):
+        self._cancelled = True
 
-        except Exception as e:
-            self.error.emit(f"Buffalo-S Lite eğitim sırasında kritik hata: {str(e)}\n{traceback.format_exc()}")
+    def run(self):
+        scanner = FileScanner(self.folder)
+        last_report = time.monotonic()
+        for _ in scanner:
+            if self._cancelled:
+                return
+            if time.monotonic() - last_report >= 0.25:
+                last_report = time.monotonic()
+                self.counted.emit(scanner.count)
+        self.scan_finished.emit(self.folder, scanner.count)
 
 
 class FaceTrainingGUI(QMainWindow):
@@ -199,10 +139,18 @@ class FaceTrainingGUI(QMainWindow):
         self.training_folder = None
         self.model_name = None
         self.training_worker = None
+        self.folder_scan_worker = None
+        self.preload_thread = None
+        self.log_buffer = LogBuffer(history=DEFAULT_LOG_HISTORY)
 
         self.init_ui()
         self.setStyleSheet(self.get_stylesheet())
 
+        # Günlük ve ilerleme worker'dan tampon üzerinden toplu çekilir
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start(DEFAULT_FLUSH_INTERVAL_MS)
+
     def init_ui(self):
         """Kullanıcı arayüzünü oluştur"""
         main_widget = QWidget()
@@ -239,6 +187,84 @@ class FaceTrainingGUI(QMainWindow):
         model_name_layout.addWidget(self.model_name_input)
         model_layout.addLayout(model_name_layout)
 
+        self.incremental_checkbox = QCheckBox("🔁 Artımlı eğitim (mevcut modelde sadece yeni/değişen fotoğrafları işle)")
+        model_layout.addWidget(self.incremental_checkbox)
+
+        self.cache_checkbox = QCheckBox("♻️ Embedding önbelleğini kullan (diğer modellerde işlenmiş fotoğrafları atla)")
+        self.cache_checkbox.setChecked(True)
+        model_layout.addWidget(self.cache_checkbox)
+
+        self.reduced_decode_checkbox = QCheckBox(
+            f"⚡ Büyük fotoğrafları küçültülmüş çöz (tespit {DEFAULT_DETECT_MAX_SIDE} px, küçük yüzler tam çözünürlük)"
+        )
+        model_layout.addWidget(self.reduced_decode_checkbox)
+
+        self.dedup_checkbox = QCheckBox("🔁 Birebir aynı fotoğrafları atla (kopyalar takma ad olarak kaydedilir)")
+        self.dedup_checkbox.setChecked(True)
+        model_layout.addWidget(self.dedup_checkbox)
+
+        # Farklı ama çok benzer fotoğrafları da birleştirebilir; varsayılan kapalı
+        self.near_dup_checkbox = QCheckBox("🔁 Neredeyse aynı fotoğrafları da atla (küçültülmüş/yeniden sıkıştırılmış)")
+        self.dedup_checkbox.toggled.connect(self.near_dup_checkbox.setEnabled)
+        model_layout.addWidget(self.near_dup_checkbox)
+
+        self.face_dedup_checkbox = QCheckBox("🔗 Seri çekimlerde neredeyse aynı yüzleri tek kayıtta birleştir")
+        model_layout.addWidget(self.face_dedup_checkbox)
+
+        self.quality_checkbox = QCheckBox("🧹 Düşük kaliteli yüzleri ele (küçük, bulanık, profilden, düşük güvenli)")
+        model_layout.addWidget(self.quality_checkbox)
+
+        self.process_pool_checkbox = QCheckBox(
+            f"🧵 Çok süreçli eğitim ({default_process_count()} süreç, her birinde ayrı model; GPU'suz sunucular için)"
+        )
+        model_layout.addWidget(self.process_pool_checkbox)
+
+        self.json_export_checkbox = QCheckBox("📄 face_database.json da yaz (eski sürümlerle uyum)")
+        model_layout.addWidget(self.json_export_checkbox)
+
+        dtype_layout = QHBoxLayout()
+        dtype_layout.addWidget(QLabel("Embedding Tipi:"))
+        self.dtype_combo = QComboBox()
+        self.dtype_combo.addItem("float32 (tam doğruluk)", 'float32')
+        self.dtype_combo.addItem("🗜️ int8 (çeyrek bellek, tamsayı eşleştirme; hız/doğruluk eğitim logunda)", 'int8')
+        dtype_layout.addWidget(self.dtype_combo)
+        model_layout.addLayout(dtype_layout)
+
+        self.ann_checkbox = QCheckBox("🧭 ANN indeksi oluştur (büyük modellerde hızlı yaklaşık arama)")
+        model_layout.addWidget(self.ann_checkbox)
+
+        self.clusters_checkbox = QCheckBox("🧩 Kimlik kümeleri oluştur (eşleştirme önce kişi merkezlerini tarar)")
+        model_layout.addWidget(self.clusters_checkbox)
+
+        shards_layout = QHBoxLayout()
+        shards_layout.addWidget(QLabel("Parçalama:"))
+        self.shards_combo = QComboBox()
+        self.shards_combo.addItem("Tek parça", None)
+        self.shards_combo.addItem(f"🧩 {DEFAULT_SHARD_COUNT} parça (dosya yoluna göre)",
+                                  {'by': 'hash', 'count': DEFAULT_SHARD_COUNT})
+        self.shards_combo.addItem("🧩 Alt klasör başına bir parça", {'by': 'folder', 'count': 0})
+        shards_layout.addWidget(self.shards_combo)
+        model_layout.addLayout(shards_layout)
+
+        photo_storage_layout = QHBoxLayout()
+        photo_storage_layout.addWidget(QLabel("Fotoğraf Saklama:"))
+        self.photo_storage_combo = QComboBox()
+        self.photo_storage_combo.addItem("🔗 Bağlantı (hardlink/reflink, olmazsa kopya)", 'link')
+        self.photo_storage_combo.addItem("🗃️ Paylaşılan içerik deposu (photo_blobs/)", 'blobs')
+        self.photo_storage_combo.addItem("📋 Tam kopya", 'copy')
+        photo_storage_layout.addWidget(self.photo_storage_combo)
+        model_layout.addLayout(photo_storage_layout)
+
+        self.archive_checkbox = QCheckBox("📦 Sunucuya yüklemek için ZIP oluştur (models/<ad>.zip, fotoğraflar dahil)")
+        model_layout.addWidget(self.archive_checkbox)
+
+        self.log_file_checkbox = QCheckBox("📝 Tüm eğitim günlüğünü dosyaya yaz (logs/)")
+        model_layout.addWidget(self.log_file_checkbox)
+
+        self.preload_checkbox = QCheckBox("🔥 Modeli klasör seçilirken arka planda yükle")
+        self.preload_checkbox.setChecked(True)
+        model_layout.addWidget(self.preload_checkbox)
+
         model_group.setLayout(model_layout)
         main_layout.addWidget(model_group)
 
@@ -278,6 +304,13 @@ class FaceTrainingGUI(QMainWindow):
         self.btn_stop_training.clicked.connect(self.stop_training)
         training_button_layout.addWidget(self.btn_stop_training)
 
+        self.btn_pause_training = QPushButton("⏸️ Duraklat")
+        self.btn_pause_training.setObjectName("pause_training")
+        self.btn_pause_training.setEnabled(False)
+        self.btn_pause_training.setToolTip("İşlenen dosyalar diske yazılır; devam edince kaldığı yerden sürer")
+        self.btn_pause_training.clicked.connect(self.toggle_pause)
+        training_button_layout.addWidget(self.btn_pause_training)
+
         training_button_layout.addStretch()
         training_layout.addLayout(training_button_layout)
 
@@ -293,6 +326,12 @@ class FaceTrainingGUI(QMainWindow):
         self.status_label.setObjectName("status")
         training_layout.addWidget(self.status_label)
 
+        # Canlı profil özeti (resim/sn, yüz/sn, en pahalı aşamalar, kuyruk, bellek, darboğaz)
+        self.telemetry_label = QLabel("")
+        self.telemetry_label.setObjectName("telemetry")
+        self.telemetry_label.setWordWrap(True)
+        training_layout.addWidget(self.telemetry_label)
+
         training_group.setLayout(training_layout)
         main_layout.addWidget(training_group)
 
@@ -300,9 +339,10 @@ class FaceTrainingGUI(QMainWindow):
         log_group = QGroupBox("📝 Eğitim Günlüğü")
         log_layout = QVBoxLayout()
 
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
         self.log_text.setObjectName("log")
+        self.log_text.setMaximumBlockCount(DEFAULT_LOG_HISTORY)  # Eski satırlar atılır
         self.log_text.setMaximumHeight(200)
         log_layout.addWidget(self.log_text)
 
@@ -348,6 +388,12 @@ class FaceTrainingGUI(QMainWindow):
             padding: 5px;
         }
 
+        QLabel#telemetry {
+            color: #7f8c8d;
+            font-size: 12px;
+            padding: 0px 5px;
+        }
+
         QPushButton#primary {
             background-color: #3498db;
             color: white;
@@ -404,6 +450,25 @@ class FaceTrainingGUI(QMainWindow):
             color: #7f8c8d;
         }
 
+        QPushButton#pause_training {
+            background-color: #f39c12;
+            color: white;
+            border: none;
+            padding: 15px 30px;
+            font-size: 16px;
+            font-weight: bold;
+            border-radius: 8px;
+        }
+
+        QPushButton#pause_training:hover {
+            background-color: #d68910;
+        }
+
+        QPushButton#pause_training:disabled {
+            background-color: #bdc3c7;
+            color: #7f8c8d;
+        }
+
         QProgressBar#progress {
             border: 2px solid #bdc3c7;
             border-radius: 8px;
@@ -417,7 +482,7 @@ class FaceTrainingGUI(QMainWindow):
             border-radius: 6px;
         }
 
-        QTextEdit#log {
+        QPlainTextEdit#log {
             background-color: #2c3e50;
             color: #ecf0f1;
             font-family: 'Consolas', 'Monaco', monospace;
@@ -445,6 +510,11 @@ class FaceTrainingGUI(QMainWindow):
 
     def select_training_folder(self):
         """Eğitim klasörü seçme"""
+        # Kullanıcı klasör seçerken model arka planda yüklenir (bir kez; sonraki eğitimler de kullanır)
+        if self.preload_checkbox.isChecked() and self.preload_thread is None:
+            self.log_message("🔥 Buffalo-L model arka planda yükleniyor...")
+            self.preload_thread = preload_face_app(log=self.log_message)
+
         folder = QFileDialog.getExistingDirectory(
             self,
             "Buffalo-S Lite eğitim için fotoğraf klasörü seçin",
@@ -482,36 +552,44 @@ class FaceTrainingGUI(QMainWindow):
             self.btn_start_training.setEnabled(False)
 
     def check_folder_contents(self, folder):
-        """Klasör içeriğini kontrol et"""
-        try:
-            image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
-            image_count = 0
-
-            for root, _, files in os.walk(folder):
-                for file in files:
-                    if file.lower().endswith(image_extensions):
-                        image_count += 1
-
-            self.log_message(f"📊 Klasörde {image_count} resim dosyası bulundu")
-
-            if image_count == 0:
-                QMessageBox.warning(
-                    self,
-                    "Uyarı",
-                    "Seçilen klasörde hiç resim dosyası bulunamadı!\n\n"
-                    "Desteklenen formatlar: JPG, JPEG, PNG, BMP, TIFF"
-                )
-                self.btn_start_training.setEnabled(False)
-            elif image_count < 10:
-                QMessageBox.information(
-                    self,
-                    "Bilgi",
-                    f"Klasörde {image_count} resim bulundu.\n\n"
-                    "Daha iyi sonuçlar için en az 10-20 resim önerilir."
-                )
-
-        except Exception as e:
-            self.log_message(f"❌ Klasör kontrolü hatası: {str(e)}")
+        """Klasör içeriğini arka planda say (büyük/ağ klasörlerinde arayüz donmaz)"""
+        self.cancel_folder_scan()
+        self.status_label.setText("📊 Klasör taranıyor...")
+        self.folder_scan_worker = FolderScanWorker(folder, self)
+        self.folder_scan_worker.counted.connect(self.update_folder_scan)
+        self.folder_scan_worker.scan_finished.connect(self.folder_scan_finished)
+        self.folder_scan_worker.start()
+
+    def cancel_folder_scan(self):
+        """Süren klasör taramasını bırak (eğitim kendi taramasını yapar)"""
+        if self.folder_scan_worker is not None and self.folder_scan_worker.isRunning():
+            self.folder_scan_worker.cancel()
+
+    def update_folder_scan(self, image_count):
+        self.status_label.setText(f"📊 Klasör taranıyor: {image_count} resim bulundu...")
+
+    def folder_scan_finished(self, folder, image_count):
+        """Klasör taraması bitti: sonucu göster, gerekirse uyar"""
+        if folder != self.training_folder:
+            return  # Bu arada başka klasör seçildi
+        self.log_message(f"📊 Klasörde {image_count} resim dosyası bulundu")
+        self.status_label.setText(f"📊 Klasörde {image_count} resim dosyası bulundu")
+
+        if image_count == 0:
+            QMessageBox.warning(
+                self,
+                "Uyarı",
+                "Seçilen klasörde hiç resim dosyası bulunamadı!\n\n"
+                "Desteklenen formatlar: JPG, JPEG, PNG, BMP, TIFF"
+            )
+            self.btn_start_training.setEnabled(False)
+        elif image_count < 10:
+            QMessageBox.information(
+                self,
+                "Bilgi",
+                f"Klasörde {image_count} resim bulundu.\n\n"
+                "Daha iyi sonuçlar için en az 10-20 resim önerilir."
+            )
 
     def start_training(self):
         """Buffalo-L eğitimi başlat"""
@@ -519,10 +597,11 @@ class FaceTrainingGUI(QMainWindow):
             QMessageBox.warning(self, "Hata", "Model adı ve eğitim klasörü gerekli!")
             return
 
+        incremental = self.incremental_checkbox.isChecked()
+
         # Models klasöründe aynı isimde model var mı kontrol et
-        models_dir = "models"
-        model_path = os.path.join(models_dir, self.model_name)
-        if os.path.exists(model_path):
+        model_path = os.path.join(MODELS_DIR, self.model_name)
+        if os.path.exists(model_path) and not incremental:
             reply = QMessageBox.question(
                 self,
                 "Model Mevcut",
@@ -543,6 +622,7 @@ class FaceTrainingGUI(QMainWindow):
             f"📁 Klasör: {self.training_folder}\n"
             f"📂 Hedef: models/{self.model_name}/\n"
             f"🔄 Alt klasörler dahil edilecek\n"
+            f"{'🔁 Artımlı: sadece yeni/değişen fotoğraflar işlenecek' if incremental else '🆕 Tam eğitim'}\n"
             f"⚡ GPU/CPU otomatik seçilecek\n"
             f"🧠 Buffalo-S Lite (512D embeddings)\n\n"
             f"Eğitimi başlatmak istiyor musunuz?",
@@ -553,19 +633,55 @@ class FaceTrainingGUI(QMainWindow):
         if reply != QMessageBox.Yes:
             return
 
+        # Eğitim klasörü kendisi tararken işlemeye başlar; ön kontrol taramasına gerek kalmaz
+        self.cancel_folder_scan()
+
         # UI durumunu güncelle
         self.btn_start_training.setEnabled(False)
         self.btn_stop_training.setEnabled(True)
+        self.btn_pause_training.setEnabled(True)
+        self.btn_pause_training.setText("⏸️ Duraklat")
         self.btn_select_folder.setEnabled(False)
         self.progress_bar.setValue(0)
+        self.telemetry_label.setText("")
+        self.flush_log()
         self.log_text.clear()
+        if self.log_file_checkbox.isChecked():
+            try:
+                self.log_buffer.open_file(log_file_path(self.model_name))
+                self.log_message(f"📝 Günlük dosyası: {self.log_buffer.file_path}")
+            except OSError as e:
+                self.log_message(f"⚠️ Günlük dosyası açılamadı: {str(e)}")
+
+        # Kayıt formatı seçenekleri (eğitim sırasında değiştirilse de etkilenmesin)
+        storage_options = {
+            'dtype': self.dtype_combo.currentData(),
+            'export_json': self.json_export_checkbox.isChecked(),
+            'ann_index': self.ann_checkbox.isChecked(),
+            'clusters': DEFAULT_CLUSTER_SIMILARITY if self.clusters_checkbox.isChecked() else None,
+            'photos': self.photo_storage_combo.currentData(),
+            'archive': (os.path.join(MODELS_DIR, f"{self.model_name}.zip")
+                        if self.archive_checkbox.isChecked() else None),
+            'shards': self.shards_combo.currentData()
+        }
 
         # Worker thread başlat
-        self.training_worker = TrainingWorker(self.training_folder, self.model_name, recursive=True)
-        self.training_worker.progress.connect(self.update_progress)
-        self.training_worker.log_message.connect(self.log_message)
+        self.training_worker = TrainingWorker(
+            self.training_folder, self.model_name, self.log_buffer, recursive=True, incremental=incremental,
+            use_cache=self.cache_checkbox.isChecked(),
+            detect_max_side=DEFAULT_DETECT_MAX_SIDE if self.reduced_decode_checkbox.isChecked() else 0,
+            processes=default_process_count() if self.process_pool_checkbox.isChecked() else 0,
+            dedup=self.dedup_checkbox.isChecked(),
+            dedup_distance=DEFAULT_MAX_DISTANCE if self.near_dup_checkbox.isChecked() else None,
+            face_dedup_similarity=DEFAULT_FACE_SIMILARITY if self.face_dedup_checkbox.isChecked() else None,
+            quality=FaceQualityFilter() if self.quality_checkbox.isChecked() else None,
+            storage_options=storage_options
+        )
+        self.training_worker.saving.connect(self.training_saving)
         self.training_worker.finished.connect(self.training_finished)
         self.training_worker.error.connect(self.training_error)
+        self.training_worker.cancelled.connect(self.training_cancelled)
+        self.training_worker.telemetry.connect(self.update_telemetry)
         self.training_worker.start()
 
         status_bar = self.statusBar()
@@ -578,170 +694,103 @@ class FaceTrainingGUI(QMainWindow):
             reply = QMessageBox.question(
                 self,
                 "Buffalo-S Lite Eğitimi Durdur",
-                "Eğitim durdurulacak. Devam etmek istiyor musunuz?",
+                "Eğitim durdurulacak. İşlenen dosyalar kaydedilir; aynı klasör ve model adıyla "
+                "yeniden başlatınca kaldığı yerden devam eder.\n\nDevam etmek istiyor musunuz?",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
 
             if reply == QMessageBox.Yes:
-                self.training_worker.terminate()
-                self.training_worker.wait()
-                self.reset_ui()
-                self.log_message("⏹️ Buffalo-S Lite eğitim kullanıcı tarafından durduruldu")
-                status_bar = self.statusBar()
-                if status_bar:
-                    status_bar.showMessage("Eğitim durduruldu")
+                # Worker mevcut resmi bitirip durur; sonuç cancelled sinyaliyle gelir
+                self.training_worker.cancel()
+                self.btn_stop_training.setEnabled(False)
+                self.btn_pause_training.setEnabled(False)
+                self.status_label.setText("Durduruluyor... (mevcut resim tamamlanıyor)")
+
+    def toggle_pause(self):
+        """Eğitimi duraklat / devam ettir"""
+        if not self.training_worker or not self.training_worker.isRunning():
+            return
+        status_bar = self.statusBar()
+        if self.training_worker.is_paused():
+            self.training_worker.resume()
+            self.btn_pause_training.setText("⏸️ Duraklat")
+            if status_bar:
+                status_bar.showMessage("Buffalo-S Lite eğitim devam ediyor...")
+        else:
+            self.training_worker.pause()
+            self.btn_pause_training.setText("▶️ Devam Et")
+            if status_bar:
+                status_bar.showMessage("Eğitim duraklatıldı")
+
+    def training_cancelled(self, message):
+        """Eğitim kullanıcı isteğiyle durdu"""
+        self.log_message(f"⏹️ {message}")
+        self.reset_ui()
+        status_bar = self.statusBar()
+        if status_bar:
+            status_bar.showMessage("Eğitim durduruldu")
 
     def update_progress(self, message, progress):
         """İlerleme güncelleme"""
         self.progress_bar.setValue(progress)
         self.status_label.setText(message)
 
-    def log_message(self, message):
-        """Log mesajı ekle"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}"
-        self.log_text.append(formatted_message)
-
-        # Otomatik scroll
-        cursor = self.log_text.textCursor()
-        cursor.movePosition(cursor.End)
-        self.log_text.setTextCursor(cursor)
-
-        # Uygulama güncellemesi
-        QApplication.processEvents()
-
-    def training_finished(self, face_database, training_folder, model_name):
-        """Buffalo-S Lite eğitim tamamlandı - models klasörü yapısında kaydet"""
-        try:
-            self.face_database = face_database
-            self.log_message("💾 Models klasöründe Buffalo-S Lite model oluşturuluyor...")
-
-            # Models klasörünü oluştur
-            models_dir = "models"
-            if not os.path.exists(models_dir):
-                os.makedirs(models_dir)
-
-            model_dir = os.path.join(models_dir, model_name)
-
-            # Model klasörünü temizle/oluştur
-            if os.path.exists(model_dir):
-                shutil.rmtree(model_dir)
-            os.makedirs(model_dir)
-            self.log_message(f"📂 Model klasörü oluşturuldu: models/{model_name}/")
-
-            # Eğitim verilerini kopyala
-            folder_name = os.path.basename(training_folder.rstrip(os.sep))
-            dest_folder = os.path.join(model_dir, folder_name)
-            shutil.copytree(training_folder, dest_folder)
-            self.log_message(f"✅ Eğitim verileri kopyalandı: {folder_name}")
-
-            # JSON veritabanını kaydet
-            database_path = os.path.join(model_dir, "face_database.json")
-
-            # Face database'i JSON serializable formatına çevir
-            json_database = {}
-            for key, value in face_database.items():
-                # Key'i string'e çevir
-                str_key = key
-
-                # Value'dan embedding'i çıkar ve listeye çevir
-                json_value = {
-                    "embedding": value["embedding"].tolist() if hasattr(value["embedding"], 'tolist') else list(
-                        value["embedding"]),
-                    "path": value.get("path", ""),
-                    "bbox": value.get("bbox", []),
-                    "kps": value.get("kps", None),
-                    "confidence": float(value.get("confidence", 0.95))
-                }
-                json_database[str_key] = json_value
-
-            # JSON dosyasını kaydet
-            with open(database_path, 'w', encoding='utf-8') as f:
-                json.dump(json_database, f, indent=2, ensure_ascii=False)
-            self.log_message(f"💾 JSON veritabanı kaydedildi: models/{model_name}/face_database.json")
-
-            # JSON metadata oluştur
-            metadata = {
-                "name": model_name,
-                "created_at": datetime.now().isoformat(),
-                "total_faces": len(face_database),
-                "source_folder": os.path.basename(training_folder),
-                "status": "completed",
-                "description": f"Buffalo-S Lite modeli - {len(face_database)} yüz (512D)",
-                "type": "face_recognition",
-                "algorithm": "Buffalo-S Lite",
-                "embedding_size": 512,
-                "threshold": 0.5,
-                "files": {
-                    "database": "face_database.json",
-                    "photos": folder_name
-                }
-            }
-
-            metadata_path = os.path.join(model_dir, "model_info.json")
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
-            self.log_message(f"📄 Model metadata kaydedildi: model_info.json")
-
-            # Bilgi dosyası oluştur
-            self.create_model_info_file(model_dir, training_folder, model_name, len(face_database))
-
-            # UI'yi resetle
-            self.reset_ui()
-
-            # Başarı mesajı
-            QMessageBox.information(
-                self,
-                "🎉 Buffalo-S Lite Model Hazır!",
-                f"✅ Buffalo-S Lite model başarıyla oluşturuldu!\n\n"
-                f"🏷️ Model: {model_name}\n"
-                f"📂 Konum: models/{model_name}/\n"
-                f"👥 Toplam yüz: {len(face_database)}\n"
-                f"🧠 Algoritma: Buffalo-S Lite (512D)\n"
-                f"📄 Veritabanı: face_database.json\n"
-                f"📊 Metadata: model_info.json\n\n"
-                f"🌐 Model web arayüzünden kullanıma hazır!\n"
-                f"Client-side Buffalo-S Lite ile tam uyumlu."
-            )
+    def update_telemetry(self, snapshot):
+        """Canlı profil özetini göster"""
+        self.telemetry_label.setText(f"📊 {format_summary(snapshot)}")
 
-            status_bar = self.statusBar()
-            if status_bar:
-                status_bar.showMessage("Buffalo-S Lite model başarıyla oluşturuldu!")
+    def log_message(self, message):
+        """Log mesajı ekle (bir sonraki zamanlayıcı turunda gösterilir)"""
+        self.log_buffer.log(message)
+
+    def flush_log(self):
+        """Tampondaki günlük satırlarını tek seferde ekle, son ilerlemeyi göster"""
+        lines, dropped, progress = self.log_buffer.drain()
+        if dropped:
+            lines.insert(0, f"… {dropped} satır gösterilmedi"
+                            f"{' (tamamı günlük dosyasında)' if self.log_buffer.file_path else ''}")
+        if lines:
+            self.log_text.appendPlainText("\n".join(lines))
+            # Otomatik scroll
+            scroll_bar = self.log_text.verticalScrollBar()
+            scroll_bar.setValue(scroll_bar.maximum())
+        if progress is not None:
+            self.update_progress(*progress)
+
+    def training_saving(self):
+        """Model kaydı worker thread'de başladı; kayıt yarıda kesilmez"""
+        self.btn_stop_training.setEnabled(False)
+        self.btn_pause_training.setEnabled(False)
+        status_bar = self.statusBar()
+        if status_bar:
+            status_bar.showMessage("Buffalo-S Lite model kaydediliyor...")
 
-        except Exception as e:
-            self.training_error(f"Model oluşturma hatası: {str(e)}")
+    def training_finished(self, model_name, metadata):
+        """Buffalo-S Lite eğitim ve kayıt tamamlandı (worker thread'de) - sonucu göster"""
+        # UI'yi resetle
+        self.reset_ui()
 
-    def create_model_info_file(self, model_dir, training_folder, model_name, face_count):
-        """Model bilgi dosyası oluştur"""
-        try:
-            info_file = os.path.join(model_dir, "README.txt")
-            with open(info_file, 'w', encoding='utf-8') as f:
-                f.write(f"Buffalo-S Lite AI Yüz Tanıma Modeli: {model_name}\n")
-                f.write("=" * 60 + "\n\n")
-                f.write(f"Model Adı: {model_name}\n")
-                f.write(f"Oluşturma Tarihi: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Kaynak Klasör: {training_folder}\n")
-                f.write(f"Toplam Yüz: {face_count}\n")
-                f.write(f"Algoritma: Buffalo-S Lite\n")
-                f.write(f"Embedding Boyutu: 512D\n")
-                f.write(f"Threshold: 0.5\n\n")
-                f.write("📁 DOSYA YAPISI:\n")
-                f.write(f"- face_database.json  (JSON veritabanı - 512D embeddings)\n")
-                f.write(f"- model_info.json     (JSON metadata)\n")
-                f.write(f"- {os.path.basename(training_folder)}/         (Eğitim fotoğrafları)\n")
-                f.write(f"- README.txt          (Bu dosya)\n\n")
-                f.write("🌐 WEB ARAYÜZÜ KULLANIMI:\n")
-                f.write("- Model otomatik olarak web arayüzünde görünecek\n")
-                f.write("- Genel sekreterlik model_info.json'dan bilgileri okuyacak\n")
-                f.write("- Client-side Buffalo-S Lite ile tam uyumlu\n")
-                f.write("- 512D embeddings ile yüksek doğruluk\n")
-                f.write("- Direkt kullanıma hazır!\n")
-
-            self.log_message("📄 Model bilgi dosyası oluşturuldu: README.txt")
+        # Başarı mesajı
+        QMessageBox.information(
+            self,
+            "🎉 Buffalo-S Lite Model Hazır!",
+            f"✅ Buffalo-S Lite model başarıyla oluşturuldu!\n\n"
+            f"🏷️ Model: {model_name}\n"
+            f"📂 Konum: models/{model_name}/\n"
+            f"👥 Toplam yüz: {metadata['total_faces']}\n"
+            f"🧠 Algoritma: Buffalo-S Lite (512D)\n"
+            f"📄 Veritabanı: {SHARDS_FILE if metadata.get('shards') else EMBEDDINGS_FILE + ' + ' + INDEX_FILE}\n"
+            f"📊 Metadata: model_info.json\n"
+            + (f"📦 ZIP: {metadata['archive']}\n" if metadata.get('archive') else "")
+            + "\n"
+            f"🌐 Model web arayüzünden kullanıma hazır!\n"
+            f"Client-side Buffalo-S Lite ile tam uyumlu."
+        )
 
-        except Exception as e:
-            self.log_message(f"❌ Bilgi dosyası oluşturma hatası: {str(e)}")
+        status_bar = self.statusBar()
+        if status_bar:
+            status_bar.showMessage("Buffalo-S Lite model başarıyla oluşturuldu!")
 
     def training_error(self, error_message):
         """Eğitim hatası"""
@@ -762,25 +811,34 @@ class FaceTrainingGUI(QMainWindow):
         """UI'yi başlangıç durumuna getir"""
         self.validate_inputs()  # Model adı ve klasör kontrolü yap
         self.btn_stop_training.setEnabled(False)
+        self.btn_pause_training.setEnabled(False)
+        self.btn_pause_training.setText("⏸️ Duraklat")
         self.btn_select_folder.setEnabled(True)
         self.model_name_input.setEnabled(True)
+        self.flush_log()
+        self.log_buffer.close_file()
         self.progress_bar.setValue(0)
         self.status_label.setText("Buffalo-S Lite model oluşturmaya hazır")
 
     def closeEvent(self, a0):
         """Pencere kapatılırken"""
+        self.cancel_folder_scan()
         if self.training_worker and self.training_worker.isRunning():
             reply = QMessageBox.question(
                 self,
                 "Çıkış",
-                "Buffalo-S Lite eğitim devam ediyor. Yine de çıkmak istiyor musunuz?",
+                "Buffalo-S Lite eğitim devam ediyor. Yine de çıkmak istiyor musunuz?\n\n"
+                "İşlenen dosyalar kaydedilir; sonraki eğitim kaldığı yerden devam eder.",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
 
             if reply == QMessageBox.Yes:
-                self.training_worker.terminate()
+                # Mevcut resim bitene kadar bekle; ONNX oturumu yarıda öldürülmez
+                self.training_worker.cancel()
                 self.training_worker.wait()
+                self.flush_log()
+                self.log_buffer.close_file()
                 a0.accept()
             else:
                 a0.ignore()
@@ -0,0 +1,87 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import crypto from "crypto";
+import fs from "fs";
+import os from "os";
+import path from "path";
+import AdmZip from "adm-zip";
+import { extractModelArchive } from "./modelArchive";
+import { resolveBlobPhoto } from "./modelStore";
+
+const PHOTO = Buffer.from('kamp fotoğrafı (jpeg baytları)');
+const OTHER_PHOTO = Buffer.from('başka bir modelin fotoğrafı');
+
+function sha1(data: Buffer): string {
+  return crypto.createHash('sha1').update(data).digest('hex');
+}
+
+function blobName(data: Buffer): string {
+  const digest = sha1(data);
+  return `${digest.slice(0, 2)}/${digest}.jpg`;
+}
+
+// face_store.export_model_archive düzeninde blobs modlu model ZIP'i:
+// bundled -> fotoğraflar models/<ad>/photo_blobs/ altında, shared -> ZIP kökünde paylaşılan photo_blobs/
+function createBlobModelZip(layout: 'bundled' | 'shared' | 'missing'): string {
+  const zip = new AdmZip();
+  const root = 'models/kamp_2025';
+  zip.addFile(`${root}/model_info.json`, Buffer.from(JSON.stringify({
+    name: 'kamp_2025', description: 'blobs modlu model', storage: { format: 'binary', photos: 'blobs' }
+  })));
+  zip.addFile(`${root}/face_index.json`, Buffer.from(JSON.stringify({
+    version: 1, dtype: 'float32', count: 1, dim: 4, keys: ['gun1/a.jpg||face_0'], paths: ['gun1/a.jpg'],
+    bboxes: [[0, 0, 10, 10]], kps: [null], confidences: [0.9]
+  })));
+  zip.addFile(`${root}/face_embeddings.bin`, Buffer.from(Float32Array.from([1, 0, 0, 0]).buffer));
+  zip.addFile(`${root}/training_manifest.json`, Buffer.from(JSON.stringify({
+    version: 1, files: { 'gun1/a.jpg': { size: PHOTO.length, mtime: 0, sha1: sha1(PHOTO) } }
+  })));
+  if (layout === 'bundled') {
+    zip.addFile(`${root}/photo_blobs/${blobName(PHOTO)}`, PHOTO);
+  } else if (layout === 'shared') {
+    zip.addFile(`photo_blobs/${blobName(PHOTO)}`, PHOTO);
+    zip.addFile(`photo_blobs/${blobName(OTHER_PHOTO)}`, OTHER_PHOTO);
+  }
+  const zipPath = path.join(fs.mkdtempSync(path.join(os.tmpdir(), 'model_zip_')), 'model.zip');
+  zip.writeZip(zipPath);
+  return zipPath;
+}
+
+test('blobs modlu modelin fotoğrafları ZIP ile model klasörüne gelir', async () => {
+  const modelsRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'models_'));
+  try {
+    const result = await extractModelArchive(createBlobModelZip('bundled'), modelsRoot, 'yedek_ad');
+    assert.equal(result.trainingDataPath, path.join(modelsRoot, 'kamp_2025'));
+
+    // Sunucunun çalışma dizininden bağımsız: model klasörüne göre çözülür
+    const photoPath = resolveBlobPhoto(result.trainingDataPath, 'gun1/a.jpg');
+    assert.ok(photoPath);
+    assert.ok(photoPath.startsWith(path.join(result.trainingDataPath, 'photo_blobs')));
+    assert.deepEqual(fs.readFileSync(photoPath), PHOTO);
+  } finally {
+    fs.rmSync(modelsRoot, { recursive: true, force: true });
+  }
+});
+
+test('ZIP kökündeki paylaşılan depodan sadece modelin fotoğrafları alınır', async () => {
+  const modelsRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'models_'));
+  try {
+    const result = await extractModelArchive(createBlobModelZip('shared'), modelsRoot, 'yedek_ad');
+    const blobDir = path.join(result.trainingDataPath, 'photo_blobs');
+    assert.ok(fs.existsSync(path.join(blobDir, blobName(PHOTO))));
+    assert.equal(fs.existsSync(path.join(blobDir, blobName(OTHER_PHOTO))), false);
+    assert.deepEqual(fs.readFileSync(resolveBlobPhoto(result.trainingDataPath, 'gun1/a.jpg')!), PHOTO);
+  } finally {
+    fs.rmSync(modelsRoot, { recursive: true, force: true });
+  }
+});
+
+test('fotoğrafları pakette olmayan blobs modlu model reddedilir', async () => {
+  const modelsRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'models_'));
+  try {
+    await assert.rejects(extractModelArchive(createBlobModelZip('missing'), modelsRoot, 'yedek_ad'), /--export-zip/);
+    assert.equal(fs.existsSync(path.join(modelsRoot, 'kamp_2025')), false);
+  } finally {
+    fs.rmSync(modelsRoot, { recursive: true, force: true });
+  }
+});
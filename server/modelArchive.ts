@@ -0,0 +1,203 @@
+import path from "path";
+import fs from "fs";
+import AdmZip from "adm-zip";
+import { PHOTO_BLOB_DIR, blobPhotoName, detectModelStore, loadTrainingManifest } from "./modelStore";
+
+// Yüklenen model ZIP'lerini (models/<ad>/... ya da eski training_package/) models klasörüne açar.
+
+export interface ExtractedModel {
+  faceCount: number;
+  trainingDataPath: string;
+  modelInfo?: {
+    name: string;
+    description: string;
+    algorithm: string;
+    threshold: number;
+    created_at: string;
+    source_folder: string;
+  };
+}
+
+// İçerik deposunda fotoğraf tutan modelin (photos='blobs') manifestteki fotoğraflarını models/<ad>/photo_blobs/
+// altında topla: export_model_archive bunları zaten oraya koyar; ZIP kökünde models/ ile yan yana bir
+// photo_blobs/ varsa sadece modelin fotoğrafları oradan alınır. Eksik fotoğraf varsa model reddedilir.
+export function bundleBlobPhotos(modelDir: string, extractRoot: string): number {
+  const files = loadTrainingManifest(modelDir) || {};
+  const ownDir = path.join(modelDir, PHOTO_BLOB_DIR);
+  const sharedDir = path.join(extractRoot, PHOTO_BLOB_DIR);
+  let count = 0;
+  let missing = 0;
+  for (const [imagePath, entry] of Object.entries(files)) {
+    if (!entry?.sha1) continue;
+    const name = blobPhotoName(entry.sha1, imagePath);
+    const target = path.join(ownDir, name);
+    if (!fs.existsSync(target)) {
+      const source = path.join(sharedDir, name);
+      if (!fs.existsSync(source)) {
+        missing++;
+        continue;
+      }
+      fs.mkdirSync(path.dirname(target), { recursive: true });
+      fs.copyFileSync(source, target);
+    }
+    count++;
+  }
+  if (missing > 0) {
+    throw new Error(`Model fotoğrafları içerik deposunda (${PHOTO_BLOB_DIR}) ve ZIP'te ${missing} fotoğraf eksik - ` +
+      `modeli face_train_cli.py --export-zip (GUI'de "ZIP oluştur") ile paketleyin`);
+  }
+  return count;
+}
+
+export async function extractModelArchive(zipPath: string, modelsRoot: string, currentModelName: string):
+    Promise<ExtractedModel> {
+  const tempDir = path.join('/tmp', `extract_${Date.now()}`);
+  
+  // Geçici dizin oluştur
+  if (!fs.existsSync(tempDir)) {
+    fs.mkdirSync(tempDir, { recursive: true });
+  }
+  
+  let modelInfo: any = undefined;
+  let finalModelName = currentModelName; // Fallback olarak mevcut isim
+  
+  try {
+    // ZIP dosyasını aç
+    const zip = new AdmZip(zipPath);
+    zip.extractAllTo(tempDir, true);
+    console.log(`ZIP extracted to: ${tempDir}`);
+    
+    // face_training_gui.py'nin yeni yapısına uygun model klasörünü bul
+    // Artık models/model_adı/ formatında direkt oluşturuyor
+    const modelsDir = path.join(tempDir, 'models');
+    let modelDir = '';
+    
+    if (fs.existsSync(modelsDir)) {
+      // Yeni yapı: models/model_adı/
+      const modelFolders = fs.readdirSync(modelsDir);
+      if (modelFolders.length > 0) {
+        modelDir = path.join(modelsDir, modelFolders[0]);
+        finalModelName = modelFolders[0]; // Gerçek model adını al
+        console.log(`New model structure found: models/${finalModelName}/`);
+      } else {
+        throw new Error('Models klasöründe model bulunamadı');
+      }
+    } else {
+      // Eski yapı için backward compatibility: training_package/
+      const trainingPackageDir = path.join(tempDir, 'training_package');
+      if (fs.existsSync(trainingPackageDir)) {
+        modelDir = trainingPackageDir;
+        console.log('Old training_package structure found (backward compatible)');
+      } else {
+        throw new Error('ZIP dosyasında ne models/ ne de training_package/ klasörü bulunamadı');
+      }
+    }
+    
+    // model_info.json dosyasını oku (varsa)
+    const modelInfoPath = path.join(modelDir, 'model_info.json');
+    if (fs.existsSync(modelInfoPath)) {
+      try {
+        const jsonContent = fs.readFileSync(modelInfoPath, 'utf-8');
+        modelInfo = JSON.parse(jsonContent);
+        finalModelName = modelInfo.name; // JSON'dan gerçek model adını al
+        console.log(`Model JSON metadata found: ${modelInfo.name} - ${modelInfo.description}`);
+      } catch (jsonError) {
+        console.warn('model_info.json okunamadı, devam ediliyor:', jsonError);
+      }
+    } else {
+      console.log('model_info.json bulunamadı, varsayılan bilgiler kullanılacak');
+    }
+    
+    // Binary depo (face_index.json), parçalı depo (face_shards.json) veya face_database.json dosyasını kontrol et
+    const storeKind = detectModelStore(modelDir);
+    
+    if (!storeKind) {
+      throw new Error('face_index.json, face_shards.json veya face_database.json dosyası bulunamadı - Güncel face training GUI kullanın');
+    }
+    
+    console.log(`✅ Yüz deposu bulundu: ${storeKind} (PKL dependency gerekmez)`);
+    
+    // Fotoğrafları içerik deposunda tutan model: fotoğraflar ZIP'te olmalı (models/<ad>/photo_blobs/)
+    if (modelInfo?.storage?.photos === 'blobs') {
+      const blobCount = bundleBlobPhotos(modelDir, tempDir);
+      console.log(`🗃️ İçerik deposu fotoğrafları pakette: ${blobCount}`);
+    }
+    
+    // Hedef dizin oluştur (gerçek model adıyla)
+    const targetDir = path.join(modelsRoot, finalModelName);
+    if (!fs.existsSync(targetDir)) {
+      fs.mkdirSync(targetDir, { recursive: true });
+    }
+    
+    // Tüm dosya ve klasörleri hedef dizine kopyala (recursive)
+    const copyRecursive = (source: string, destination: string) => {
+      const stats = fs.statSync(source);
+      
+      if (stats.isDirectory()) {
+        // Klasör ise recursive kopyala
+        if (!fs.existsSync(destination)) {
+          fs.mkdirSync(destination, { recursive: true });
+        }
+        const files = fs.readdirSync(source);
+        for (const file of files) {
+          copyRecursive(
+            path.join(source, file),
+            path.join(destination, file)
+          );
+        }
+        console.log(`Copied directory: ${path.basename(source)}`);
+      } else {
+        // Dosya ise direkt kopyala
+        fs.copyFileSync(source, destination);
+        console.log(`Copied file: ${path.basename(source)}`);
+      }
+    };
+    
+    const files = fs.readdirSync(modelDir);
+    for (const file of files) {
+      const sourcePath = path.join(modelDir, file);
+      const targetPath = path.join(targetDir, file);
+      copyRecursive(sourcePath, targetPath);
+    }
+    
+    // Yüz sayısını hesapla (tüm klasörlerde recursive olarak)
+    const countImagesRecursive = (dir: string): number => {
+      let count = 0;
+      const items = fs.readdirSync(dir);
+      for (const item of items) {
+        const fullPath = path.join(dir, item);
+        if (fs.statSync(fullPath).isDirectory()) {
+          count += countImagesRecursive(fullPath);
+        } else if (item.match(/\.(jpg|jpeg|png|bmp|tiff)$/i)) {
+          count++;
+        }
+      }
+      return count;
+    };
+    
+    const faceCount = countImagesRecursive(targetDir);
+    
+    // Geçici dosyaları temizle
+    fs.rmSync(tempDir, { recursive: true, force: true });
+    fs.unlinkSync(zipPath);
+    
+    return {
+      faceCount,
+      trainingDataPath: targetDir,
+      modelInfo: modelInfo ? {
+        name: finalModelName,
+        description: modelInfo.description || 'Model açıklaması yok',
+        algorithm: modelInfo.algorithm || 'InsightFace Buffalo_L',
+        threshold: modelInfo.threshold || 0.5,
+        created_at: modelInfo.created_at || new Date().toISOString(),
+        source_folder: modelInfo.source_folder || 'Bilinmiyor'
+      } : undefined
+    };
+  } catch (error) {
+    // Hata durumunda geçici dosyaları temizle
+    if (fs.existsSync(tempDir)) {
+      fs.rmSync(tempDir, { recursive: true, force: true });
+    }
+    throw error;
+  }
+}
@@ -0,0 +1,112 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import fs from "fs";
+import os from "os";
+import path from "path";
+import { detectModelStore, loadModelClusters, loadModelFaces } from "./modelStore";
+
+// face_store.py formatında küçük bir binary depo yaz (float32 ya da boyut başına ölçekli int8)
+function writeStore(dir: string, keys: string[], rows: number[][], dtype: 'float32' | 'int8' = 'float32') {
+  fs.mkdirSync(dir, { recursive: true });
+  const dim = rows[0].length;
+  const index: any = {
+    version: 1, dtype, count: keys.length, dim, keys,
+    paths: keys.map((key) => key.split('||')[0]),
+    bboxes: keys.map(() => [0, 0, 10, 10]),
+    kps: keys.map(() => null),
+    confidences: keys.map(() => 0.9)
+  };
+  let data: Buffer;
+  if (dtype === 'int8') {
+    index.scale = new Array(dim).fill(1 / 127);
+    data = Buffer.from(Int8Array.from(rows.flat().map((value) => Math.round(value * 127))).buffer);
+  } else {
+    data = Buffer.from(Float32Array.from(rows.flat()).buffer);
+  }
+  fs.writeFileSync(path.join(dir, 'face_embeddings.bin'), data);
+  fs.writeFileSync(path.join(dir, 'face_index.json'), JSON.stringify(index));
+}
+
+// face_clusters.py formatında kümeler: her satır kendi kümesi
+function writeClusters(dir: string, rows: number[][]) {
+  const dim = rows[0].length;
+  fs.writeFileSync(path.join(dir, 'face_clusters.bin'), Buffer.from(Float32Array.from(rows.flat()).buffer));
+  fs.writeFileSync(path.join(dir, 'face_clusters.json'), JSON.stringify({
+    version: 1, count: rows.length, clusters: rows.length, dim, margin: 0.1,
+    members: rows.map((_, row) => [row])
+  }));
+}
+
+// İki parçalı model: kökte sadece face_shards.json ve shards/ (write_shards kök depoyu siler)
+function createShardedModel(): string {
+  const modelPath = fs.mkdtempSync(path.join(os.tmpdir(), 'sharded_model_'));
+  const first = [[1, 0, 0, 0], [0, 1, 0, 0]];
+  const second = [[0, 0, 1, 0]];
+  writeStore(path.join(modelPath, 'shards', '000'), ['a.jpg||face_0', 'b.jpg||face_0'], first);
+  writeStore(path.join(modelPath, 'shards', '001'), ['c.jpg||face_0'], second, 'int8');
+  writeClusters(path.join(modelPath, 'shards', '000'), first);
+  writeClusters(path.join(modelPath, 'shards', '001'), second);
+  fs.writeFileSync(path.join(modelPath, 'face_shards.json'), JSON.stringify({
+    version: 1, strategy: 'hash', count: 2, dtype: 'float32', faces: 3,
+    shards: [
+      { name: '000', dir: 'shards/000', files: 2, faces: 2 },
+      { name: '001', dir: 'shards/001', files: 1, faces: 1 }
+    ]
+  }));
+  fs.writeFileSync(path.join(modelPath, 'face_aliases.json'), JSON.stringify({
+    version: 1, aliases: { 'c.jpg||face_0': ['c_copy.jpg'] }
+  }));
+  return modelPath;
+}
+
+test('parçalı model geçerli bir yüz deposu sayılır', () => {
+  const modelPath = createShardedModel();
+  try {
+    assert.equal(fs.existsSync(path.join(modelPath, 'face_index.json')), false);
+    assert.equal(detectModelStore(modelPath), 'sharded');
+  } finally {
+    fs.rmSync(modelPath, { recursive: true, force: true });
+  }
+});
+
+test('parçalı modelin yüzleri parça sırasıyla birleştirilir', () => {
+  const modelPath = createShardedModel();
+  try {
+    const loaded = loadModelFaces(modelPath);
+    assert.ok(loaded);
+    assert.deepEqual(loaded.faces.map((face) => face.imagePath), ['a.jpg||face_0', 'b.jpg||face_0', 'c.jpg||face_0']);
+    assert.deepEqual(Array.from(loaded.faces[1].embedding), [0, 1, 0, 0]);
+    // int8 parça ölçekle çözülür
+    assert.ok(Math.abs(loaded.faces[2].embedding[2] - 1) < 1e-6);
+    assert.deepEqual(loaded.faces[2].aliases, ['c_copy.jpg']);
+    assert.match(loaded.source, /2 parça/);
+  } finally {
+    fs.rmSync(modelPath, { recursive: true, force: true });
+  }
+});
+
+test('parça kümeleri genel satır numaralarıyla birleştirilir', () => {
+  const modelPath = createShardedModel();
+  try {
+    const clusters = loadModelClusters(modelPath, 3);
+    assert.ok(clusters);
+    assert.deepEqual(clusters.members, [[0], [1], [2]]);
+    assert.equal(clusters.centroids.length, 3 * 4);
+    assert.equal(loadModelClusters(modelPath, 4), null);
+  } finally {
+    fs.rmSync(modelPath, { recursive: true, force: true });
+  }
+});
+
+test('model klasörü dışını gösteren parça reddedilir', () => {
+  const modelPath = createShardedModel();
+  try {
+    const manifestPath = path.join(modelPath, 'face_shards.json');
+    const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+    manifest.shards[1].dir = '../elsewhere';
+    fs.writeFileSync(manifestPath, JSON.stringify(manifest));
+    assert.throws(() => loadModelFaces(modelPath), /model dışında/);
+  } finally {
+    fs.rmSync(modelPath, { recursive: true, force: true });
+  }
+});
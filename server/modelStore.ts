@@ -0,0 +1,250 @@
+import path from "path";
+import fs from "fs";
+
+// Eğitilmiş model klasörü (models/<ad>/) okuyucuları: binary depo, parçalı depo, JSON veritabanı,
+// takma adlar, kimlik kümeleri ve içerik deposundaki (photo_blobs) fotoğraflar. Formatlar Python
+// tarafındaki face_store.py / face_shards.py / face_clusters.py ile aynıdır.
+
+export type ModelStoreKind = 'binary' | 'sharded' | 'json';
+
+export interface FaceClusters {
+  centroids: Float32Array;
+  dim: number;
+  members: number[][];
+  margin: number;
+}
+
+// IEEE 754 half-precision (float16) değerini number'a çevir
+export function halfToFloat(h: number): number {
+  const sign = h & 0x8000 ? -1 : 1;
+  const exponent = (h >> 10) & 0x1f;
+  const fraction = h & 0x03ff;
+  if (exponent === 0) return sign * Math.pow(2, -14) * (fraction / 1024);
+  if (exponent === 0x1f) return fraction ? NaN : sign * Infinity;
+  return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+}
+
+// Model klasöründeki yüz deposunun türü: binary (face_index.json), parçalı (face_shards.json) ya da JSON
+export function detectModelStore(modelPath: string): ModelStoreKind | null {
+  if (fs.existsSync(path.join(modelPath, 'face_index.json'))) return 'binary';
+  if (fs.existsSync(path.join(modelPath, 'face_shards.json'))) return 'sharded';
+  if (fs.existsSync(path.join(modelPath, 'face_database.json'))) return 'json';
+  return null;
+}
+
+// Yinelenen fotoğraflar (face_aliases.json): { yüz anahtarı: [aynı yüzü içeren diğer fotoğraflar] }
+export function loadFaceAliases(modelPath: string): Record<string, string[]> {
+  const aliasesPath = path.join(modelPath, 'face_aliases.json');
+  try {
+    if (!fs.existsSync(aliasesPath)) return {};
+    const data = JSON.parse(fs.readFileSync(aliasesPath, 'utf8'));
+    return data.version === 1 && data.aliases ? data.aliases : {};
+  } catch {
+    return {};
+  }
+}
+
+// Parça listesi (face_shards.json): parça klasörleri model klasörünün içinde olmalı (yüklenen ZIP'lere güvenilmez)
+export function loadShardDirs(modelPath: string): string[] | null {
+  const shardsPath = path.join(modelPath, 'face_shards.json');
+  if (!fs.existsSync(shardsPath)) return null;
+  const manifest = JSON.parse(fs.readFileSync(shardsPath, 'utf8'));
+  if (manifest.version !== 1 || !Array.isArray(manifest.shards)) return null;
+
+  const root = path.resolve(modelPath);
+  return manifest.shards.map((shard: { dir: string }) => {
+    const shardDir = path.resolve(root, shard.dir);
+    if (!shardDir.startsWith(root + path.sep)) {
+      throw new Error(`Parça klasörü model dışında: ${shard.dir}`);
+    }
+    return shardDir;
+  });
+}
+
+// Binary depoyu (face_embeddings.bin + face_index.json) oku; model kökü ya da parçalı modelde bir parça klasörü
+export function loadEmbeddingStore(storePath: string, aliases: Record<string, string[]>):
+    { faces: any[]; dtype: string } | null {
+  const indexPath = path.join(storePath, 'face_index.json');
+  const embeddingsPath = path.join(storePath, 'face_embeddings.bin');
+  if (!fs.existsSync(indexPath) || !fs.existsSync(embeddingsPath)) return null;
+
+  const index = JSON.parse(fs.readFileSync(indexPath, 'utf8'));
+  const buffer = fs.readFileSync(embeddingsPath);
+  const { count, dim, dtype } = index;
+
+  // Buffer hizalı olmayabilir - typed array için kopyala
+  const itemSize = dtype === 'int8' ? 1 : dtype === 'float16' ? 2 : 4;
+  const raw = buffer.buffer.slice(buffer.byteOffset, buffer.byteOffset + count * dim * itemSize);
+
+  let matrix: Float32Array;
+  if (dtype === 'float16') {
+    const halves = new Uint16Array(raw);
+    matrix = new Float32Array(count * dim);
+    for (let i = 0; i < halves.length; i++) matrix[i] = halfToFloat(halves[i]);
+  } else if (dtype === 'int8') {
+    // Boyut başına ölçekle nicemlenmiş satırlar (face_quant.py): değer = q * scale[boyut]
+    const quantized = new Int8Array(raw);
+    const scale: number[] = index.scale;
+    matrix = new Float32Array(count * dim);
+    for (let i = 0; i < quantized.length; i++) matrix[i] = quantized[i] * scale[i % dim];
+  } else {
+    matrix = new Float32Array(raw);
+  }
+
+  const faces = index.keys.map((key: string, row: number) => ({
+    imagePath: key,
+    embedding: matrix.subarray(row * dim, (row + 1) * dim),
+    path: index.paths[row],
+    bbox: index.bboxes[row],
+    kps: index.kps[row],
+    confidence: index.confidences[row],
+    aliases: aliases[key] || []
+  }));
+  return { faces, dtype };
+}
+
+// Model yüz verisini yükle: önce binary depo, sonra parçalı depo (shards/<ad>/), yoksa face_database.json
+export function loadModelFaces(modelPath: string): { faces: any[]; source: string } | null {
+  const aliases = loadFaceAliases(modelPath);
+  const store = loadEmbeddingStore(modelPath, aliases);
+  if (store) {
+    return { faces: store.faces, source: `Binary embedding store (${store.dtype})` };
+  }
+
+  // Parçalı model: her parça ayrı binary depo; yüzler face_shards.json sırasıyla birleştirilir
+  const shardDirs = loadShardDirs(modelPath);
+  if (shardDirs) {
+    const faces: any[] = [];
+    const dtypes = new Set<string>();
+    for (const shardDir of shardDirs) {
+      const part = loadEmbeddingStore(shardDir, aliases);
+      if (!part) {
+        throw new Error(`Parça deposu okunamadı: ${path.relative(modelPath, shardDir)}`);
+      }
+      dtypes.add(part.dtype);
+      for (const face of part.faces) faces.push(face);
+    }
+    return { faces, source: `Sharded binary embedding store (${[...dtypes].join('/')}, ${shardDirs.length} parça)` };
+  }
+
+  const jsonDbPath = path.join(modelPath, 'face_database.json');
+  if (fs.existsSync(jsonDbPath)) {
+    const jsonData = JSON.parse(fs.readFileSync(jsonDbPath, 'utf8'));
+    const faces = Object.entries(jsonData).map(([imagePath, faceData]: [string, any]) => ({
+      imagePath,
+      embedding: faceData.embedding || faceData.normed_embedding,
+      ...faceData,
+      aliases: aliases[imagePath] || []
+    }));
+    return { faces, source: 'JSON database' };
+  }
+
+  return null;
+}
+
+// Kimlik kümeleri (face_clusters.json + face_clusters.bin): küme merkezleri ve üye satırları (face_index.json sırası)
+export function loadFaceClusters(modelPath: string, faceCount: number): FaceClusters | null {
+  const clustersPath = path.join(modelPath, 'face_clusters.json');
+  const centroidsPath = path.join(modelPath, 'face_clusters.bin');
+  try {
+    if (!fs.existsSync(clustersPath) || !fs.existsSync(centroidsPath)) return null;
+    const index = JSON.parse(fs.readFileSync(clustersPath, 'utf8'));
+    // Eski/uyumsuz küme dosyası: tam aramaya dön
+    if (index.version !== 1 || index.count !== faceCount) return null;
+    const buffer = fs.readFileSync(centroidsPath);
+    const byteLength = index.clusters * index.dim * 4;
+    if (buffer.length < byteLength) return null;
+    const centroids = new Float32Array(buffer.buffer.slice(buffer.byteOffset, buffer.byteOffset + byteLength));
+    return { centroids, dim: index.dim, members: index.members, margin: index.margin };
+  } catch {
+    return null;
+  }
+}
+
+// Modelin kimlik kümeleri; parçalı modelde parça kümeleri satır kaydırılarak birleştirilir
+// (her parçada küme yoksa ya da sayılar uyuşmuyorsa null: tam arama)
+export function loadModelClusters(modelPath: string, faceCount: number): FaceClusters | null {
+  if (fs.existsSync(path.join(modelPath, 'face_index.json'))) {
+    return loadFaceClusters(modelPath, faceCount);
+  }
+  let shardDirs: string[] | null;
+  try {
+    shardDirs = loadShardDirs(modelPath);
+  } catch {
+    return null;
+  }
+  if (!shardDirs) return loadFaceClusters(modelPath, faceCount);
+
+  const parts: FaceClusters[] = [];
+  let offset = 0;
+  const members: number[][] = [];
+  for (const shardDir of shardDirs) {
+    let shardCount = 0;
+    try {
+      shardCount = JSON.parse(fs.readFileSync(path.join(shardDir, 'face_index.json'), 'utf8')).count;
+    } catch {
+      return null;
+    }
+    const clusters = loadFaceClusters(shardDir, shardCount);
+    if (!clusters || (parts.length && clusters.dim !== parts[0].dim)) return null;
+    for (const rows of clusters.members) members.push(rows.map((row) => row + offset));
+    parts.push(clusters);
+    offset += shardCount;
+  }
+  if (!parts.length || offset !== faceCount) return null;
+
+  const dim = parts[0].dim;
+  const centroids = new Float32Array(members.length * dim);
+  let position = 0;
+  for (const part of parts) {
+    centroids.set(part.centroids, position);
+    position += part.centroids.length;
+  }
+  return { centroids, dim, members, margin: Math.max(...parts.map((part) => part.margin)) };
+}
+
+// Paylaşılan içerik deposu klasör adı (face_store.PHOTO_BLOB_DIR)
+export const PHOTO_BLOB_DIR = 'photo_blobs';
+
+// Eğitim manifesti (training_manifest.json) dosya kayıtları için önbellek
+const trainingManifestCache = new Map<string, { mtimeMs: number; files: Record<string, any> }>();
+
+// Eğitim manifestinin dosya kayıtları ({göreli yol: {sha1, ...}}); yoksa null
+export function loadTrainingManifest(modelPath: string): Record<string, any> | null {
+  const manifestPath = path.join(modelPath, 'training_manifest.json');
+  try {
+    const { mtimeMs } = fs.statSync(manifestPath);
+    let cached = trainingManifestCache.get(manifestPath);
+    if (!cached || cached.mtimeMs !== mtimeMs) {
+      const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+      cached = { mtimeMs, files: manifest.files || {} };
+      trainingManifestCache.set(manifestPath, cached);
+    }
+    return cached.files;
+  } catch {
+    return null;
+  }
+}
+
+// İçerik deposunda fotoğrafın göreli yolu: <sha1[:2]>/<sha1>.<uzantı> (face_store.photo_blob_path)
+export function blobPhotoName(sha1: string, imagePath: string): string {
+  return path.join(sha1.slice(0, 2), sha1 + path.extname(imagePath).toLowerCase());
+}
+
+// İçerik deposu klasörleri, model klasörüne göre: ZIP ile gelen models/<ad>/photo_blobs/, sonra
+// eğitim makinesindeki paylaşılan depo (models/<ad>/../../photo_blobs/); sunucunun çalışma dizininden bağımsız
+export function blobPhotoDirs(modelPath: string): string[] {
+  return [path.join(modelPath, PHOTO_BLOB_DIR), path.join(modelPath, '..', '..', PHOTO_BLOB_DIR)];
+}
+
+// Model fotoğrafı model klasöründe değil de içerik deposundaysa yolunu bul
+export function resolveBlobPhoto(modelPath: string, imagePath: string): string | null {
+  const entry = loadTrainingManifest(modelPath)?.[imagePath];
+  if (!entry || !entry.sha1) return null;
+  const name = blobPhotoName(entry.sha1, imagePath);
+  for (const blobDir of blobPhotoDirs(modelPath)) {
+    const blobPath = path.join(blobDir, name);
+    if (fs.existsSync(blobPath)) return blobPath;
+  }
+  return null;
+}
@@ -12,13 +12,15 @@ import fs from "fs";
 import { nanoid } from "nanoid";
 import axios from "axios";
 import AdmZip from "adm-zip";
-import { spawn, exec } from "child_process";
+import { spawn, exec, execFile } from "child_process";
 import { promisify } from 'util';
+import { detectModelStore, loadModelClusters, loadModelFaces, resolveBlobPhoto } from "./modelStore";
+import { extractModelArchive } from "./modelArchive";
 
 const execAsync = promisify(exec);
 
 // JavaScript Cosine Similarity hesaplama fonksiyonu
-function calculateCosineSimilarity(a: number[], b: number[]): number {
+function calculateCosineSimilarity(a: ArrayLike<number>, b: ArrayLike<number>): number {
   if (a.length !== b.length) {
     console.warn(`Embedding boyutları eşleşmiyor: ${a.length} vs ${b.length}`);
     return 0.0;
@@ -1506,60 +1508,37 @@ export async function registerRoutes(app: Express): Promise<Server> {
       
       console.log('📸 Yüz resmi alındı:', req.file.originalname, `${req.file.size} bytes`);
       
-      // Python Buffalo-L embedding çıkarımı
-      const pythonScript = `
-import sys
-import os
-import numpy as np
-import cv2
-from insightface.app import FaceAnalysis
-import base64
-import json
-
-try:
-    # Buffalo-L model yükle
-    app = FaceAnalysis(name='buffalo_l', allowed_modules=['recognition'])
-    app.prepare(ctx_id=-1, det_size=(640, 640))
-    
-    # Resmi oku
-    image_path = sys.argv[1]
-    img = cv2.imread(image_path)
-    
-    if img is None:
-        raise Exception("Resim okunamadı")
-    
-    # Yüz detect ve embedding çıkar
-    faces = app.get(img)
-    
-    if len(faces) == 0:
-        print(json.dumps({"success": False, "error": "Yüz bulunamadı"}))
-    else:
-        # İlk yüzün embedding'ini al
-        face = faces[0]
-        embedding = face.embedding.tolist()  # 512D embedding
+      // Önce yerleşik embedding servisini dene (model bir kez yüklenir, istekler toplu işlenir)
+      const embeddingServiceUrl = process.env.EMBEDDING_SERVICE_URL || 'http://127.0.0.1:8765';
+      try {
+        const serviceResponse = await axios.post(`${embeddingServiceUrl}/extract`, req.file.buffer, {
+          headers: { 'Content-Type': 'application/octet-stream' },
+          timeout: 30000,
+          maxBodyLength: Infinity,
+          validateStatus: () => true
+        });
+        const result = serviceResponse.data;
         
-        result = {
-            "success": True,
-            "embedding": embedding,
-            "embedding_size": len(embedding),
-            "confidence": float(face.det_score) if hasattr(face, 'det_score') else 1.0
+        if (serviceResponse.status === 200 && result?.success) {
+          console.log(`✅ Buffalo-L embedding servisten alındı: ${result.embedding_size}D`);
+          return res.json(result);
         }
-        print(json.dumps(result))
-        
-except Exception as e:
-    print(json.dumps({"success": False, "error": str(e)}))
-`;
-
-      // Geçici dosya oluştur
+        if (serviceResponse.status === 400 && result) {
+          console.error('❌ Buffalo-L embedding başarısız (servis):', result.error);
+          return res.status(400).json(result);
+        }
+        console.warn(`⚠️ Embedding servisi beklenmeyen yanıt verdi (${serviceResponse.status}), Python sürecine geçiliyor`);
+      } catch (serviceError) {
+        console.warn('⚠️ Embedding servisine ulaşılamadı, Python sürecine geçiliyor:', (serviceError as Error).message);
+      }
+      
+      // Yedek: istek başına Python süreci. Servisle aynı kod yolu (embedding_service.py --once):
+      // RGB çözme, tespit + tanıma, normalize embedding - eşleştirme skorları servisle aynı kalır
       const tempPath = `/tmp/face_${Date.now()}.jpg`;
-      const fs = await import('fs');
       fs.writeFileSync(tempPath, req.file.buffer);
       
-      // Python script çalıştır
-      const { exec } = await import('child_process');
-      const pythonCommand = `python3 -c "${pythonScript.replace(/"/g, '\\"')}" "${tempPath}"`;
-      
-      exec(pythonCommand, { timeout: 30000 }, (error: any, stdout: any, stderr: any) => {
+      const serviceScript = path.join(process.cwd(), 'embedding_service.py');
+      execFile('python3', [serviceScript, '--once', tempPath], { timeout: 30000 }, (error: any, stdout: any, stderr: any) => {
         // Geçici dosyayı sil
         try { fs.unlinkSync(tempPath); } catch {}
         
@@ -1742,15 +1721,15 @@ except Exception as e:
             continue;
           }
           
-          // JSON veritabanını kontrol et (sadece JSON format destekleniyor)
-          const jsonDbPath = path.join(modelPath, 'face_database.json');
+          // Binary depo (face_index.json), parçalı depo (face_shards.json) veya JSON veritabanını kontrol et
+          const storeKind = detectModelStore(modelPath);
           
-          if (!fs.existsSync(jsonDbPath)) {
-            console.log(`JSON face database bulunamadı: ${modelPath} - Güncel face training GUI kullanın`);
+          if (!storeKind) {
+            console.log(`Face database bulunamadı: ${modelPath} - Güncel face training GUI kullanın`);
             continue;
           }
           
-          console.log(`🎯 JSON veritabanı bulundu: ${jsonDbPath}`);
+          console.log(`🎯 Yüz veritabanı bulundu: ${modelPath} (${storeKind})`);
           
           // Database-based yüz eşleştirmesi yap (PKL dependency olmadan)
           try {
@@ -1807,18 +1786,16 @@ Sadece gerçek Buffalo-S Lite neural network kullanılır.
             let modelFaces: any[] = [];
             let dataSource = 'Database';
             
-            // JSON veritabanını yükle
+            // Binary depoyu (yoksa JSON veritabanını) yükle
             try {
-              const jsonData = JSON.parse(fs.readFileSync(jsonDbPath, 'utf8'));
-              modelFaces = Object.entries(jsonData).map(([imagePath, faceData]: [string, any]) => ({
-                imagePath,
-                embedding: faceData.embedding || faceData.normed_embedding,
-                ...faceData
-              }));
-              dataSource = 'JSON database';
-              console.log(`✅ JSON database yüklendi: ${modelFaces.length} yüz`);
-            } catch (jsonError) {
-              console.log(`❌ JSON database okunamadı: ${jsonError}`);
+              const loaded = loadModelFaces(modelPath);
+              if (loaded) {
+                modelFaces = loaded.faces;
+                dataSource = loaded.source;
+              }
+              console.log(`✅ ${dataSource} yüklendi: ${modelFaces.length} yüz`);
+            } catch (loadError) {
+              console.log(`❌ Yüz veritabanı okunamadı: ${loadError}`);
             }
             
             // 2. Model'e ait database kayıtlarını kontrol et (future enhancement)
@@ -1834,8 +1811,25 @@ Sadece gerçek Buffalo-S Lite neural network kullanılır.
               let maxSimilarity = 0;
               let minSimilarity = 1;
               let similarityCount = 0;
+
+              // Kimlik kümeleri varsa önce merkezleri tara; sadece eşiği (eksi pay) geçen kişilerin yüzlerini aç
+              let candidateFaces = modelFaces;
+              const clusters = loadModelClusters(modelPath, modelFaces.length);
+              if (clusters) {
+                const candidates: any[] = [];
+                let openedClusters = 0;
+                for (let c = 0; c < clusters.members.length; c++) {
+                  const centroid = clusters.centroids.subarray(c * clusters.dim, (c + 1) * clusters.dim);
+                  if (calculateCosineSimilarity(userEmbedding, centroid) >= threshold - clusters.margin) {
+                    openedClusters++;
+                    for (const row of clusters.members[c]) candidates.push(modelFaces[row]);
+                  }
+                }
+                candidateFaces = candidates;
+                console.log(`🧩 Kimlik kümeleri: ${openedClusters}/${clusters.members.length} küme açıldı, ${candidates.length}/${modelFaces.length} yüz taranacak`);
+              }
               
-              for (const face of modelFaces) {
+              for (const face of candidateFaces) {
                 if (!face || !face.embedding) {
                   console.log('⚠️ Geçersiz face objesi veya embedding eksik, atlanıyor');
                   continue;
@@ -1860,6 +1854,15 @@ Sadece gerçek Buffalo-S Lite neural network kullanılır.
                     similarity: similarity,
                     full_path: path.join(modelPath, face.imagePath)
                   });
+                  // Yinelenen fotoğraflar vektör olarak saklanmaz; eşleşen yüzün takma adlarını da ekle
+                  for (const aliasPath of face.aliases || []) {
+                    matches.push({
+                      image_path: aliasPath,
+                      similarity: similarity,
+                      full_path: path.join(modelPath, aliasPath),
+                      alias_of: face.imagePath
+                    });
+                  }
                 }
               }
               
@@ -1918,7 +1921,9 @@ ${matches.map((match: any, i: number) =>
                 
                 // Alternatif yolları dene (denemelik klasörü öncelikli)
                 if (!imageFound) {
+                  const blobPath = resolveBlobPhoto(modelPath, imageName);
                   const possiblePaths = [
+                    ...(blobPath ? [blobPath] : []), // Paylaşılan içerik deposu
                     path.join(modelPath, 'denemelik', imageName), // İlk denemelik
                     path.join(modelPath, imageName),
                     path.join(modelPath, 'photos', imageName),
@@ -1958,8 +1963,10 @@ Model: ${model.name}
 İşlem Tarihi: ${new Date().toLocaleDateString('tr-TR')}
 Durum: Yüz verisi bulunamadı
 Kontrol Edilenler:
-- JSON database: ${fs.existsSync(jsonDbPath) ? 'VAR (okunamadı)' : 'YOK'}
-- Sistem: JSON-only format (PKL desteği kaldırıldı)
+- Binary embedding deposu: ${storeKind === 'binary' ? 'VAR (okunamadı)' : 'YOK'}
+- Parçalı embedding deposu: ${storeKind === 'sharded' ? 'VAR (okunamadı)' : 'YOK'}
+- JSON database: ${storeKind === 'json' ? 'VAR (okunamadı)' : 'YOK'}
+- Sistem: Binary/parçalı/JSON format (PKL desteği kaldırıldı)
 
 Bu model için yüz eşleştirmesi yapılamadı.
 `;
@@ -2339,163 +2346,6 @@ Bu dosyalar şu anda yüz eşleştirme sisteminin çalıştığını doğrular.
     }
   }
 
-  async function extractZipAndMoveData(zipPath: string, currentModelName: string): Promise<{ 
-    faceCount: number; 
-    trainingDataPath: string;
-    modelInfo?: {
-      name: string;
-      description: string;
-      algorithm: string;
-      threshold: number;
-      created_at: string;
-      source_folder: string;
-    };
-  }> {
-    const tempDir = path.join('/tmp', `extract_${Date.now()}`);
-    
-    // Geçici dizin oluştur
-    if (!fs.existsSync(tempDir)) {
-      fs.mkdirSync(tempDir, { recursive: true });
-    }
-    
-    let modelInfo: any = undefined;
-    let finalModelName = currentModelName; // Fallback olarak mevcut isim
-    
-    try {
-      // ZIP dosyasını aç
-      const zip = new AdmZip(zipPath);
-      zip.extractAllTo(tempDir, true);
-      console.log(`ZIP extracted to: ${tempDir}`);
-      
-      // face_training_gui.py'nin yeni yapısına uygun model klasörünü bul
-      // Artık models/model_adı/ formatında direkt oluşturuyor
-      const modelsDir = path.join(tempDir, 'models');
-      let modelDir = '';
-      
-      if (fs.existsSync(modelsDir)) {
-        // Yeni yapı: models/model_adı/
-        const modelFolders = fs.readdirSync(modelsDir);
-        if (modelFolders.length > 0) {
-          modelDir = path.join(modelsDir, modelFolders[0]);
-          finalModelName = modelFolders[0]; // Gerçek model adını al
-          console.log(`New model structure found: models/${finalModelName}/`);
-        } else {
-          throw new Error('Models klasöründe model bulunamadı');
-        }
-      } else {
-        // Eski yapı için backward compatibility: training_package/
-        const trainingPackageDir = path.join(tempDir, 'training_package');
-        if (fs.existsSync(trainingPackageDir)) {
-          modelDir = trainingPackageDir;
-          console.log('Old training_package structure found (backward compatible)');
-        } else {
-          throw new Error('ZIP dosyasında ne models/ ne de training_package/ klasörü bulunamadı');
-        }
-      }
-      
-      // model_info.json dosyasını oku (varsa)
-      const modelInfoPath = path.join(modelDir, 'model_info.json');
-      if (fs.existsSync(modelInfoPath)) {
-        try {
-          const jsonContent = fs.readFileSync(modelInfoPath, 'utf-8');
-          modelInfo = JSON.parse(jsonContent);
-          finalModelName = modelInfo.name; // JSON'dan gerçek model adını al
-          console.log(`Model JSON metadata found: ${modelInfo.name} - ${modelInfo.description}`);
-        } catch (jsonError) {
-          console.warn('model_info.json okunamadı, devam ediliyor:', jsonError);
-        }
-      } else {
-        console.log('model_info.json bulunamadı, varsayılan bilgiler kullanılacak');
-      }
-      
-      // face_database.json dosyasını kontrol et (artık direkt JSON oluşuyor)
-      const jsonDbPath = path.join(modelDir, 'face_database.json');
-      
-      if (!fs.existsSync(jsonDbPath)) {
-        throw new Error('face_database.json dosyası bulunamadı - Güncel face training GUI kullanın');
-      }
-      
-      console.log('✅ JSON veritabanı dosyası bulundu (PKL dependency gerekmez)');
-      
-      // Hedef dizin oluştur (gerçek model adıyla)
-      const targetDir = path.join('./models', finalModelName);
-      if (!fs.existsSync(targetDir)) {
-        fs.mkdirSync(targetDir, { recursive: true });
-      }
-      
-      // Tüm dosya ve klasörleri hedef dizine kopyala (recursive)
-      const copyRecursive = (source: string, destination: string) => {
-        const stats = fs.statSync(source);
-        
-        if (stats.isDirectory()) {
-          // Klasör ise recursive kopyala
-          if (!fs.existsSync(destination)) {
-            fs.mkdirSync(destination, { recursive: true });
-          }
-          const files = fs.readdirSync(source);
-          for (const file of files) {
-            copyRecursive(
-              path.join(source, file),
-              path.join(destination, file)
-            );
-          }
-          console.log(`Copied directory: ${path.basename(source)}`);
-        } else {
-          // Dosya ise direkt kopyala
-          fs.copyFileSync(source, destination);
-          console.log(`Copied file: ${path.basename(source)}`);
-        }
-      };
-      
-      const files = fs.readdirSync(modelDir);
-      for (const file of files) {
-        const sourcePath = path.join(modelDir, file);
-        const targetPath = path.join(targetDir, file);
-        copyRecursive(sourcePath, targetPath);
-      }
-      
-      // Yüz sayısını hesapla (tüm klasörlerde recursive olarak)
-      const countImagesRecursive = (dir: string): number => {
-        let count = 0;
-        const items = fs.readdirSync(dir);
-        for (const item of items) {
-          const fullPath = path.join(dir, item);
-          if (fs.statSync(fullPath).isDirectory()) {
-            count += countImagesRecursive(fullPath);
-          } else if (item.match(/\.(jpg|jpeg|png|bmp|tiff)$/i)) {
-            count++;
-          }
-        }
-        return count;
-      };
-      
-      const faceCount = countImagesRecursive(targetDir);
-      
-      // Geçici dosyaları temizle
-      fs.rmSync(tempDir, { recursive: true, force: true });
-      fs.unlinkSync(zipPath);
-      
-      return {
-        faceCount,
-        trainingDataPath: targetDir,
-        modelInfo: modelInfo ? {
-          name: finalModelName,
-          description: modelInfo.description || 'Model açıklaması yok',
-          algorithm: modelInfo.algorithm || 'InsightFace Buffalo_L',
-          threshold: modelInfo.threshold || 0.5,
-          created_at: modelInfo.created_at || new Date().toISOString(),
-          source_folder: modelInfo.source_folder || 'Bilinmiyor'
-        } : undefined
-      };
-    } catch (error) {
-      // Hata durumunda geçici dosyaları temizle
-      if (fs.existsSync(tempDir)) {
-        fs.rmSync(tempDir, { recursive: true, force: true });
-      }
-      throw error;
-    }
-  }
-
   // Face Models API Endpoints
   // Photo matching routes
   app.post('/api/photo-matching/start-session', requireAuth, async (req: AuthenticatedRequest, res) => {
@@ -2713,7 +2563,7 @@ Bu dosyalar şu anda yüz eşleştirme sisteminin çalıştığını doğrular.
           console.log(`Model status updated to extracting`);
           
           // Açma ve taşıma - JSON metadata ile
-          const { faceCount, trainingDataPath, modelInfo } = await extractZipAndMoveData(tempZipPath, model.name);
+          const { faceCount, trainingDataPath, modelInfo } = await extractModelArchive(tempZipPath, './models', model.name);
           
           // Model bilgilerini JSON'dan güncelle
           const updateData: any = {
@@ -0,0 +1,104 @@
+import sys
+import types
+
+import pytest
+
+onnx = pytest.importorskip("onnx")
+onnxruntime = pytest.importorskip("onnxruntime")
+
+import face_pipeline  # noqa: E402
+
+
+def write_identity_model(path):
+    """Tek Identity düğümlü küçük ONNX modeli (model dosyası indirmeden oturum kurmak için)"""
+    from onnx import TensorProto, helper
+
+    graph = helper.make_graph(
+        [helper.make_node('Identity', ['input'], ['output'])], 'identity',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, [1, 3])],
+        [helper.make_tensor_value_info('output', TensorProto.FLOAT, [1, 3])]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 7
+    onnx.save(model, str(path))
+    return str(path)
+
+
+class FakeModel:
+    def __init__(self, model_file, session):
+        self.model_file = model_file
+        self.session = session
+
+
+def fake_insightface(monkeypatch, model_file, forwards_session_options):
+    """FaceAnalysis yerine geçen sahte insightface.app modülü; oluşturulan uygulamaları döndürür
+
+    forwards_session_options=False insightface 0.7.3 gibi davranır: model_zoo.get_model
+    sess_options'ı oturumlara iletmez.
+    """
+    created = []
+
+    class FaceAnalysis:
+        def __init__(self, name, providers=None, allowed_modules=None, **kwargs):
+            session_options = kwargs.get('sess_options') if forwards_session_options else None
+            self.models = {
+                module: FakeModel(model_file, onnxruntime.InferenceSession(
+                    model_file, sess_options=session_options, providers=providers))
+                for module in allowed_modules
+            }
+            created.append(self)
+
+        def prepare(self, ctx_id, det_size=(640, 640)):
+            pass
+
+    app_module = types.ModuleType('insightface.app')
+    app_module.FaceAnalysis = FaceAnalysis
+    package = types.ModuleType('insightface')
+    package.app = app_module
+    monkeypatch.setitem(sys.modules, 'insightface', package)
+    monkeypatch.setitem(sys.modules, 'insightface.app', app_module)
+    return created
+
+
+def session_threads(face_app):
+    return {name: (model.session.get_session_options().intra_op_num_threads,
+                   model.session.get_session_options().inter_op_num_threads)
+            for name, model in face_app.models.items()}
+
+
+def test_sessions_carry_thread_count_when_insightface_ignores_sess_options(tmp_path, monkeypatch):
+    model_file = write_identity_model(tmp_path / 'identity.onnx')
+    fake_insightface(monkeypatch, model_file, forwards_session_options=False)
+    messages = []
+
+    face_app = face_pipeline.create_face_app(log=messages.append, intra_op_threads=3)
+
+    assert set(face_app.models) == set(face_pipeline.FACE_APP_MODULES)
+    assert session_threads(face_app) == {name: (3, 1) for name in face_app.models}
+    assert any('yeniden kuruldu' in message for message in messages)
+    # Yeniden kurulan oturum aynı modeli çalıştırır
+    session = face_app.models['recognition'].session
+    assert session.run(None, {'input': [[1.0, 2.0, 3.0]]})[0].tolist() == [[1.0, 2.0, 3.0]]
+
+
+def test_forwarded_sess_options_are_not_rebuilt(tmp_path, monkeypatch):
+    model_file = write_identity_model(tmp_path / 'identity.onnx')
+    fake_insightface(monkeypatch, model_file, forwards_session_options=True)
+    messages = []
+
+    face_app = face_pipeline.create_face_app(log=messages.append, intra_op_threads=2)
+    sessions = {name: model.session for name, model in face_app.models.items()}
+
+    assert face_pipeline.apply_session_options(face_app, sessions['detection'].get_session_options()) == 0
+    assert session_threads(face_app) == {name: (2, 1) for name in face_app.models}
+    assert not any('yeniden kuruldu' in message for message in messages)
+
+
+def test_default_threads_leave_sessions_untouched(tmp_path, monkeypatch):
+    model_file = write_identity_model(tmp_path / 'identity.onnx')
+    created = fake_insightface(monkeypatch, model_file, forwards_session_options=False)
+
+    face_app = face_pipeline.create_face_app(intra_op_threads=0)
+
+    assert face_app is created[0]
+    assert all(threads == (0, 0) for threads in session_threads(face_app).values())
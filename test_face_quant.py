@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import face_quant
+from face_quant import EmbeddingMatrix, quantization_scale, quantize_int8
+
+# int8 satır + probe başına int8 probe nicemlemesi: D=64 rastgele birim vektörlerde
+# en büyük cosine hatası ~0.004 ölçüldü; eşik ~3 katı
+INT8_TOLERANCE = 0.015
+# İki int8 yolu (ORT tamsayı çarpımı / float32'ye genişletme) sadece probe nicemlemesinde ayrışır
+PATH_TOLERANCE = 0.01
+
+
+def unit_rows(count, dim, seed):
+    rows = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def quantized():
+    rows = unit_rows(300, 64, 0)
+    # İşaret/kaydırma hatalarını yakalamak için birebir aynı ve ters satırlar
+    rows[0] = unit_rows(1, 64, 1)[0]
+    rows[1] = -rows[0]
+    scale = quantization_scale([rows], rows.shape[1])
+    return rows, quantize_int8(rows, scale), scale
+
+
+def int8_matrices(codes, scale):
+    integer = EmbeddingMatrix(codes, scale)
+    if not integer.integer_scoring:
+        pytest.skip("onnxruntime/onnx yok: tamsayı çarpımı kurulamadı")
+    widened = EmbeddingMatrix(codes, scale)
+    widened.session = None  # ONNX Runtime olmayan ortamdaki yol
+    return integer, widened
+
+
+def test_int8_paths_match_float32_cosine(quantized, monkeypatch):
+    rows, codes, scale = quantized
+    monkeypatch.setattr(face_quant, 'INTEGER_SCORE_BLOCK', 64)  # Birden fazla blok ve kısmi son blok
+    integer, widened = int8_matrices(codes, scale)
+    probes = np.concatenate([rows[:1], unit_rows(15, 64, 2)])
+    reference = probes @ rows.T
+
+    integer_scores = integer.dot(probes)
+    widened_scores = widened.dot(probes)
+
+    assert integer_scores.shape == widened_scores.shape == reference.shape
+    assert integer_scores.dtype == np.float32
+    assert np.abs(integer_scores - reference).max() < INT8_TOLERANCE
+    assert np.abs(widened_scores - reference).max() < INT8_TOLERANCE
+    assert np.abs(integer_scores - widened_scores).max() < PATH_TOLERANCE
+    assert integer_scores[0, 0] == pytest.approx(1.0, abs=INT8_TOLERANCE)
+    assert integer_scores[0, 1] == pytest.approx(-1.0, abs=INT8_TOLERANCE)
+
+
+def test_int8_row_ranges_and_rows(quantized):
+    rows, codes, scale = quantized
+    integer, widened = int8_matrices(codes, scale)
+    probes = unit_rows(3, 64, 3)
+    reference = probes @ rows.T
+
+    for matrix in (integer, widened):
+        np.testing.assert_allclose(matrix.dot(probes, 100, 170), matrix.dot(probes)[:, 100:170], atol=1e-6)
+        assert matrix.dot(probes, 290, 400).shape == (3, 10)
+        assert matrix.dot(probes, 50, 50).shape == (3, 0)
+        np.testing.assert_allclose(matrix.row_dot(probes[0], [5, 0, 250]), reference[0, [5, 0, 250]],
+                                   atol=INT8_TOLERANCE)
+    np.testing.assert_allclose(integer.to_float32(), rows, atol=INT8_TOLERANCE)
+    np.testing.assert_array_equal(integer.int8_rows(slice(None)), codes)
+
+
+def test_float32_matrix_scores_are_exact_cosine():
+    rows = unit_rows(50, 16, 4) * 3.0  # Normalize edilmemiş satırlar
+    probes = unit_rows(4, 16, 5)
+    matrix = EmbeddingMatrix(rows)
+
+    assert not matrix.integer_scoring
+    np.testing.assert_allclose(matrix.dot(probes), probes @ (rows / 3.0).T, atol=1e-5)
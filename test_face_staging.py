@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pytest
+
+from face_staging import STAGING_META, StagedFaceDatabase
+from face_store import load_embedding_store
+
+DIM = 8
+
+
+def add_file(staged, relative_path, face_count, seed):
+    """Dosyanın sentetik yüzlerini ve manifest kaydını ekle; {anahtar: embedding} döndür"""
+    rng = np.random.default_rng(seed)
+    faces = {}
+    for face in range(face_count):
+        key = f"{relative_path}||face_{face}"
+        embedding = rng.standard_normal(DIM).astype(np.float32)
+        staged.add_face(key, {
+            'embedding': embedding, 'path': relative_path, 'bbox': [face, 0, face + 10, 10],
+            'kps': None, 'confidence': 0.9
+        })
+        faces[key] = embedding
+    staged.add_file(relative_path, {'size': 100 + seed, 'mtime': float(seed), 'sha1': f"{seed:040x}"})
+    return faces
+
+
+def open_staging(root, options=None):
+    return StagedFaceDatabase.open('model', '/photos', False, options=options, staging_root=str(root), dim=DIM)
+
+
+def finalized(staged, model_dir, dtype='float32'):
+    os.makedirs(model_dir, exist_ok=True)
+    staged.finalize(model_dir, dtype=dtype)
+    store = load_embedding_store(model_dir, mmap=False)
+    return dict(zip(store.keys, store.float_embeddings()))
+
+
+def test_committed_chunks_survive_reopen(tmp_path):
+    staged, resumed = open_staging(tmp_path)
+    assert resumed is False
+    faces = add_file(staged, 'a.jpg', 2, 1)
+    faces.update(add_file(staged, 'empty.jpg', 0, 2))
+    staged.commit()
+    faces.update(add_file(staged, 'b.jpg', 1, 3))
+    staged.commit()
+    manifest = dict(staged.manifest)
+
+    reopened, resumed = open_staging(tmp_path)
+
+    assert resumed is True
+    assert reopened.committed_chunks == 2
+    assert reopened.manifest == manifest
+    assert len(reopened) == 3
+    assert reopened.face_paths() == {'a.jpg', 'b.jpg'}
+    stored = finalized(reopened, str(tmp_path / 'out'))
+    assert set(stored) == set(faces)
+
+
+def test_uncommitted_tail_is_dropped(tmp_path):
+    staged, _ = open_staging(tmp_path)
+    faces = add_file(staged, 'a.jpg', 2, 1)
+    staged.commit()
+    add_file(staged, 'lost.jpg', 1, 2)  # Bekleyen parça: commit edilmeden süreç ölür
+    # Commit işareti (.json) yazılmadan kesilmiş parça artıkları
+    (tmp_path / 'model' / 'chunk_000002.bin').write_bytes(b'\0' * 4 * DIM)
+    (tmp_path / 'model' / 'chunk_000002.json.tmp').write_text('{')
+
+    reopened, resumed = open_staging(tmp_path)
+
+    assert resumed is True
+    assert set(reopened.manifest) == {'a.jpg'}
+    assert not (tmp_path / 'model' / 'chunk_000002.bin').exists()
+    assert not (tmp_path / 'model' / 'chunk_000002.json.tmp').exists()
+
+    # Devam eden eğitim yeni parçayı aynı numarayla yazar
+    faces.update(add_file(reopened, 'c.jpg', 1, 3))
+    reopened.commit()
+    assert set(finalized(reopened, str(tmp_path / 'out'))) == set(faces)
+
+
+def test_changed_pipeline_options_restart_staging(tmp_path):
+    staged, _ = open_staging(tmp_path, options={'detect_max_side': 0, 'quality': None})
+    add_file(staged, 'a.jpg', 1, 1)
+    staged.commit()
+
+    same, resumed = open_staging(tmp_path, options={'quality': None, 'detect_max_side': 0})
+    assert resumed is True and set(same.manifest) == {'a.jpg'}
+
+    changed, resumed = open_staging(tmp_path, options={'detect_max_side': 1600, 'quality': None})
+    assert resumed is False
+    assert changed.manifest == {}
+    assert changed.committed_chunks == 0
+    assert sorted(os.listdir(tmp_path / 'model')) == [STAGING_META]
+
+
+def test_forget_and_reprocessed_files(tmp_path):
+    staged, _ = open_staging(tmp_path)
+    add_file(staged, 'a.jpg', 1, 1)
+    add_file(staged, 'deleted.jpg', 2, 2)
+    staged.commit()
+    newer = add_file(staged, 'a.jpg', 1, 3)  # Değişip yeniden işlenen dosya: en son parça geçerli
+    staged.commit()
+
+    staged.forget(['deleted.jpg'])
+
+    assert set(staged.manifest) == {'a.jpg'}
+    assert staged.manifest['a.jpg']['size'] == 103
+    stored = finalized(staged, str(tmp_path / 'out'))
+    assert list(stored) == ['a.jpg||face_0']
+    np.testing.assert_array_equal(stored['a.jpg||face_0'], newer['a.jpg||face_0'])
+
+
+@pytest.mark.parametrize('dtype, tolerance', [('float32', 0.0), ('float16', 1e-3), ('int8', 2e-2)])
+def test_finalize_round_trips_binary_store(tmp_path, dtype, tolerance):
+    staged, _ = open_staging(tmp_path)
+    faces = {}
+    for index in range(6):
+        faces.update(add_file(staged, f"day{index % 2}/img_{index}.jpg", index % 3 + 1, index))
+        if index == 2:
+            staged.commit()
+
+    model_dir = str(tmp_path / 'out')
+    stored = finalized(staged, model_dir, dtype=dtype)
+    store = load_embedding_store(model_dir)
+
+    assert store.keys == list(faces)
+    assert store.paths == [key.split('||')[0] for key in faces]
+    faces_in_file = [int(key.rsplit('_', 1)[1]) for key in faces]
+    assert store.bboxes == [[face, 0, face + 10, 10] for face in faces_in_file]
+    for key, embedding in faces.items():
+        expected = embedding if dtype == 'float32' else embedding / np.linalg.norm(embedding)
+        actual = stored[key] if dtype == 'float32' else stored[key] / np.linalg.norm(stored[key])
+        np.testing.assert_allclose(actual, expected, atol=tolerance, rtol=0)